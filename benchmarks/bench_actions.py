@@ -0,0 +1,70 @@
+# Waiting for actions: scanning actionStates per pending action vs. the
+# ActionTracker, with 1k AGVs of 50 actions each and one change per State
+#
+# Run from the repository root: python -m benchmarks.bench_actions
+
+import asyncio
+import time
+
+from vda5050.action_tracker import TERMINAL, ActionTracker
+from vda5050.state import ActionState, ActionStatus, State
+
+from .fixtures import make_state
+
+N_AGVS = 1000
+N_ACTIONS = 50
+ROUNDS = 5
+
+
+def states():
+    # Every round finishes one more action per AGV
+    base = State.parse_obj(make_state(n_nodes=4, trajectories=False))
+    for round_ in range(ROUNDS):
+        for agv in range(N_AGVS):
+            state = base.copy(update={"serialNumber": "agv-%d" % agv})
+            state.actionStates = [
+                ActionState(actionId="a%d" % i, actionType="pick",
+                            actionStatus=ActionStatus.FINISHED if i <= round_
+                            else ActionStatus.WAITING)
+                for i in range(N_ACTIONS)
+            ]
+            yield state
+
+
+def scan(messages):
+    pending = {("acme", "agv-%d" % agv): set("a%d" % i for i in range(N_ACTIONS))
+               for agv in range(N_AGVS)}
+    done = 0
+    start = time.perf_counter()
+    for state in messages:
+        waiting = pending[(state.manufacturer, state.serialNumber)]
+        for action_id in list(waiting):
+            for action_state in state.actionStates:
+                if action_state.actionId == action_id and action_state.actionStatus in TERMINAL:
+                    waiting.discard(action_id)
+                    done += 1
+    return time.perf_counter() - start, done
+
+
+async def tracked(messages):
+    tracker = ActionTracker()
+    futures = [tracker.wait("acme", "agv-%d" % agv, "a%d" % i)
+               for agv in range(N_AGVS) for i in range(N_ACTIONS)]
+    start = time.perf_counter()
+    for state in messages:
+        tracker.update(state)
+    elapsed = time.perf_counter() - start
+    return elapsed, sum(future.done() for future in futures)
+
+
+def main():
+    messages = list(states())
+    print("%d States, %d pending actions" % (len(messages), N_AGVS * N_ACTIONS))
+    elapsed, done = scan(messages)
+    print("scan:    %7.2f us/State, %d finished" % (elapsed / len(messages) * 1e6, done))
+    elapsed, done = asyncio.run(tracked(messages))
+    print("tracker: %7.2f us/State, %d finished" % (elapsed / len(messages) * 1e6, done))
+
+
+if __name__ == "__main__":
+    main()
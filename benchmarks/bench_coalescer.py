@@ -0,0 +1,63 @@
+# Visualization fan-out for 5k AGVs at 10 Hz: frames in vs. poses out per
+# 1 Hz snapshot, without and with a deadband, and the cost per frame
+#
+# Run from the repository root: python -m benchmarks.bench_coalescer
+
+import math
+import random
+import time
+
+from vda5050.coalescer import PositionCoalescer
+from vda5050.state import AgvPosition, Velocity
+
+N_AGVS = 5000
+FRAMES_PER_SECOND = 10
+SECONDS = 5
+# A quarter of the fleet is parked
+PARKED = 0.25
+
+
+def frames(rnd):
+    speeds = [0.0 if rnd.random() < PARKED else rnd.uniform(0.5, 2.0) for _ in range(N_AGVS)]
+    headings = [rnd.uniform(-math.pi, math.pi) for _ in range(N_AGVS)]
+    dt = 1.0 / FRAMES_PER_SECOND
+    for step in range(SECONDS * FRAMES_PER_SECOND):
+        batch = []
+        for i in range(N_AGVS):
+            distance = speeds[i] * dt * step
+            # Parked vehicles still jitter a little in their localization
+            jitter = rnd.gauss(0.0, 0.005)
+            batch.append(("acme", "agv-%d" % i, AgvPosition.construct(
+                x=distance * math.cos(headings[i]) + jitter,
+                y=distance * math.sin(headings[i]), theta=headings[i] + jitter,
+                mapId="hall", positionInitialized=True),
+                Velocity.construct(vx=speeds[i], vy=0.0, omega=0.0)))
+        yield batch
+
+
+def run(coalescer, batches):
+    out = 0
+    start = time.perf_counter()
+    for step, batch in enumerate(batches):
+        for manufacturer, serial, position, velocity in batch:
+            coalescer.update(manufacturer, serial, position, velocity)
+        if step % FRAMES_PER_SECOND == FRAMES_PER_SECOND - 1:
+            out += len(coalescer.snapshot().poses)
+    return out, time.perf_counter() - start
+
+
+def main():
+    batches = list(frames(random.Random(5050)))
+    received = N_AGVS * FRAMES_PER_SECOND * SECONDS
+    print("%d frames in over %d s" % (received, SECONDS))
+    for title, coalescer in (
+            ("no deadband", PositionCoalescer(rate=1.0)),
+            ("deadband 5 cm / 2 deg", PositionCoalescer(rate=1.0, epsilon=0.05,
+                                                       delta=math.radians(2)))):
+        out, elapsed = run(coalescer, batches)
+        print("%-22s %7d poses out (%.1f%%), %.2f us per frame"
+              % (title, out, out * 100.0 / received, elapsed / received * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+# Encode/decode time and wire size of the available codecs for State and Order
+#
+# Run from the repository root: python -m benchmarks.bench_codec
+
+import time
+
+from vda5050.codec import CODECS
+from vda5050.order import Order
+from vda5050.state import State
+
+from .fixtures import make_order, make_state
+
+REPEAT = 50
+
+
+def per_call(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    fixtures = [
+        ("State, 200 nodes with trajectories", State, State.parse_obj(make_state(n_nodes=200))),
+        ("Order, 50 nodes", Order, Order.parse_obj(make_order(n_nodes=50))),
+    ]
+    for title, model, message in fixtures:
+        reference = message.json()
+        print(title)
+        print("  %-14s %8d bytes  encode %8.1f us"
+              % (".json()", len(reference), per_call(message.json) * 1e6))
+        for name, codec in CODECS.items():
+            payload = codec.encode(message)
+            assert codec.decode(model, payload).json() == reference
+            encode = per_call(lambda: codec.encode(message))
+            decode = per_call(lambda: codec.decode(model, payload, validate=False))
+            print("  %-14s %8d bytes  encode %8.1f us  decode %8.1f us"
+                  % (name, len(payload), encode * 1e6, decode * 1e6))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,55 @@
+# Envelope conflict detection for a fleet: path sweeping and detect() per state cycle
+#
+# Run from the repository root: python -m benchmarks.bench_collision
+
+import random
+import time
+
+from vda5050.collision import ConflictDetector
+from vda5050.factsheet import FactSheet
+from vda5050.state import State
+
+from .fixtures import make_factsheet, make_state
+
+N_AGVS = 300
+SIZE = 300.0
+ROUTE_NODES = 5
+
+
+def main():
+    rnd = random.Random(5050)
+    detector = ConflictDetector()
+    states = []
+    for i in range(N_AGVS):
+        serial = "agv-%04d" % i
+        detector.set_factsheet(FactSheet.parse_obj(make_factsheet(serial=serial)))
+        x, y = rnd.uniform(0, SIZE), rnd.uniform(0, SIZE)
+        data = make_state(serial=serial, n_nodes=ROUTE_NODES, trajectories=False, x=x, y=y)
+        for j, node in enumerate(data["nodeStates"]):
+            x += rnd.uniform(-8, 8)
+            y += rnd.uniform(-8, 8)
+            node["sequenceId"] = 2 * j + 2
+            node["nodePosition"].update(x=x, y=y)
+        states.append(State.parse_obj(data))
+
+    start = time.perf_counter()
+    for state in states:
+        detector.update(state)
+    sweep = time.perf_counter() - start
+
+    start = time.perf_counter()
+    pairs = detector.candidate_pairs()
+    broad = time.perf_counter() - start
+    start = time.perf_counter()
+    conflicts = detector.detect()
+    detect = time.perf_counter() - start
+
+    print("%d AGVs, %d time slots per path" % (N_AGVS, len(detector.paths["agv-0000"].times)))
+    print("  sweep all paths    %8.2f ms (%.1f us/AGV)" % (sweep * 1e3, sweep / N_AGVS * 1e6))
+    print("  broad phase        %8.2f ms, %d candidate pairs of %d"
+          % (broad * 1e3, len(pairs), N_AGVS * (N_AGVS - 1) // 2))
+    print("  detect             %8.2f ms, %d conflicts" % (detect * 1e3, len(conflicts)))
+
+
+if __name__ == "__main__":
+    main()
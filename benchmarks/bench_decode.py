@@ -0,0 +1,41 @@
+# State decode throughput: State.parse_raw vs. the decoder's strict and trusted modes
+#
+# Run from the repository root: python -m benchmarks.bench_decode
+
+import json
+import time
+
+from vda5050.decoder import decode_state
+from vda5050.state import State
+
+from .fixtures import make_state
+
+
+def rate(fn, payload, seconds=1.0):
+    count = 0
+    start = time.perf_counter()
+    end = start + seconds
+    while True:
+        for _ in range(50):
+            fn(payload)
+        count += 50
+        now = time.perf_counter()
+        if now >= end:
+            return count / (now - start)
+
+
+def main():
+    for n_nodes in (10, 200):
+        payload = json.dumps(make_state(n_nodes=n_nodes)).encode()
+        print("State with %d nodes (%d bytes)" % (n_nodes, len(payload)))
+        results = [
+            ("State.parse_raw", rate(State.parse_raw, payload)),
+            ("decode_state strict", rate(decode_state, payload)),
+            ("decode_state trusted", rate(lambda p: decode_state(p, validate=False), payload)),
+        ]
+        for name, msgs in results:
+            print("  %-22s %10.0f msgs/s" % (name, msgs))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,70 @@
+# State history: recording rate and "AGV X between t1 and t2" reads from
+# the columnar history vs. scanning a JSON-lines log of the same States
+#
+# Run from the repository root: python -m benchmarks.bench_history
+
+import os
+import shutil
+import tempfile
+import time
+
+from vda5050.codec import encode
+from vda5050.decoder import loads
+from vda5050.history import HistoryReader, HistoryRecorder
+from vda5050.state import State
+
+from .fixtures import make_state
+
+N_AGVS = 200
+SECONDS = 1000
+SEGMENT_SECONDS = 300.0
+N_QUERIES = 200
+
+
+def main():
+    base = State.parse_obj(make_state(n_nodes=10, trajectories=False))
+    states = [base.copy(update={"serialNumber": "agv-%d" % i}) for i in range(N_AGVS)]
+    payloads = [encode(state) for state in states]
+    root = tempfile.mkdtemp()
+    try:
+        start = time.perf_counter()
+        with HistoryRecorder(os.path.join(root, "history"), SEGMENT_SECONDS) as recorder:
+            for second in range(SECONDS):
+                for state in states:
+                    recorder.record(state, t=float(second))
+        elapsed = time.perf_counter() - start
+        rows = N_AGVS * SECONDS
+        print("record:  %d States in %.2f s, %.0f States/s" % (rows, elapsed, rows / elapsed))
+
+        log = os.path.join(root, "states.jsonl")
+        with open(log, "wb") as f:
+            for second in range(SECONDS):
+                for payload in payloads:
+                    f.write(payload + b"\n")
+        history_size = sum(os.path.getsize(os.path.join(directory, name))
+                           for directory, _, names in os.walk(os.path.join(root, "history"))
+                           for name in names)
+        print("size:    %.1f MB columnar, %.1f MB JSON lines"
+              % (history_size / 1e6, os.path.getsize(log) / 1e6))
+
+        reader = HistoryReader(os.path.join(root, "history"))
+        start = time.perf_counter()
+        for query in range(N_QUERIES):
+            columns = reader.read("agv-%d" % (query % N_AGVS), 400.0, 700.0)
+        elapsed = (time.perf_counter() - start) / N_QUERIES
+        print("read:    %.2f ms per query, %d rows" % (elapsed * 1e3, len(columns["time"])))
+
+        # The log has no receive time, so line numbers stand in for it
+        start = time.perf_counter()
+        found = 0
+        with open(log, "rb") as f:
+            for line_number, line in enumerate(f):
+                if 400 <= line_number // N_AGVS < 700 and loads(line)["serialNumber"] == "agv-0":
+                    found += 1
+        print("scan:    %.2f ms per query, %d rows" % ((time.perf_counter() - start) * 1e3, found))
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == "__main__":
+    main()
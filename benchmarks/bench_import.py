@@ -0,0 +1,43 @@
+# Cold import time and peak RSS of the package in fresh interpreters
+#
+# Run from the repository root: python -m benchmarks.bench_import [statement ...]
+
+import statistics
+import subprocess
+import sys
+
+STATEMENTS = [
+    "import vda5050",
+    "import vda5050.state",
+    "import vda5050.order, vda5050.state, vda5050.factsheet",
+    "import vda5050.vda5050_types",
+]
+
+CODE = """
+import resource, time
+start = time.perf_counter()
+%s
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)
+"""
+
+RUNS = 30
+
+
+def measure(statement):
+    times, rss = [], []
+    for _ in range(RUNS):
+        out = subprocess.run([sys.executable, "-c", CODE % statement], capture_output=True,
+                             text=True, check=True).stdout.split()
+        times.append(float(out[0]))
+        rss.append(int(out[1]))
+    return statistics.median(times), statistics.median(rss)
+
+
+def main():
+    for statement in sys.argv[1:] or STATEMENTS:
+        seconds, rss = measure(statement)
+        print("%-60s %7.1f ms %8d KiB" % (statement, seconds * 1e3, rss))
+
+
+if __name__ == "__main__":
+    main()
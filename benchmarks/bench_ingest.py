@@ -0,0 +1,49 @@
+# State ingestion throughput: one process vs. StateIngest with N workers
+#
+# Run from the repository root: python -m benchmarks.bench_ingest
+
+import multiprocessing
+import time
+
+from vda5050.codec import encode
+from vda5050.decoder import decode
+from vda5050.ingest import StateIngest
+from vda5050.state import State
+
+from .fixtures import make_state
+
+N_AGVS = 200
+N_MESSAGES = 4000
+
+
+def main():
+    payloads = [
+        ("agv-%04d" % (i % N_AGVS),
+         encode(State.parse_obj(make_state(serial="agv-%04d" % (i % N_AGVS), header_id=i))))
+        for i in range(N_MESSAGES)
+    ]
+    start = time.perf_counter()
+    for _, payload in payloads:
+        decode(State, payload)
+    print("single process   %8.0f msgs/s" % (N_MESSAGES / (time.perf_counter() - start)))
+
+    cpus = multiprocessing.cpu_count()
+    for workers in sorted({1, 2, 4, cpus}):
+        with StateIngest(workers) as ingest:
+            received = 0
+            last_header = {}
+            start = time.perf_counter()
+            for serial, payload in payloads:
+                ingest.submit(serial, payload)
+                for summary in ingest.poll():
+                    received += 1
+                    assert summary.headerId > last_header.get(summary.serialNumber, -1)
+                    last_header[summary.serialNumber] = summary.headerId
+            while received < N_MESSAGES:
+                received += len(ingest.poll())
+            elapsed = time.perf_counter() - start
+        print("%2d worker(s)     %8.0f msgs/s" % (workers, N_MESSAGES / elapsed))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Instant action latency under Order load: publishing on the order
+# connection vs. the PriorityPublisher's own connection. Latency is taken
+# from the publish call to the socket write (QoS 0 on_publish) and to
+# delivery back through the broker.
+#
+# Run from the repository root with a broker: python -m benchmarks.bench_instant [--broker HOST]
+
+import argparse
+import asyncio
+import itertools
+import statistics
+import time
+
+from vda5050.dispatcher import OrderDispatcher
+from vda5050.gateway import Gateway
+from vda5050.instant_actions import InstantActions
+from vda5050.order import Action, Order
+from vda5050.priority import PriorityPublisher
+from vda5050.topics import INSTANT_ACTIONS
+
+from .fixtures import make_order
+
+N_AGVS = 1000
+ORDERS_PER_BATCH = 5
+BATCH_INTERVAL = 0.01
+SAMPLES = 300
+SAMPLE_INTERVAL = 0.02
+DRAIN_TIMEOUT = 10.0
+
+
+def percentiles(latencies):
+    ordered = sorted(latencies)
+    p50 = statistics.median(ordered)
+    p99 = ordered[min(int(len(ordered) * 0.99), len(ordered) - 1)]
+    return p50 * 1e3, p99 * 1e3
+
+
+async def load(dispatcher, orders):
+    for i in itertools.count():
+        for j in range(ORDERS_PER_BATCH):
+            order = orders[(i * ORDERS_PER_BATCH + j) % len(orders)]
+            dispatcher.submit(order.copy(update={"orderUpdateId": i}))
+        await asyncio.sleep(BATCH_INTERVAL)
+
+
+async def measure(name, publish, client, receiver):
+    # Publish call time and socket write time per mid
+    starts = {}
+    writes = {}
+    previous = client.on_publish
+
+    def on_publish(client, userdata, mid):
+        # paho may write, and call this, before publish() returns
+        writes[mid] = time.perf_counter()
+        if previous is not None:
+            previous(client, userdata, mid)
+
+    client.on_publish = on_publish
+    sent = {}
+    delivered = []
+
+    async def receive():
+        async for received in receiver.messages(INSTANT_ACTIONS):
+            if received.serialNumber == name:
+                delivered.append(time.perf_counter() - sent[received.payload.headerId])
+
+    receiving = asyncio.ensure_future(receive())
+    for i in range(SAMPLES):
+        message = InstantActions(
+            headerId=i, manufacturer="acme", serialNumber=name,
+            actions=[Action(actionType="startPause", actionId="%s-%d" % (name, i))])
+        start = sent[i] = time.perf_counter()
+        starts[publish(message).mid] = start
+        await asyncio.sleep(SAMPLE_INTERVAL)
+    # Give messages still queued behind orders time to go out
+    deadline = time.perf_counter() + DRAIN_TIMEOUT
+    while len(delivered) < SAMPLES and time.perf_counter() < deadline:
+        await asyncio.sleep(0.05)
+    receiving.cancel()
+    client.on_publish = previous
+    written = [writes[mid] - start for mid, start in starts.items() if mid in writes]
+    return written, delivered
+
+
+async def main(args):
+    orders = [Order.parse_obj(make_order("agv-%d" % i, n_nodes=50, actions_per_node=2))
+              for i in range(N_AGVS)]
+    async with Gateway(args.broker, subtopics=()) as orders_gateway, \
+            PriorityPublisher(args.broker, qos=0) as priority, \
+            Gateway(args.broker, subtopics=(INSTANT_ACTIONS,), queue_size=10000) as receiver:
+        dispatcher = OrderDispatcher(orders_gateway, max_inflight=1000)
+        tasks = [asyncio.ensure_future(dispatcher.run()),
+                 asyncio.ensure_future(load(dispatcher, orders))]
+        await asyncio.sleep(1.0)
+        lanes = [
+            ("order connection", "shared",
+             lambda m: orders_gateway.publish_instant_actions(m, 0), orders_gateway.client),
+            ("priority lane", "priority", priority.publish, priority.gateway.client),
+        ]
+        for title, name, publish, client in lanes:
+            written, delivered = await measure(name, publish, client, receiver)
+            print("%-17s socket write p50 %8.2f ms  p99 %8.2f ms (%d/%d)"
+                  % ((title,) + percentiles(written) + (len(written), SAMPLES)))
+            if delivered:
+                print("%-17s delivered    p50 %8.2f ms  p99 %8.2f ms (%d/%d)"
+                      % (("",) + percentiles(delivered) + (len(delivered), SAMPLES)))
+        print("orders sent: %d" % dispatcher.sent)
+        for task in tasks:
+            task.cancel()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--broker", default="127.0.0.1")
+    asyncio.run(main(parser.parse_args()))
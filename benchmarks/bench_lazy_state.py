@@ -0,0 +1,50 @@
+# Decode cost for a consumer that reads agvPosition, batteryState and
+# errors: State vs. LazyState, strict and trusted, and LazyState when every
+# field ends up being read
+#
+# Run from the repository root: python -m benchmarks.bench_lazy_state
+
+import json
+import time
+
+from vda5050.decoder import decode_lazy_state, decode_state
+
+from .fixtures import make_state
+
+
+def rate(fn, payload, seconds=1.0):
+    count = 0
+    start = time.perf_counter()
+    end = start + seconds
+    while True:
+        for _ in range(50):
+            fn(payload)
+        count += 50
+        now = time.perf_counter()
+        if now >= end:
+            return count / (now - start)
+
+
+def read_summary(state):
+    return state.agvPosition, state.batteryState.batteryCharge, len(state.errors)
+
+
+def main():
+    for n_nodes in (10, 200):
+        payload = json.dumps(make_state(n_nodes=n_nodes)).encode()
+        print("State with %d nodes (%d bytes)" % (n_nodes, len(payload)))
+        for validate in (True, False):
+            mode = "strict" if validate else "trusted"
+            results = [
+                ("State", rate(lambda p: read_summary(decode_state(p, validate)), payload)),
+                ("LazyState", rate(lambda p: read_summary(decode_lazy_state(p, validate)),
+                                   payload)),
+                ("LazyState, all read", rate(
+                    lambda p: decode_lazy_state(p, validate).materialize(), payload)),
+            ]
+            for name, msgs in results:
+                print("  %-8s %-20s %10.0f msgs/s" % (mode, name, msgs))
+
+
+if __name__ == "__main__":
+    main()
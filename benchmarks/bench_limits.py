@@ -0,0 +1,37 @@
+# Protocol limit check latency per order, next to the cost of encoding it
+#
+# Run from the repository root: python -m benchmarks.bench_limits
+
+import time
+
+from vda5050.limits import OrderLimits
+from vda5050.factsheet import FactSheet
+from vda5050.order import Order
+
+from .fixtures import make_factsheet, make_order
+
+REPEAT = 500
+
+
+def per_call(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def main():
+    limits = OrderLimits(FactSheet.parse_obj(make_factsheet()))
+    for n_nodes in (10, 50):
+        order = Order.parse_obj(make_order(n_nodes=n_nodes))
+        payload = order.json().encode()
+        assert not limits.check_order(order, payload)
+        encode = per_call(lambda: order.json().encode())
+        check = per_call(lambda: limits.check_order(order, payload))
+        print("order with %d nodes (%d bytes)" % (n_nodes, len(payload)))
+        print("  encode        %8.1f us" % (encode * 1e6))
+        print("  limit check   %8.1f us (%.0f%% of encode)" % (check * 1e6, 100 * check / encode))
+
+
+if __name__ == "__main__":
+    main()
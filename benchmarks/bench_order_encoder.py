@@ -0,0 +1,75 @@
+# Encoding the updates of a long order: Order.json() and codec.encode()
+# re-encode every node and edge, OrderEncoder only the new and changed ones.
+# "planner" feeds the updates of an OrderPlanner, which keeps unchanged
+# elements as the same objects; "copied" makes a shallow copy of every
+# element, so unchanged ones are recognized by their field values;
+# "rebuilt" deep-copies every update, which OrderEncoder encodes in full.
+# OrderEncoder verifies every reused fragment against a snapshot of the
+# element; with verify=False it trusts the planner not to edit elements.
+#
+# Run from the repository root: python -m benchmarks.bench_order_encoder
+
+import time
+
+from vda5050.codec import encode
+from vda5050.order import Order
+from vda5050.order_encoder import OrderEncoder
+from vda5050.order_planner import OrderPlanner
+
+from .fixtures import make_order
+
+ROUTE_NODES = 2000
+MAX_NODES = 400
+BASE_NODES = 40
+
+
+def planner_updates():
+    route = Order.parse_obj(make_order(n_nodes=ROUTE_NODES, actions_per_node=2))
+    planner = OrderPlanner(route.manufacturer, route.serialNumber, route.orderId,
+                           route.nodes, route.edges, MAX_NODES, BASE_NODES, lookahead=0)
+    updates = [planner.first_order()]
+    while not planner.done:
+        updates.append(planner._order(planner.base_end))
+    return updates
+
+
+def run(name, make_encoder, updates, reference=None, repeats=3):
+    # Best of a few passes over all updates, with a fresh encoder each
+    elapsed = float("inf")
+    for _ in range(repeats):
+        encoder = make_encoder()
+        start = time.perf_counter()
+        payloads = [encoder(order) for order in updates]
+        elapsed = min(elapsed, time.perf_counter() - start)
+    if reference is not None:
+        assert payloads == reference, name
+    print("  %-26s %8.2f ms/update" % (name, elapsed / len(updates) * 1e3))
+    return payloads
+
+
+def main():
+    updates = planner_updates()
+    copied = [order.copy(update={"nodes": [node.copy() for node in order.nodes],
+                                 "edges": [edge.copy() for edge in order.edges]})
+              for order in updates]
+    rebuilt = [order.copy(deep=True) for order in updates]
+    print("%d updates of %d nodes, %d new released nodes each"
+          % (len(updates), MAX_NODES, BASE_NODES - 1))
+    for name, orders in (("planner", updates), ("copied", copied), ("rebuilt", rebuilt)):
+        print(name)
+        reference = run("codec.encode", lambda: encode, orders)
+        run("Order.json", lambda: lambda order: order.json().encode(), orders)
+        for verify in (True, False):
+            order_encoders = []
+
+            def make_order_encoder():
+                order_encoders.append(OrderEncoder(verify))
+                return order_encoders[-1].encode
+
+            run("OrderEncoder verify=%s" % verify, make_order_encoder, orders, reference)
+            hits, misses = order_encoders[-1].hits, order_encoders[-1].misses
+            print("  %-26s %8.1f%%" % ("  fragments reused", 100.0 * hits / (hits + misses)))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+# Shortest-path queries on a grid layout: plain Dijkstra, uncompiled or on
+# the CSR arrays, vs. the all-pairs table vs. ALT landmarks, and Order
+# construction along the path
+#
+# Run from the repository root: python -m benchmarks.bench_route
+
+import random
+import time
+
+from vda5050.order import Order
+from vda5050.route_graph import LayoutGraph, _dijkstra
+
+from .fixtures import make_grid_orders
+
+SIDE = 30
+SPACING = 2.0
+N_QUERIES = 2000
+
+
+def grid_orders():
+    return [Order.parse_obj(order) for order in make_grid_orders(SIDE, SPACING)]
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for source, target in queries:
+        fn(source, target)
+    return (time.perf_counter() - start) / len(queries) * 1e6
+
+
+def main():
+    rnd = random.Random(5050)
+    table = LayoutGraph("hall")
+    alt = LayoutGraph("hall")
+    for order in grid_orders():
+        table.add_order(order)
+        alt.add_order(order)
+    start = time.perf_counter()
+    table.compile()
+    print("%d nodes, %d edges" % (len(table), len(table.edges)))
+    print("all-pairs table build: %.2f s" % (time.perf_counter() - start))
+    start = time.perf_counter()
+    alt.compile(all_pairs_limit=0)
+    print("ALT landmarks build:   %.2f s" % (time.perf_counter() - start))
+
+    ids = table.node_ids
+    queries = [(rnd.choice(ids), rnd.choice(ids)) for _ in range(N_QUERIES)]
+    for source, target in queries[:200]:
+        assert abs(table.shortest_path(source, target)[0]
+                   - alt.shortest_path(source, target)[0]) < 1e-9
+
+    def dijkstra(source, target):
+        _dijkstra(table.indptr, table.indices, table.weights, table.index[source])
+
+    print("dijkstra per query:    %8.1f us" % timed(dijkstra, queries[:200]))
+    plain = LayoutGraph("hall")
+    for order in grid_orders():
+        plain.add_order(order)
+    print("uncompiled per query:  %8.1f us" % timed(plain.shortest_path, queries[:200]))
+    print("ALT per query:         %8.1f us" % timed(alt.shortest_path, queries))
+    print("table per query:       %8.1f us" % timed(table.shortest_path, queries))
+    print("table + Order:         %8.1f us" % timed(
+        lambda s, t: table.make_order("m", "agv-1", "job", s, t), queries))
+
+
+if __name__ == "__main__":
+    main()
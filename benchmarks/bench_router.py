@@ -0,0 +1,59 @@
+# Topic matching with per-AGV subscriptions for 5k AGVs: testing every
+# filter, paho's MQTTMatcher, the TopicTrie and the Router's topic cache
+#
+# Run from the repository root: python -m benchmarks.bench_router
+
+import random
+import time
+
+from paho.mqtt.client import topic_matches_sub
+from paho.mqtt.matcher import MQTTMatcher
+
+from vda5050.router import Router, TopicTrie
+from vda5050.topics import SUBTOPICS, topic_for
+
+N_AGVS = 5000
+N_MESSAGES = 20000
+
+
+def timed(fn, topics):
+    start = time.perf_counter()
+    for topic in topics:
+        fn(topic)
+    return (time.perf_counter() - start) / len(topics) * 1e6
+
+
+def main():
+    rnd = random.Random(5050)
+    filters = [topic_for("acme", "agv-%d" % i, "state") for i in range(N_AGVS)]
+    filters += [topic_for("+", "+", subtopic) for subtopic in SUBTOPICS]
+    filters += ["uagv/v2/acme/#"]
+    topics = [topic_for("acme", "agv-%d" % rnd.randrange(N_AGVS), rnd.choice(SUBTOPICS))
+              for _ in range(N_MESSAGES)]
+
+    def linear(topic):
+        return [f for f in filters[:2000] if topic_matches_sub(f, topic)]
+
+    matcher = MQTTMatcher()
+    trie = TopicTrie()
+    router = Router()
+    for topic_filter in filters:
+        matcher[topic_filter] = topic_filter
+        trie.insert(topic_filter, topic_filter)
+        router.subscribe(topic_filter, topic_filter)
+    for topic in topics[:100]:
+        assert sorted(matcher.iter_match(topic)) == sorted(trie.match(topic)) \
+            == sorted(router.resolve(topic)[1])
+
+    print("%d filters, %d messages over %d topics"
+          % (len(filters), N_MESSAGES, len(set(topics))))
+    # Scaled up from the first 2000 filters, testing all of them takes too long
+    print("linear, per filter:  %9.2f us" % (timed(linear, topics[:200]) * len(filters) / 2000))
+    print("paho MQTTMatcher:    %9.2f us" % timed(lambda t: list(matcher.iter_match(t)), topics))
+    print("TopicTrie:           %9.2f us" % timed(trie.match, topics))
+    print("Router, cold cache:  %9.2f us" % timed(router.resolve, topics))
+    print("Router, warm cache:  %9.2f us" % timed(router.resolve, topics))
+
+
+if __name__ == "__main__":
+    main()
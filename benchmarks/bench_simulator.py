@@ -0,0 +1,109 @@
+# Simulated fleet against a minimal master controller: every idle AGV gets
+# a new five-node order with a pick action at its end. Reports the State
+# and Order rates the simulator achieved and what the controller received.
+#
+# Run from the repository root: python -m benchmarks.bench_simulator
+# (--broker HOST to go through an MQTT broker instead of the in-process one)
+
+import argparse
+import asyncio
+import time
+
+from vda5050.factsheet import FactSheet
+from vda5050.gateway import Gateway
+from vda5050.loopback import LoopbackBroker
+from vda5050.order import Order
+from vda5050.simulator import FleetSimulator
+from vda5050.state import ActionStatus
+from vda5050.topics import ORDER, STATE
+
+from .fixtures import make_factsheet
+
+SPACING = 3.0
+FINISHED = (ActionStatus.FINISHED, ActionStatus.FAILED)
+
+
+def job(state, number):
+    x, y = state.agvPosition.x, state.agvPosition.y
+    direction = 1.0 if number % 2 else -1.0
+    nodes = [
+        {
+            "nodeId": "n%d" % i,
+            "sequenceId": 2 * i,
+            "released": True,
+            "nodePosition": {"x": x + direction * SPACING * i, "y": y, "mapId": "hall"},
+            "actions": [{
+                "actionType": "pick",
+                "actionId": "%s-job%d-pick" % (state.serialNumber, number),
+                "blockingType": "HARD",
+                "actionParameters": [{"key": "duration", "value": "2.0"}],
+            }] if i == 4 else [],
+        }
+        for i in range(5)
+    ]
+    edges = [
+        {"edgeId": "e%d" % i, "sequenceId": 2 * i + 1, "released": True,
+         "startNodeId": "n%d" % i, "endNodeId": "n%d" % (i + 1)}
+        for i in range(4)
+    ]
+    return Order.parse_obj({
+        "manufacturer": state.manufacturer, "serialNumber": state.serialNumber,
+        "orderId": "%s-job%d" % (state.serialNumber, number), "orderUpdateId": 0,
+        "nodes": nodes, "edges": edges,
+    })
+
+
+async def controller(gateway, counts):
+    jobs = {}
+    async for message in gateway.messages(STATE):
+        state = message.payload
+        counts["states"] += 1
+        key = (state.manufacturer, state.serialNumber)
+        number = jobs.get(key, 0)
+        current = "%s-job%d" % (state.serialNumber, number) if number else ""
+        if state.orderId != current or state.nodeStates:
+            continue
+        if any(action.actionStatus not in FINISHED for action in state.actionStates):
+            continue
+        jobs[key] = number + 1
+        gateway.publish_order(job(state, number + 1))
+        counts["orders"] += 1
+
+
+async def main(args):
+    if args.broker:
+        simulator_gateway = Gateway(args.broker, subtopics=(ORDER,), queue_size=100000)
+        controller_gateway = Gateway(args.broker, subtopics=(STATE,), queue_size=100000)
+    else:
+        broker = LoopbackBroker()
+        simulator_gateway = broker.gateway((ORDER,), queue_size=100000)
+        controller_gateway = broker.gateway((STATE,), queue_size=100000)
+    async with simulator_gateway, controller_gateway:
+        simulator = FleetSimulator(simulator_gateway, tick=args.tick, speedup=args.speedup)
+        base = make_factsheet()
+        for i in range(args.agvs):
+            factsheet = FactSheet.parse_obj({**base, "serialNumber": "agv-%d" % i})
+            simulator.add(factsheet, x=0.0, y=2.0 * i, map_id="hall")
+        counts = {"states": 0, "orders": 0}
+        task = asyncio.ensure_future(controller(controller_gateway, counts))
+        start = time.perf_counter()
+        report = await simulator.run(args.seconds)
+        # Let the controller drain what is still queued
+        await asyncio.sleep(0.5)
+        task.cancel()
+        elapsed = time.perf_counter() - start
+    print(report)
+    print("controller: %d states received (%.0f/s), %d orders sent"
+          % (counts["states"], counts["states"] / elapsed, counts["orders"]))
+    if not args.broker:
+        print("dropped: %d" % (simulator_gateway.dropped + controller_gateway.dropped))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--agvs", type=int, default=2000)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--tick", type=float, default=0.1)
+    parser.add_argument("--speedup", type=float, default=1.0)
+    parser.add_argument("--broker")
+    asyncio.run(main(parser.parse_args()))
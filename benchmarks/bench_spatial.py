@@ -0,0 +1,64 @@
+# Radius and k-nearest queries: linear scan vs. the spatial index at 1k AGVs / 50k nodes
+#
+# Run from the repository root: python -m benchmarks.bench_spatial
+
+import math
+import random
+import time
+
+from vda5050.spatial_index import SpatialIndex
+
+N_AGVS = 1000
+N_NODES = 50000
+N_QUERIES = 2000
+SIZE = 500.0
+RADIUS = 5.0
+
+
+def linear_within(points, x, y, radius):
+    hits = []
+    for key, (px, py) in points.items():
+        d = math.hypot(px - x, py - y)
+        if d <= radius:
+            hits.append((d, key))
+    hits.sort(key=lambda hit: hit[0])
+    return hits
+
+
+def timed(fn, queries):
+    start = time.perf_counter()
+    for x, y in queries:
+        fn(x, y)
+    return (time.perf_counter() - start) / len(queries)
+
+
+def main():
+    rnd = random.Random(5050)
+    agvs = {"agv-%d" % i: (rnd.uniform(0, SIZE), rnd.uniform(0, SIZE)) for i in range(N_AGVS)}
+    nodes = {"n%d" % i: (rnd.uniform(0, SIZE), rnd.uniform(0, SIZE)) for i in range(N_NODES)}
+    queries = [(rnd.uniform(0, SIZE), rnd.uniform(0, SIZE)) for _ in range(N_QUERIES)]
+
+    agv_index = SpatialIndex(RADIUS)
+    node_index = SpatialIndex(RADIUS)
+    start = time.perf_counter()
+    for key, (x, y) in nodes.items():
+        node_index.update(key, "map", x, y)
+    print("index %d nodes: %.1f ms" % (N_NODES, (time.perf_counter() - start) * 1e3))
+    start = time.perf_counter()
+    for key, (x, y) in agvs.items():
+        agv_index.update(key, "map", x, y)
+    print("update %d AGV positions: %.2f us/update"
+          % (N_AGVS, (time.perf_counter() - start) / N_AGVS * 1e6))
+
+    for name, points, index in (("AGVs", agvs, agv_index), ("nodes", nodes, node_index)):
+        print("%s (%d points), r = %.0f m" % (name, len(points), RADIUS))
+        linear = timed(lambda x, y: linear_within(points, x, y, RADIUS), queries[:100])
+        grid = timed(lambda x, y: index.within("map", x, y, RADIUS), queries)
+        knn = timed(lambda x, y: index.nearest("map", x, y, 10), queries)
+        print("  linear radius scan  %10.1f us/query" % (linear * 1e6))
+        print("  grid radius query   %10.1f us/query" % (grid * 1e6))
+        print("  grid 10-nearest     %10.1f us/query" % (knn * 1e6))
+
+
+if __name__ == "__main__":
+    main()
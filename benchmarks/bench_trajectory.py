@@ -0,0 +1,38 @@
+# NURBS trajectory sampling: uncached evaluation vs. TrajectoryCache hits
+#
+# Run from the repository root: python -m benchmarks.bench_trajectory
+
+import time
+
+from vda5050.state import State
+from vda5050.trajectory import TrajectoryCache, TrajectoryCurve
+
+from .fixtures import make_state
+
+SAMPLES = 64
+
+
+def main():
+    edges = State.parse_obj(make_state(n_nodes=200)).edgeStates
+    repeated = State.parse_obj(make_state(n_nodes=200)).edgeStates
+
+    start = time.perf_counter()
+    for edge in edges:
+        TrajectoryCurve(edge.trajectory).sample(SAMPLES)
+    uncached = (time.perf_counter() - start) / len(edges)
+
+    cache = TrajectoryCache()
+    for edge in edges:
+        cache.get(edge.edgeId, edge.trajectory).sample(SAMPLES)
+    start = time.perf_counter()
+    for edge in repeated:
+        cache.get(edge.edgeId, edge.trajectory).sample(SAMPLES)
+    cached = (time.perf_counter() - start) / len(repeated)
+
+    print("%d samples per curve" % SAMPLES)
+    print("  uncached  %8.1f us/curve  %8.0f curves/s" % (uncached * 1e6, 1 / uncached))
+    print("  cached    %8.1f us/curve  %8.0f curves/s" % (cached * 1e6, 1 / cached))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+# Allocations per message on the MQTT payload -> model and model -> payload paths
+#
+# Compares the str round trip (payload.decode(), parse_raw, .json().encode())
+# with decoding straight from bytes/memoryview and encoding straight to
+# bytes. Peak traced memory per message is measured with tracemalloc,
+# time without it.
+#
+# Run from the repository root: python -m benchmarks.bench_zero_copy
+
+import time
+import tracemalloc
+
+from vda5050.codec import encode
+from vda5050.decoder import decode, orjson
+from vda5050.order import Order
+from vda5050.state import State
+
+from .fixtures import make_order, make_state
+
+REPEAT = 200
+
+
+def allocations(fn):
+    # Peak memory allocated while handling one message
+    fn()
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak - base
+
+
+def per_call(fn):
+    start = time.perf_counter()
+    for _ in range(REPEAT):
+        fn()
+    return (time.perf_counter() - start) / REPEAT
+
+
+def report(name, fn):
+    peak = allocations(fn)
+    print("  %-34s %8.1f us  peak %7.1f KiB" % (name, per_call(fn) * 1e6, peak / 1024))
+
+
+def main():
+    print("orjson: %s" % ("yes" if orjson is not None else "no, falling back to json"))
+    payload = encode(State.parse_obj(make_state(n_nodes=20)))
+    view = memoryview(payload)
+    print("decode State (%d bytes)" % len(payload))
+    report("State.parse_raw(payload.decode())", lambda: State.parse_raw(payload.decode()))
+    report("decode(State, payload)", lambda: decode(State, payload))
+    report("decode(State, memoryview, trusted)", lambda: decode(State, view, validate=False))
+
+    order = Order.parse_obj(make_order(n_nodes=20))
+    print("encode Order (%d bytes)" % len(encode(order)))
+    report("order.json().encode()", lambda: order.json().encode())
+    report("encode(order)", lambda: encode(order))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,324 @@
+# Realistic VDA5050 message fixtures for the benchmarks, as plain JSON dicts
+
+import json
+import os
+
+FACTSHEET_SCHEMA = os.path.join(os.path.dirname(__file__), os.pardir, "factsheet.json")
+
+TIMESTAMP = "2024-05-23T10:15:30.25Z"
+
+
+def make_trajectory(n_points=8, degree=3):
+    n_knots = n_points + degree + 1
+    inner = n_knots - 2 * (degree + 1)
+    knots = [0.0] * (degree + 1)
+    knots += [(i + 1) / (inner + 1) for i in range(inner)]
+    knots += [1.0] * (degree + 1)
+    return {
+        "degree": degree,
+        "knotVector": knots,
+        "controlPoints": [
+            {"x": float(i), "y": float(i % 3), "weight": 1.0} for i in range(n_points)
+        ],
+    }
+
+
+def make_state(serial="agv-0001", n_nodes=10, trajectories=True, header_id=0,
+               map_id="map-1", x=1.0, y=2.0):
+    node_states = [
+        {
+            "nodeId": "n%d" % i,
+            "sequenceId": 2 * i,
+            "nodeDescription": "",
+            "nodePosition": {"x": float(i), "y": 0.0, "theta": 0.0, "mapId": map_id},
+            "released": i < n_nodes // 2,
+        }
+        for i in range(n_nodes)
+    ]
+    edge_states = [
+        {
+            "edgeId": "e%d" % i,
+            "sequenceId": 2 * i + 1,
+            "edgeDescription": "",
+            "released": i < n_nodes // 2,
+            "trajectory": make_trajectory() if trajectories else None,
+        }
+        for i in range(max(n_nodes - 1, 0))
+    ]
+    action_states = [
+        {
+            "actionId": "a%d" % i,
+            "actionType": "pick" if i % 2 else "drop",
+            "actionDescription": "",
+            "actionStatus": "WAITING",
+            "resultDescription": "",
+        }
+        for i in range(max(n_nodes // 4, 1))
+    ]
+    return {
+        "headerId": header_id,
+        "timestamp": TIMESTAMP,
+        "version": "2.0.0",
+        "manufacturer": "acme",
+        "serialNumber": serial,
+        "orderId": "order-1",
+        "orderUpdateId": 0,
+        "zoneSetId": "zones",
+        "lastNodeId": "n0",
+        "lastNodeSequenceId": 0,
+        "driving": True,
+        "paused": False,
+        "newBaseRequest": False,
+        "distanceSinceLastNode": 0.5,
+        "operatingMode": "AUTOMATIC",
+        "nodeStates": node_states,
+        "edgeStates": edge_states,
+        "agvPosition": {
+            "x": x,
+            "y": y,
+            "theta": 0.0,
+            "mapId": map_id,
+            "positionInitialized": True,
+            "mapDescription": "",
+            "localizationScore": 0.9,
+            "deviationRange": 0.1,
+        },
+        "velocity": {"vx": 1.0, "vy": 0.0, "omega": 0.0},
+        "loads": [],
+        "actionStates": action_states,
+        "batteryState": {
+            "batteryCharge": 80.0,
+            "batteryVoltage": 24.0,
+            "batteryHealth": 95.0,
+            "charging": False,
+            "reach": 1000.0,
+        },
+        "errors": [],
+        "information": [],
+        "safetyState": {"eStop": "NONE", "fieldViolation": False},
+    }
+
+
+def make_order(serial="agv-0001", n_nodes=10, order_id="order-1", update_id=0,
+               map_id="map-1", actions_per_node=1):
+    nodes = [
+        {
+            "nodeId": "n%d" % i,
+            "sequenceId": 2 * i,
+            "released": True,
+            "nodePosition": {"x": float(i), "y": 0.0, "theta": 0.0, "mapId": map_id},
+            "actions": [
+                {
+                    "actionType": "pick",
+                    "actionId": "n%d-a%d" % (i, j),
+                    "blockingType": "HARD",
+                    "actionParameters": [{"key": "stationType", "value": "floor"}],
+                }
+                for j in range(actions_per_node)
+            ],
+        }
+        for i in range(n_nodes)
+    ]
+    edges = [
+        {
+            "edgeId": "e%d" % i,
+            "sequenceId": 2 * i + 1,
+            "released": True,
+            "startNodeId": "n%d" % i,
+            "endNodeId": "n%d" % (i + 1),
+            "actions": [],
+        }
+        for i in range(max(n_nodes - 1, 0))
+    ]
+    return {
+        "headerId": 0,
+        "timestamp": TIMESTAMP,
+        "version": "2.0.0",
+        "manufacturer": "acme",
+        "serialNumber": serial,
+        "orderId": order_id,
+        "orderUpdateId": update_id,
+        "nodes": nodes,
+        "edges": edges,
+    }
+
+
+def make_grid_orders(side=30, spacing=2.0, map_id="hall"):
+    # A side x side grid layout: one order per row and per column, in both
+    # directions
+    def line(cells):
+        nodes = [
+            {
+                "nodeId": "n%d_%d" % (i, j),
+                "sequenceId": 0,
+                "released": True,
+                "nodePosition": {"x": i * spacing, "y": j * spacing, "mapId": map_id},
+                "actions": [],
+            }
+            for i, j in cells
+        ]
+        edges = [
+            {
+                "edgeId": "e%s-%s" % (a["nodeId"], b["nodeId"]),
+                "sequenceId": 0,
+                "released": True,
+                "startNodeId": a["nodeId"],
+                "endNodeId": b["nodeId"],
+                "actions": [],
+            }
+            for a, b in zip(nodes, nodes[1:])
+        ]
+        return {
+            "headerId": 0,
+            "timestamp": TIMESTAMP,
+            "version": "2.0.0",
+            "manufacturer": "acme",
+            "serialNumber": "layout",
+            "orderId": "layout",
+            "orderUpdateId": 0,
+            "nodes": nodes,
+            "edges": edges,
+        }
+
+    orders = []
+    for k in range(side):
+        row = [(i, k) for i in range(side)]
+        column = [(k, j) for j in range(side)]
+        for cells in (row, row[::-1], column, column[::-1]):
+            orders.append(line(cells))
+    return orders
+
+
+def make_factsheet(serial="agv-0001"):
+    return {
+        "headerId": 0,
+        "timestamp": TIMESTAMP,
+        "version": "2.0.0",
+        "manufacturer": "acme",
+        "serialNumber": serial,
+        "typeSpecification": {
+            "seriesName": "acme-fl",
+            "agvKinematic": "DIFF",
+            "agvClass": "FORKLIFT",
+            "maxLoadMass": 1000.0,
+            "localizationTypes": ["NATURAL"],
+            "navigationTypes": ["AUTONOMOUS"],
+        },
+        "physicalParameters": {
+            "speedMin": 0.1,
+            "speedMax": 2.0,
+            "accelerationMax": 0.5,
+            "decelerationMax": 0.8,
+            "heightMin": 1.0,
+            "heightMax": 2.0,
+            "width": 1.0,
+            "length": 2.0,
+        },
+        "protocolLimits": {
+            "maxStringLens": {
+                "msgLen": 65536,
+                "topicSerialLen": 32,
+                "topicElemLen": 32,
+                "idLen": 32,
+                "idNumericalOnly": False,
+                "enumLen": 32,
+                "loadIdLen": 32,
+            },
+            "maxArrayLens": {
+                "order_nodes": 50,
+                "order_edges": 49,
+                "node_actions": 4,
+                "edge_actions": 4,
+                "actions_actionsParameters": 8,
+                "instantActions": 8,
+                "trajectory_knotVector": 32,
+                "trajectory_controlPoints": 24,
+                "state_nodeStates": 200,
+                "state_edgeStates": 199,
+                "state_loads": 4,
+                "state_actionStates": 100,
+                "state_errors": 20,
+                "state_information": 20,
+                "error_errorReferences": 4,
+                "information_infoReferences": 4,
+            },
+            "timing": {
+                "minOrderInterval": 0.5,
+                "minStateInterval": 0.1,
+                "defaultStateInterval": 1.0,
+                "visualizationInterval": 0.1,
+            },
+        },
+        "protocolFeatures": {
+            "optionalParameters": [],
+            "agvActions": [
+                {
+                    "actionType": "pick",
+                    "actionScopes": ["NODE"],
+                    "actionParameters": [
+                        {"key": "stationType", "valueDataType": "STRING"},
+                        {"key": "height", "valueDataType": "FLOAT", "isOptional": True},
+                    ],
+                },
+                {
+                    "actionType": "drop",
+                    "actionScopes": ["NODE"],
+                    "actionParameters": [
+                        {"key": "stationType", "valueDataType": "STRING"},
+                    ],
+                },
+                {"actionType": "cancelOrder", "actionScopes": ["INSTANT"]},
+                {"actionType": "startPause", "actionScopes": ["INSTANT"]},
+                {"actionType": "stopPause", "actionScopes": ["INSTANT"]},
+            ],
+        },
+        "agvGeometry": {
+            "wheelDefinitions": [],
+            "envelopes2d": [
+                {
+                    "set": "default",
+                    "polygonPoints": [
+                        {"x": -1.0, "y": -0.5},
+                        {"x": 1.0, "y": -0.5},
+                        {"x": 1.0, "y": 0.5},
+                        {"x": -1.0, "y": 0.5},
+                    ],
+                }
+            ],
+            "envelopes3d": [],
+        },
+        "loadSpecification": {"loadPositions": [], "loadSets": []},
+    }
+
+
+def _from_schema(schema, array_len):
+    if "examples" in schema:
+        return schema["examples"][0]
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if kind == "object":
+        properties = schema.get("properties")
+        if properties is None:
+            # The top level of factsheet.json lists its properties inline
+            properties = {key: value for key, value in schema.items()
+                          if isinstance(value, dict) and "type" in value}
+        return {key: _from_schema(value, array_len) for key, value in properties.items()}
+    if kind == "array":
+        return [_from_schema(schema.get("items", {}), array_len) for _ in range(array_len)]
+    if kind == "string":
+        return "x"
+    if kind == "number":
+        return float(max(schema.get("minimum", 1.0), 1.0))
+    if kind == "integer":
+        return int(max(schema.get("minimum", 1), 1))
+    if kind == "boolean":
+        return False
+    return None
+
+
+def factsheet_from_schema(path=FACTSHEET_SCHEMA, array_len=3):
+    # The bundled factsheet.json is the JSON Schema, not an instance: fill
+    # in every property it declares, with array_len items per array
+    with open(path) as f:
+        return _from_schema(json.load(f), array_len)
@@ -0,0 +1,184 @@
+# Benchmark suite for the models and the publish/subscribe path, with
+# baseline comparison
+#
+# Times construction (trusted, without validation), validation, JSON
+# encoding and decoding of small and large Orders, a State with 200 node
+# states and trajectories and a FactSheet filled in from the bundled
+# factsheet.json, plus loopback publish/subscribe throughput through the
+# in-process broker and, with --broker, through an MQTT broker.
+#
+# Run from the repository root: python -m benchmarks.suite
+#   --json results.json          store the results
+#   --baseline baseline.json     compare against stored results; exits with
+#                                status 1 if a benchmark got slower than
+#                                --threshold (default 0.2, i.e. 20%)
+#   -k order                     only benchmarks whose name contains "order"
+#
+# The focused bench_*.py scripts next to this one compare alternative
+# implementations of single features.
+
+import argparse
+import asyncio
+import json
+import platform
+import sys
+import time
+from datetime import datetime, timezone
+
+import pydantic
+
+from vda5050.codec import encode
+from vda5050.decoder import decode, decode_obj
+from vda5050.factsheet import FactSheet
+from vda5050.gateway import Gateway
+from vda5050.loopback import LoopbackBroker
+from vda5050.order import Order
+from vda5050.state import State
+from vda5050.topics import STATE
+
+from .fixtures import factsheet_from_schema, make_order, make_state
+
+PUBSUB_MESSAGES = 2000
+
+
+def fixtures():
+    return {
+        "order.small": (Order, make_order(n_nodes=3)),
+        "order.large": (Order, make_order(n_nodes=50, actions_per_node=2)),
+        "state.200": (State, make_state(n_nodes=200)),
+        "factsheet": (FactSheet, factsheet_from_schema()),
+    }
+
+
+def model_benchmarks():
+    benchmarks = {}
+    for name, (model, data) in fixtures().items():
+        instance = model.parse_obj(data)
+        payload = encode(instance)
+        benchmarks.update({
+            name + ".construct": lambda model=model, data=data: decode_obj(model, data, False),
+            name + ".validate": lambda model=model, data=data: model.parse_obj(data),
+            name + ".encode.json": instance.json,
+            name + ".encode.codec": lambda instance=instance: encode(instance),
+            name + ".decode.parse_raw": lambda model=model, payload=payload:
+                model.parse_raw(payload),
+            name + ".decode.decoder": lambda model=model, payload=payload:
+                decode(model, payload),
+        })
+    return benchmarks
+
+
+def measure(fn, seconds: float, repeats: int) -> dict:
+    # Calibrate a batch to about 10 ms, then keep the best of the repeats
+    batch = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(batch):
+            fn()
+        if time.perf_counter() - start >= 0.01:
+            break
+        batch *= 2
+    best = float("inf")
+    for _ in range(repeats):
+        count = 0
+        start = time.perf_counter()
+        while True:
+            for _ in range(batch):
+                fn()
+            count += batch
+            elapsed = time.perf_counter() - start
+            if elapsed >= seconds / repeats:
+                break
+        best = min(best, elapsed / count)
+    return {"mean_us": best * 1e6, "ops_per_sec": 1.0 / best}
+
+
+async def pubsub(gateway, state: State, messages: int) -> float:
+    # Publishes to itself and waits for every message to come back
+    async with gateway:
+        start = time.perf_counter()
+        for i in range(messages):
+            gateway.publish(state.manufacturer, state.serialNumber, STATE, state)
+            if i % 100 == 99:
+                await asyncio.sleep(0)
+        for _ in range(messages):
+            await asyncio.wait_for(gateway.get(STATE), 10)
+        return time.perf_counter() - start
+
+
+def pubsub_benchmarks(broker: str, repeats: int, pattern: str) -> dict:
+    state = State.parse_obj(make_state(n_nodes=10))
+    gateways = {"pubsub.loopback": lambda: LoopbackBroker().gateway((STATE,), PUBSUB_MESSAGES)}
+    if broker:
+        gateways["pubsub.mqtt"] = lambda: Gateway(broker, subtopics=(STATE,),
+                                                  queue_size=PUBSUB_MESSAGES)
+    results = {}
+    for name, make_gateway in gateways.items():
+        if pattern not in name:
+            continue
+        best = min(asyncio.run(pubsub(make_gateway(), state, PUBSUB_MESSAGES))
+                   for _ in range(repeats))
+        results[name] = {"mean_us": best / PUBSUB_MESSAGES * 1e6,
+                         "ops_per_sec": PUBSUB_MESSAGES / best}
+    return results
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    regressions = []
+    print("\n%-36s %12s %12s %8s" % ("vs. baseline", "before us", "now us", "change"))
+    for name, result in results.items():
+        before = baseline.get(name)
+        if before is None:
+            continue
+        change = result["mean_us"] / before["mean_us"] - 1
+        flag = ""
+        if change > threshold:
+            flag = "  SLOWER"
+            regressions.append(name)
+        print("%-36s %12.2f %12.2f %+7.1f%%%s"
+              % (name, before["mean_us"], result["mean_us"], change * 100, flag))
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("-k", dest="pattern", default="")
+    parser.add_argument("--seconds", type=float, default=1.0)
+    parser.add_argument("--repeats", type=int, default=5)
+    parser.add_argument("--broker")
+    parser.add_argument("--json")
+    parser.add_argument("--baseline")
+    parser.add_argument("--threshold", type=float, default=0.2)
+    args = parser.parse_args()
+
+    results = {}
+    print("%-36s %12s %12s" % ("benchmark", "mean us", "ops/s"))
+    for name, fn in model_benchmarks().items():
+        if args.pattern in name:
+            results[name] = measure(fn, args.seconds, args.repeats)
+            print("%-36s %12.2f %12.0f" % (name, results[name]["mean_us"],
+                                           results[name]["ops_per_sec"]))
+    for name, result in pubsub_benchmarks(args.broker, args.repeats, args.pattern).items():
+        results[name] = result
+        print("%-36s %12.2f %12.0f" % (name, result["mean_us"], result["ops_per_sec"]))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({
+                "meta": {
+                    "time": datetime.now(timezone.utc).isoformat(),
+                    "python": platform.python_version(),
+                    "pydantic": pydantic.VERSION,
+                    "machine": platform.machine(),
+                },
+                "results": results,
+            }, f, indent=2)
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["results"]
+        if compare(results, baseline, args.threshold):
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,24 @@
-import paho.mqtt.client as mqtt_client
+import asyncio
 
-client = mqtt_client.Client()
+from vda5050.gateway import Gateway
+from vda5050.order import Node, NodePosition, Order
 
-if client.connect("localhost", 1883, 60) != 0:
-    print("Connection failed")
-    exit(1)
+MQTT_BROKER = "localhost"
 
-client.publish("test/status", "Hello, World!", 0)
 
-client.disconnect()
\ No newline at end of file
+async def main():
+    order = Order(
+        manufacturer="acme",
+        serialNumber="agv-0001",
+        orderId="order-1",
+        orderUpdateId=0,
+        nodes=[Node(nodeId="n0", sequenceId=0, nodePosition=NodePosition(x=0.0, y=0.0))],
+        edges=[],
+    )
+    async with Gateway(MQTT_BROKER, subtopics=()) as gateway:
+        info = gateway.publish_order(order, qos=1)
+        while not info.is_published():
+            await asyncio.sleep(0.01)
+
+
+asyncio.run(main())
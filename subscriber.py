@@ -1,14 +1,15 @@
-import paho.mqtt.client as mqtt_client
+import asyncio
+
+from vda5050.gateway import Gateway
 
 MQTT_BROKER = "mqtt.eclipseprojects.io"
 
-client = mqtt_client.Client()
 
-client.connect(MQTT_BROKER, 1883, 60)
+async def main():
+    async with Gateway(MQTT_BROKER) as gateway:
+        async for message in gateway.messages("state"):
+            state = message.payload
+            print(message.serialNumber, state.operatingMode.value, state.batteryState.batteryCharge)
 
-def on_connect(client, userdata, flags, rc):
-    if rc != 0:
-        print("Connection failed")
-        exit(1)
 
-client.subscribe("test/status")
\ No newline at end of file
+asyncio.run(main())
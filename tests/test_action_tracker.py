@@ -0,0 +1,46 @@
+import asyncio
+
+from benchmarks.fixtures import make_state
+from vda5050.action_tracker import ActionTracker
+from vda5050.state import ActionState, ActionStatus, State
+
+
+def state_with(header_id, **statuses):
+    state = State.parse_obj(make_state(serial="agv-1", header_id=header_id))
+    state.actionStates = [ActionState(actionId=action_id, actionStatus=status)
+                          for action_id, status in statuses.items()]
+    return state
+
+
+def test_failing_callback_does_not_stop_the_others(caplog):
+    tracker = ActionTracker()
+    seen = []
+
+    def broken(action_state):
+        raise RuntimeError("broken callback")
+
+    state = state_with(0, a1=ActionStatus.RUNNING)
+    tracker.on_change(state.manufacturer, "agv-1", "a1", broken)
+    tracker.on_change(state.manufacturer, "agv-1", "a1", seen.append)
+    tracker.update(state)
+    assert [action_state.actionId for action_state in seen] == ["a1"]
+    assert "broken callback" in caplog.text
+
+
+def test_terminal_actions_are_pruned_after_they_leave_the_state():
+    async def run():
+        tracker = ActionTracker()
+        state = state_with(0, a1=ActionStatus.RUNNING)
+        manufacturer = state.manufacturer
+        future = tracker.wait(manufacturer, "agv-1", "a1")
+        tracker.update(state)
+        assert tracker.update(state_with(1, a1=ActionStatus.FINISHED))
+        assert (await future).actionStatus is ActionStatus.FINISHED
+        # Still reported by the AGV: kept, and not reported as changed again
+        assert not tracker.update(state_with(2, a1=ActionStatus.FINISHED))
+        assert tracker.wait(manufacturer, "agv-1", "a1").done()
+        tracker.update(state_with(3, a2=ActionStatus.WAITING))
+        assert tracker.get(manufacturer, "agv-1", "a1") is None
+        assert list(tracker.statuses[(manufacturer, "agv-1")]) == ["a2"]
+
+    asyncio.run(run())
@@ -0,0 +1,29 @@
+import pytest
+
+from benchmarks.fixtures import factsheet_from_schema
+from vda5050.capabilities import CapabilityCache, FactSheetCache
+from vda5050.factsheet import FactSheet
+
+
+def test_unchanged_factsheet_is_not_recompiled():
+    factsheet = FactSheet.parse_obj(factsheet_from_schema())
+    cache = CapabilityCache()
+    capabilities = cache.update(factsheet)
+    assert cache.update(factsheet.copy(update={"headerId": 7})) is capabilities
+
+
+def test_changed_factsheet_with_same_header_id_is_recompiled():
+    # An AGV that restarts sends headerId 0 again
+    factsheet = FactSheet.parse_obj(factsheet_from_schema())
+    cache = CapabilityCache()
+    cache.update(factsheet)
+    changed = factsheet.copy(deep=True)
+    changed.protocolFeatures.agvActions[0].actionType = "pick"
+    changed.protocolFeatures.agvActions[0].actionParameters = []
+    capabilities = cache.update(changed)
+    assert capabilities.supports("pick", changed.protocolFeatures.agvActions[0].actionScopes[0])
+
+
+def test_cache_base_class_is_abstract():
+    with pytest.raises(TypeError):
+        FactSheetCache()
@@ -0,0 +1,53 @@
+import asyncio
+import math
+
+from vda5050.coalescer import PositionCoalescer
+from vda5050.state import AgvPosition, Velocity
+
+
+def position(x, y=0.0, theta=0.0, map_id="hall"):
+    return AgvPosition(x=x, y=y, theta=theta, mapId=map_id, positionInitialized=True)
+
+
+def test_snapshot_keeps_the_latest_pose_and_flushes():
+    coalescer = PositionCoalescer()
+    coalescer.update("acme", "agv-1", position(1.0))
+    coalescer.update("acme", "agv-1", position(2.0), Velocity(vx=1.0, vy=0.0, omega=0.0))
+    coalescer.update("acme", "agv-2", position(5.0))
+    coalescer.update("acme", "agv-3", None)
+    snapshot = coalescer.snapshot(10.0)
+    assert snapshot.time == 10.0
+    assert [(pose.serialNumber, pose.x, pose.vx) for pose in snapshot.poses] == [
+        ("agv-1", 2.0, 1.0), ("agv-2", 5.0, None)]
+    assert (coalescer.received, coalescer.dropped) == (3, 1)
+    # Nothing reported since: the next snapshot is empty
+    assert coalescer.snapshot(11.0).poses == []
+
+
+def test_deadband_compares_with_the_pose_last_emitted():
+    coalescer = PositionCoalescer(epsilon=0.5, delta=math.radians(10))
+    steps = [(0.0, 0.0), (0.3, 0.0), (0.6, 0.0), (0.6, math.radians(5)),
+             (0.6, math.radians(15))]
+    emitted = []
+    for x, theta in steps:
+        coalescer.update("acme", "agv-1", position(x, theta=theta))
+        emitted.append(bool(coalescer.snapshot().poses))
+    # 0.3 m is inside the deadband, 0.6 m from the last emitted pose is
+    # not; 5 degrees of turning is inside it, 15 degrees are not
+    assert emitted == [True, False, True, False, True]
+    coalescer.update("acme", "agv-1", position(0.6, theta=math.radians(15), map_id="yard"))
+    assert coalescer.snapshot().poses[0].mapId == "yard"
+
+
+def test_run_skips_empty_snapshots():
+    async def main():
+        coalescer = PositionCoalescer(rate=100.0)
+        snapshots = []
+        task = asyncio.ensure_future(coalescer.run(snapshots.append))
+        coalescer.update("acme", "agv-1", position(1.0))
+        await asyncio.sleep(0.1)
+        task.cancel()
+        return snapshots
+
+    snapshots = asyncio.run(main())
+    assert len(snapshots) == 1 and snapshots[0].poses[0].x == 1.0
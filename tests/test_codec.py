@@ -0,0 +1,55 @@
+import asyncio
+import zlib
+
+import pytest
+
+from benchmarks.fixtures import make_order, make_state
+from vda5050.codec import CODECS, CodecNegotiator, detect
+from vda5050.loopback import LoopbackBroker
+from vda5050.order import Order
+from vda5050.order_encoder import OrderEncoder
+from vda5050.state import State
+from vda5050.topics import STATE
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_round_trip(name):
+    state = State.parse_obj(make_state(n_nodes=3))
+    codec = CODECS[name]
+    payload = codec.encode(state)
+    assert detect(payload) is codec
+    assert codec.decode(State, payload).json() == state.json()
+
+
+def test_corrupt_compressed_payload_is_value_error():
+    payload = zlib.compress(b'{"headerId": 1}')
+    with pytest.raises(ValueError):
+        detect(b"\x78" + b"\x00" * 10)
+    with pytest.raises(ValueError):
+        CODECS["json+zlib"].loads(payload[:-6] + b"\x00" * 6)
+
+
+@pytest.mark.parametrize("name", sorted(CODECS))
+def test_order_encoder_uses_codec(name):
+    order = Order.parse_obj(make_order(n_nodes=5))
+    codec = CODECS[name]
+    encoder = OrderEncoder()
+    for _ in range(2):
+        assert encoder.encode(order, codec) == codec.encode(order)
+
+
+def test_loopback_negotiates():
+    async def main():
+        state = State.parse_obj(make_state(n_nodes=2))
+        key = (state.manufacturer, state.serialNumber)
+        agv_codecs = CodecNegotiator()
+        agv_codecs.configure(key, "json+zlib")
+        master_codecs = CodecNegotiator()
+        broker = LoopbackBroker()
+        async with broker.gateway((), codecs=agv_codecs) as agv, \
+                broker.gateway((STATE,), codecs=master_codecs) as master:
+            agv.publish(state.manufacturer, state.serialNumber, STATE, state)
+            message = await master.get(STATE)
+        return message.payload == state, master_codecs.codec_for(key).name
+
+    assert asyncio.run(main()) == (True, "json+zlib")
@@ -0,0 +1,55 @@
+import math
+
+from benchmarks.fixtures import make_factsheet, make_state
+from vda5050.collision import ConflictDetector
+from vda5050.factsheet import FactSheet
+from vda5050.state import State
+
+# The fixture factsheet: a 2 m x 1 m envelope and speedMax 2 m/s
+
+
+def driving(serial, start, end, map_id="hall"):
+    data = make_state(serial=serial, n_nodes=2, trajectories=False, map_id=map_id,
+                      x=start[0], y=start[1])
+    data["agvPosition"]["theta"] = math.atan2(end[1] - start[1], end[0] - start[0])
+    data["nodeStates"][1]["nodePosition"].update(x=end[0], y=end[1])
+    return State.parse_obj(data)
+
+
+def detector(*states):
+    detector = ConflictDetector(dt=0.25, horizon=10.0)
+    for state in states:
+        detector.set_factsheet(FactSheet.parse_obj(make_factsheet(serial=state.serialNumber)))
+        detector.update(state)
+    return detector
+
+
+def test_head_on_conflict():
+    conflicts = detector(driving("a", (0, 0), (20, 0)), driving("b", (20, 0), (0, 0))).detect()
+    assert len(conflicts) == 1
+    conflict = conflicts[0]
+    assert (conflict.serialA, conflict.serialB) == ("a", "b")
+    # The 2 m long envelopes touch once the 20 m gap closed to 2 m at 4 m/s
+    assert conflict.time == 4.5
+    assert abs(conflict.x - 9.0) < 1e-9 and conflict.y == 0
+
+
+def test_near_miss_on_parallel_diagonals():
+    # 0.2 m apart side by side: the axis-aligned boxes overlap all along,
+    # only the separating axis test tells them apart
+    offset = 1.2 / math.sqrt(2)
+    near = detector(driving("a", (0, 0), (20, 20)),
+                    driving("b", (offset, -offset), (20 + offset, 20 - offset)))
+    assert near.candidate_pairs() == {("a", "b")}
+    assert near.detect() == []
+    # 0.8 m apart they overlap from the start
+    offset = 0.8 / math.sqrt(2)
+    close = detector(driving("a", (0, 0), (20, 20)),
+                     driving("b", (offset, -offset), (20 + offset, 20 - offset)))
+    assert [conflict.time for conflict in close.detect()] == [0.0]
+
+
+def test_other_maps_never_conflict():
+    other = detector(driving("a", (0, 0), (20, 0)), driving("b", (20, 0), (0, 0), "yard"))
+    assert other.candidate_pairs() == set()
+    assert other.detect() == []
@@ -0,0 +1,68 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from benchmarks.fixtures import make_order, make_state
+from vda5050.decoder import LAZY_FIELDS, decode, decode_lazy_state
+from vda5050.order import Order
+from vda5050.state import State
+
+
+def state_payload(**changes):
+    data = make_state(n_nodes=6, trajectories=True)
+    data.update(changes)
+    return json.dumps(data).encode()
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_lazy_state_equals_parse_raw(validate):
+    payload = state_payload()
+    lazy = decode_lazy_state(payload, validate)
+    state = State.parse_raw(payload)
+    assert lazy.nodeStates == state.nodeStates
+    assert lazy == state
+    assert lazy.json() == state.json()
+
+
+def test_materialize_decodes_everything_in_field_order():
+    lazy = decode_lazy_state(state_payload())
+    assert set(LAZY_FIELDS) & set(lazy.__dict__) == set()
+    lazy.edgeStates
+    assert lazy.materialize() is lazy
+    assert list(lazy.__dict__) == list(State.__fields__)
+    assert not lazy._raw
+
+
+def test_invalid_lazy_field_fails_on_every_access():
+    lazy = decode_lazy_state(state_payload(nodeStates=[{"sequenceId": "x"}]))
+    for _ in range(2):
+        with pytest.raises(ValidationError):
+            lazy.nodeStates
+    with pytest.raises(ValidationError):
+        lazy.json()
+    with pytest.raises(ValidationError):
+        lazy.materialize()
+    # Other fields are unaffected
+    assert lazy.edgeStates == State.parse_raw(state_payload()).edgeStates
+
+
+@pytest.mark.parametrize("validate", [True, False])
+def test_decode_equals_parse_raw(validate):
+    payload = state_payload()
+    state = decode(State, payload, validate)
+    reference = State.parse_raw(payload)
+    assert type(state) is State
+    assert state == reference
+    assert state.json() == reference.json()
+    assert state.__fields_set__ == reference.__fields_set__
+
+
+def test_order_decode_equals_parse_raw():
+    payload = json.dumps(make_order(n_nodes=8, actions_per_node=2)).encode()
+    assert decode(Order, payload, validate=False) == Order.parse_raw(payload)
+
+
+def test_strict_decode_rejects_invalid_payload():
+    with pytest.raises(ValidationError):
+        decode(State, state_payload(headerId="x"))
@@ -0,0 +1,67 @@
+from types import SimpleNamespace
+
+from benchmarks.fixtures import make_factsheet, make_order
+from vda5050.dispatcher import OrderDispatcher
+from vda5050.factsheet import FactSheet
+from vda5050.order import Order
+
+
+class FakeGateway:
+    # Records what the dispatcher publishes
+
+    def __init__(self):
+        self.client = SimpleNamespace(max_inflight_messages_set=lambda count: None)
+        self.codecs = None
+        self.published = []
+
+    def publish(self, manufacturer, serial_number, subtopic, payload, qos=0):
+        self.published.append((serial_number, payload.orderId, payload.orderUpdateId))
+
+
+def order(serial, order_id, update_id):
+    return Order.parse_obj(make_order(serial=serial, n_nodes=2, order_id=order_id,
+                                      update_id=update_id))
+
+
+def new_dispatcher(interval):
+    gateway = FakeGateway()
+    dispatcher = OrderDispatcher(gateway)
+    factsheet = FactSheet.parse_obj(make_factsheet(serial="agv-1"))
+    factsheet.protocolLimits.timing.minOrderInterval = interval
+    dispatcher.set_factsheet(factsheet)
+    return dispatcher, gateway
+
+
+def test_superseded_updates_are_coalesced():
+    dispatcher, gateway = new_dispatcher(0.0)
+    for update_id in (0, 2, 1):
+        dispatcher.submit(order("agv-1", "o1", update_id))
+    assert dispatcher.pending_count() == 1
+    assert dispatcher.coalesced == 2
+    dispatcher._send_due(100.0)
+    assert gateway.published == [("agv-1", "o1", 2)]
+
+
+def test_orders_of_one_agv_respect_its_interval():
+    dispatcher, gateway = new_dispatcher(0.5)
+    dispatcher.submit(order("agv-1", "o1", 0))
+    dispatcher.submit(order("agv-1", "o2", 0))
+    dispatcher.submit(order("agv-2", "o3", 0))
+    assert dispatcher._send_due(100.0) == 100.5
+    assert sorted(gateway.published) == [("agv-1", "o1", 0), ("agv-2", "o3", 0)]
+    assert dispatcher._send_due(100.4) == 100.5
+    assert len(gateway.published) == 2
+    assert dispatcher._send_due(100.5) is None
+    assert gateway.published[-1] == ("agv-1", "o2", 0)
+    assert dispatcher.sent == 3 and dispatcher.pending_count() == 0
+
+
+def test_cancel_drops_pending_orders():
+    dispatcher, gateway = new_dispatcher(0.5)
+    dispatcher.submit(order("agv-1", "o1", 0))
+    dispatcher.submit(order("agv-1", "o2", 0))
+    assert dispatcher.cancel("other", "agv-1") == 0
+    manufacturer = order("agv-1", "o1", 0).manufacturer
+    assert dispatcher.cancel(manufacturer, "agv-1") == 2
+    assert dispatcher._send_due(100.0) is None
+    assert gateway.published == []
@@ -0,0 +1,45 @@
+import math
+
+import pytest
+
+from benchmarks.fixtures import make_state
+from vda5050.fleet_table import FleetTable
+from vda5050.state import OperatingMode, State
+
+
+def state(serial, **changes):
+    data = make_state(serial=serial, n_nodes=2, map_id="hall")
+    data.update(changes)
+    return State.parse_obj(data)
+
+
+@pytest.mark.parametrize("capacity", [0, 1, 3])
+def test_rows_survive_growth(capacity):
+    table = FleetTable(capacity)
+    for i in range(10):
+        table.update(state("agv-%d" % i, lastNodeSequenceId=i))
+    assert len(table) == 10
+    assert table.lastNodeSequenceId.tolist() == list(range(10))
+    # Updating a known AGV reuses its row
+    assert table.update(state("agv-4", lastNodeSequenceId=40)) == 4
+    assert len(table) == 10 and table.row("agv-4")["lastNodeSequenceId"] == 40
+
+
+def test_queries():
+    table = FleetTable()
+    table.update(state("low", batteryState={"batteryCharge": 10.0, "charging": False},
+                       driving=False))
+    table.update(state("driving", batteryState={"batteryCharge": 10.0, "charging": False},
+                       driving=True))
+    table.update(state("full", batteryState={"batteryCharge": 90.0, "charging": False}))
+    table.update(state("lost", agvPosition=None, operatingMode="MANUAL"))
+    on_map = table.mapId == table.map_code("hall")
+    assert table.serials_where(on_map & (table.batteryCharge < 20) & ~table.driving) == ["low"]
+    assert table.serials_where(table.mapId == table.map_code("elsewhere")) == []
+    manual = table.operatingMode == table.operating_mode_code(OperatingMode.MANUAL)
+    assert table.serials_where(manual) == ["lost"]
+    row = table.row("lost")
+    assert row["mapId"] is None and math.isnan(row["x"])
+    assert row["operatingMode"] is OperatingMode.MANUAL
+    assert table.row("unknown") is None
+    assert "low" in table and "unknown" not in table
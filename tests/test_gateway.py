@@ -0,0 +1,107 @@
+import asyncio
+import socket
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fixtures import make_state
+from vda5050.codec import encode
+from vda5050.gateway import Gateway
+from vda5050.state import State
+from vda5050.topics import STATE, topic_for
+
+
+def state_message(serial, header_id):
+    state = State.parse_obj(make_state(serial=serial, n_nodes=2, header_id=header_id))
+    return SimpleNamespace(topic=topic_for(state.manufacturer, serial, STATE),
+                           payload=encode(state))
+
+
+def broker_available(host="127.0.0.1", port=1883):
+    try:
+        socket.create_connection((host, port), timeout=0.2).close()
+        return True
+    except OSError:
+        return False
+
+
+def test_full_queue_keeps_messages():
+    # One loop_read() can hand over several messages after the queue filled up
+    async def main():
+        gateway = Gateway("localhost", subtopics=(STATE,), queue_size=1)
+        for i in range(3):
+            gateway._on_message(gateway.client, None, state_message("agv-1", i))
+        assert gateway.queues[STATE].full()
+        return [(await gateway.get(STATE)).payload.headerId for _ in range(3)]
+
+    assert asyncio.run(main()) == [0, 1, 2]
+
+
+def test_undecodable_message_is_dropped():
+    async def main():
+        gateway = Gateway("localhost", subtopics=(STATE,))
+        gateway._on_message(gateway.client, None,
+                            SimpleNamespace(topic=topic_for("acme", "agv-1", STATE),
+                                            payload=b"{"))
+        return gateway.queues[STATE].qsize()
+
+    assert asyncio.run(main()) == 0
+
+
+@pytest.mark.skipif(not broker_available(), reason="needs an MQTT broker on localhost:1883")
+def test_slow_consumer_gets_every_message():
+    async def main():
+        state = State.parse_obj(make_state(serial="agv-backpressure", n_nodes=2))
+        async with Gateway("127.0.0.1", subtopics=(STATE,), queue_size=1) as gateway:
+            await asyncio.sleep(0.2)
+            for i in range(20):
+                gateway.publish(state.manufacturer, state.serialNumber, STATE,
+                                state.copy(update={"headerId": i}), qos=1)
+            # Let everything arrive while nobody consumes
+            await asyncio.sleep(0.5)
+            received = []
+            while len(received) < 20:
+                message = await asyncio.wait_for(gateway.get(STATE), 5)
+                if message.serialNumber == state.serialNumber:
+                    received.append(message.payload.headerId)
+            return received
+
+    assert asyncio.run(main()) == list(range(20))
+
+
+def fake_broker(reply: bytes):
+    # Answers the CONNECT packet with reply and closes the connection
+    async def handle(reader, writer):
+        await reader.read(1024)
+        writer.write(reply)
+        await writer.drain()
+        writer.close()
+
+    return asyncio.start_server(handle, "127.0.0.1", 0)
+
+
+@pytest.mark.parametrize("reply", [b"", b"\x20\x02\x00\x05"], ids=["closed", "refused"])
+def test_failed_first_connect_raises_and_does_not_reconnect(reply):
+    async def main():
+        server = await fake_broker(reply)
+        port = server.sockets[0].getsockname()[1]
+        gateway = Gateway("127.0.0.1", port, subtopics=(STATE,), reconnect_delay=(0.01, 0.01))
+        with pytest.raises(ConnectionError):
+            await asyncio.wait_for(gateway.connect(), 5)
+        await asyncio.sleep(0.1)
+        server.close()
+        return gateway._reconnect, gateway.reconnects
+
+    assert asyncio.run(main()) == (None, 0)
+
+
+def test_state_that_is_not_an_object_is_dropped():
+    # Trusted decoding raises AttributeError for a JSON array
+    async def main():
+        gateway = Gateway("localhost", subtopics=(STATE,), validate=False)
+        gateway._on_message(gateway.client, None,
+                            SimpleNamespace(topic=topic_for("acme", "agv-1", STATE),
+                                            payload=b"[1, 2]"))
+        return gateway.queues[STATE].qsize()
+
+    assert asyncio.run(main()) == 0
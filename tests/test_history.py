@@ -0,0 +1,62 @@
+import numpy as np
+
+from benchmarks.fixtures import make_state
+from vda5050.codec import encode
+from vda5050.history import HistoryReader, HistoryRecorder
+from vda5050.state import State
+
+T0 = 1_700_000_000.0
+
+
+def state(serial, header_id, x=0.0):
+    return State.parse_obj(make_state(serial=serial, n_nodes=2, header_id=header_id, x=x))
+
+
+def record(path, serial, times, close=True, keep_payloads=False):
+    recorder = HistoryRecorder(str(path), keep_payloads=keep_payloads)
+    for i, t in enumerate(times):
+        s = state(serial, i, x=float(i))
+        recorder.record(s, encode(s), t=t)
+    if close:
+        recorder.close()
+    else:
+        recorder.flush()
+
+
+def test_round_trip(tmp_path):
+    record(tmp_path, "A", [T0 + i for i in range(5)], keep_payloads=True)
+    columns = HistoryReader(str(tmp_path)).read("A")
+    assert columns["time"].tolist() == [T0 + i for i in range(5)]
+    assert columns["x"].tolist() == [0.0, 1.0, 2.0, 3.0, 4.0]
+    assert set(columns["serialNumber"]) == {"A"}
+    states = list(HistoryReader(str(tmp_path)).states("A"))
+    assert [s.headerId for _, s in states] == list(range(5))
+
+
+def test_reopen_after_close(tmp_path):
+    record(tmp_path, "A", [T0 + i for i in range(5)])
+    record(tmp_path, "B", [T0 + 10 + i for i in range(3)])
+    reader = HistoryReader(str(tmp_path))
+    columns = reader.read()
+    assert len(columns["time"]) == 8
+    assert columns["serialNumber"].tolist() == ["A"] * 5 + ["B"] * 3
+    assert np.all(np.diff(columns["time"]) > 0)
+    assert reader.read("A")["headerId"].tolist() == list(range(5))
+    assert reader.read("B")["time"].tolist() == [T0 + 10 + i for i in range(3)]
+
+
+def test_reopen_after_crash(tmp_path):
+    # Flushed but never sealed, as if the recorder was killed
+    record(tmp_path, "A", [T0 + i for i in range(5)], close=False, keep_payloads=True)
+    record(tmp_path, "A", [T0 + 10 + i for i in range(3)], keep_payloads=True)
+    reader = HistoryReader(str(tmp_path))
+    assert reader.read("A")["headerId"].tolist() == [0, 1, 2, 3, 4, 0, 1, 2]
+    assert [s.batteryState.batteryCharge for _, s in reader.states("A")] == [80.0] * 8
+
+
+def test_reader_sees_reopened_segment(tmp_path):
+    record(tmp_path, "A", [T0 + i for i in range(5)])
+    reader = HistoryReader(str(tmp_path))
+    assert len(reader.read()["time"]) == 5
+    record(tmp_path, "B", [T0 + 10])
+    assert reader.read("B")["time"].tolist() == [T0 + 10]
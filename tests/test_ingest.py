@@ -0,0 +1,70 @@
+import os
+import signal
+import time
+from multiprocessing import shared_memory
+
+import pytest
+
+from benchmarks.fixtures import make_state
+from vda5050.codec import encode
+from vda5050.ingest import StateIngest
+from vda5050.state import State
+
+
+def poll_until(ingest, count, timeout=10.0):
+    summaries = []
+    deadline = time.monotonic() + timeout
+    while len(summaries) < count and time.monotonic() < deadline:
+        summaries += ingest.poll()
+    return summaries
+
+
+def test_unexpected_failure_is_counted_and_worker_keeps_going():
+    # Trusted decoding of a JSON array fails with AttributeError
+    payload = encode(State.parse_obj(make_state(serial="agv-1", header_id=5)))
+    with StateIngest(1, validate=False) as ingest:
+        ingest.submit("agv-1", b"[]")
+        ingest.submit("agv-1", payload)
+        summaries = poll_until(ingest, 2)
+        assert [summary.valid for summary in summaries] == [False, True]
+        assert summaries[1].headerId == 5
+        assert ingest.failed == 1
+
+
+def test_dead_worker_raises():
+    payload = encode(State.parse_obj(make_state(serial="agv-1")))
+    with StateIngest(1) as ingest:
+        os.kill(ingest.processes[0].pid, signal.SIGKILL)
+        ingest.processes[0].join()
+        with pytest.raises(RuntimeError):
+            ingest.poll()
+        with pytest.raises(RuntimeError):
+            # Enough to fill the pipe if nothing reported the dead worker
+            for _ in range(10000):
+                ingest.submit("agv-1", payload)
+
+
+def test_close_with_full_ring_does_not_hang():
+    payload = encode(State.parse_obj(make_state(serial="agv-1")))
+    ingest = StateIngest(1, ring_capacity=4)
+    names = [ring.shm.name for ring in ingest.rings]
+    for _ in range(10):
+        ingest.submit("agv-1", payload)
+    start = time.monotonic()
+    ingest.close()
+    assert time.monotonic() - start < 5.0
+    assert not ingest.processes[0].is_alive()
+    for name in names:
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name)
+
+
+def test_long_serial_number_is_truncated_on_a_character_boundary():
+    serial = "ä" * 40
+    data = make_state(serial=serial, map_id="ö" * 40)
+    with StateIngest(1) as ingest:
+        ingest.submit(serial, encode(State.parse_obj(data)))
+        (summary,) = poll_until(ingest, 1)
+    assert summary.valid
+    assert summary.serialNumber == "ä" * 32
+    assert summary.mapId == "ö" * 32
@@ -0,0 +1,28 @@
+from benchmarks.fixtures import make_factsheet, make_order
+from vda5050.factsheet import FactSheet
+from vda5050.limits import LimitCache, OrderLimits
+from vda5050.order import Order
+
+
+def test_enum_len_applies_to_action_type_and_parameter_keys():
+    factsheet = FactSheet.parse_obj(make_factsheet())
+    factsheet.protocolLimits.maxStringLens.enumLen = 8
+    data = make_order(n_nodes=2, actions_per_node=1)
+    action = data["nodes"][0]["actions"][0]
+    action["actionType"] = "a" * 9
+    action["actionParameters"] = [{"key": "k" * 9, "value": "1"}]
+    paths = [violation.path for violation in OrderLimits(factsheet).check_order(Order.parse_obj(data))]
+    assert "nodes[0].actions[0].actionType" in paths
+    assert "nodes[0].actions[0].actionParameters[0].key" in paths
+
+
+def test_cache_recompiles_on_changed_limits_with_same_header_id():
+    factsheet = FactSheet.parse_obj(make_factsheet())
+    cache = LimitCache()
+    limits = cache.update(factsheet)
+    assert cache.update(factsheet.copy(update={"headerId": 7})) is limits
+    changed = factsheet.copy(deep=True)
+    changed.protocolLimits.maxArrayLens.order_nodes = 1
+    assert cache.update(changed).order_nodes == 1
+    order = Order.parse_obj(make_order(serial=factsheet.serialNumber, n_nodes=2))
+    assert [violation.path for violation in cache.check_order(order)] == ["nodes"]
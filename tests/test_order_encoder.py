@@ -0,0 +1,51 @@
+import pytest
+
+from benchmarks.fixtures import make_order
+from vda5050.codec import encode
+from vda5050.order import Order
+from vda5050.order_encoder import OrderEncoder
+from vda5050.order_planner import OrderPlanner
+
+
+def planner_updates(n_nodes=60):
+    route = Order.parse_obj(make_order(n_nodes=n_nodes, actions_per_node=2))
+    planner = OrderPlanner(route.manufacturer, route.serialNumber, route.orderId,
+                           route.nodes, route.edges, max_nodes=20, base_nodes=5, lookahead=0)
+    updates = [planner.first_order()]
+    while not planner.done:
+        updates.append(planner._order(planner.base_end))
+    return updates
+
+
+@pytest.mark.parametrize("verify", [True, False])
+def test_updates_match_encode(verify):
+    encoder = OrderEncoder(verify)
+    for order in planner_updates():
+        assert encoder.encode(order) == encode(order)
+    assert encoder.hits > encoder.misses
+
+
+def test_copies_match_encode():
+    encoder = OrderEncoder()
+    for order in planner_updates():
+        copied = order.copy(deep=True)
+        assert encoder.encode(copied) == encode(copied)
+
+
+def test_in_place_edits_are_encoded():
+    order = Order.parse_obj(make_order(n_nodes=5))
+    encoder = OrderEncoder()
+    encoder.encode(order)
+    order.nodes[1].released = False
+    order.nodes[2].nodePosition.x = 99.0
+    order.edges[0].actions.append(order.nodes[0].actions[0])
+    assert encoder.encode(order) == encode(order)
+
+
+def test_new_order_id_starts_over():
+    encoder = OrderEncoder()
+    first = Order.parse_obj(make_order(n_nodes=5, order_id="a"))
+    second = Order.parse_obj(make_order(n_nodes=5, order_id="b", map_id="map-2"))
+    encoder.encode(first)
+    assert encoder.encode(second) == encode(second)
+    assert list(encoder.orders) == [(second.manufacturer, second.serialNumber)]
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+
+from benchmarks.fixtures import make_factsheet
+from vda5050.factsheet import FactSheet
+from vda5050.order import Edge, Node
+from vda5050.order_planner import OrderPlanner
+
+
+def route(n):
+    nodes = [Node(nodeId="n%d" % i, sequenceId=0) for i in range(n)]
+    edges = [Edge(edgeId="e%d" % i, sequenceId=0, startNodeId="n%d" % i,
+                  endNodeId="n%d" % (i + 1)) for i in range(n - 1)]
+    return nodes, edges
+
+
+def layout(order):
+    # (nodeId, sequenceId, released) per node, (edgeId, released) per edge
+    return ([(node.nodeId, node.sequenceId, node.released) for node in order.nodes],
+            [(edge.edgeId, edge.released) for edge in order.edges])
+
+
+def at(sequence_id, order_id="job"):
+    return SimpleNamespace(orderId=order_id, lastNodeSequenceId=sequence_id)
+
+
+def test_base_and_horizon_sequence():
+    planner = OrderPlanner("acme", "agv-1", "job", *route(8), max_nodes=5, base_nodes=3)
+    first = planner.first_order()
+    assert first.orderUpdateId == 0
+    assert layout(first) == (
+        [("n0", 0, True), ("n1", 2, True), ("n2", 4, True), ("n3", 6, False), ("n4", 8, False)],
+        [("e0", True), ("e1", True), ("e2", False), ("e3", False)])
+    # Due once at most one released node (lookahead) is left ahead
+    assert planner.next_sequence_id() == 2
+    assert planner.on_state(at(0)) is None
+    assert planner.on_state(at(2, "other")) is None
+    update = planner.on_state(at(2))
+    assert update.orderUpdateId == 1
+    # Starts at the stitching node, the last released node so far
+    assert layout(update) == (
+        [("n2", 4, True), ("n3", 6, True), ("n4", 8, True), ("n5", 10, False),
+         ("n6", 12, False)],
+        [("e2", True), ("e3", True), ("e4", False), ("e5", False)])
+    update = planner.on_state(at(6))
+    assert layout(update) == (
+        [("n4", 8, True), ("n5", 10, True), ("n6", 12, True), ("n7", 14, False)],
+        [("e4", True), ("e5", True), ("e6", False)])
+    assert not planner.done
+    last = planner.on_state(at(10))
+    assert layout(last) == ([("n6", 12, True), ("n7", 14, True)], [("e6", True)])
+    assert last.orderUpdateId == 3
+    assert planner.done
+    assert planner.on_state(at(14)) is None
+
+
+def test_limits_come_from_the_factsheet():
+    factsheet = FactSheet.parse_obj(make_factsheet())
+    factsheet.protocolLimits.maxArrayLens.order_nodes = 6
+    factsheet.protocolLimits.maxArrayLens.order_edges = 3
+    planner = OrderPlanner.from_factsheet(factsheet, "job", *route(10))
+    first = planner.first_order()
+    assert len(first.nodes) == 4 and len(first.edges) == 3
+
+
+def test_invalid_routes_are_rejected():
+    nodes, edges = route(4)
+    with pytest.raises(ValueError):
+        OrderPlanner("acme", "agv-1", "job", nodes, edges[:-1], max_nodes=4)
+    with pytest.raises(ValueError):
+        OrderPlanner("acme", "agv-1", "job", nodes, edges, max_nodes=1)
@@ -0,0 +1,68 @@
+import asyncio
+import socket
+
+import pytest
+
+from benchmarks.fixtures import make_order
+from vda5050.gateway import Gateway
+from vda5050.order import Action, ActionBlockingType, Order
+from vda5050.priority import PriorityPublisher
+from vda5050.topics import INSTANT_ACTIONS, ORDER
+
+
+def broker_available(host="127.0.0.1", port=1883):
+    try:
+        socket.create_connection((host, port), timeout=0.2).close()
+        return True
+    except OSError:
+        return False
+
+
+def recording_publisher():
+    priority = PriorityPublisher("localhost")
+    published = []
+    priority.gateway.publish_instant_actions = lambda message, qos: published.append(message)
+    return priority, published
+
+
+def test_actions_are_batched_with_header_ids_per_agv():
+    priority, published = recording_publisher()
+    actions = [Action(actionType=action_type, actionId=action_type,
+                      blockingType=ActionBlockingType.NONE)
+               for action_type in ("startPause", "initPosition")]
+    priority.send("acme", "agv-1", *actions)
+    priority.send("acme", "agv-2", actions[0])
+    priority.cancel_order("acme", "agv-1")
+    assert [(m.serialNumber, m.headerId, len(m.actions)) for m in published] == [
+        ("agv-1", 0, 2), ("agv-2", 0, 1), ("agv-1", 1, 1)]
+    assert published[0].actions == actions
+    cancel = published[2].actions[0]
+    assert cancel.actionType == "cancelOrder"
+    assert cancel.blockingType is ActionBlockingType.HARD
+
+
+def test_action_ids_are_unique():
+    priority, published = recording_publisher()
+    priority.start_pause("acme", "agv-1")
+    priority.stop_pause("acme", "agv-1")
+    assert published[0].actions[0].actionId != published[1].actions[0].actionId
+
+
+@pytest.mark.skipif(not broker_available(), reason="needs an MQTT broker on localhost:1883")
+def test_instant_action_overtakes_queued_orders():
+    async def main():
+        order = Order.parse_obj(make_order("agv-priority", n_nodes=50, actions_per_node=2))
+        async with Gateway("127.0.0.1", subtopics=()) as orders, \
+                PriorityPublisher("127.0.0.1") as priority, \
+                Gateway("127.0.0.1", subtopics=(ORDER, INSTANT_ACTIONS),
+                        queue_size=10000) as receiver:
+            await asyncio.sleep(0.2)
+            for i in range(500):
+                orders.publish_order(order.copy(update={"orderUpdateId": i}), 1)
+            priority.cancel_order(order.manufacturer, order.serialNumber)
+            while receiver.queues[INSTANT_ACTIONS].empty():
+                await asyncio.sleep(0.001)
+            return receiver.queues[ORDER].qsize()
+
+    # Orders received before the cancelOrder
+    assert asyncio.run(asyncio.wait_for(main(), 10)) < 250
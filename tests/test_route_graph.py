@@ -0,0 +1,43 @@
+import random
+
+from benchmarks.fixtures import make_grid_orders
+from vda5050.order import Edge, Node, NodePosition, Order
+from vda5050.route_graph import LayoutGraph
+
+
+def grid_graph():
+    graph = LayoutGraph("hall")
+    for order in make_grid_orders():
+        graph.add_order(Order.parse_obj(order))
+    return graph
+
+
+def test_search_matches_compiled_tables():
+    rnd = random.Random(1)
+    plain, table, alt = grid_graph(), grid_graph(), grid_graph()
+    table.compile()
+    alt.compile(all_pairs_limit=0)
+    ids = plain.node_ids
+    for _ in range(50):
+        source, target = rnd.choice(ids), rnd.choice(ids)
+        length, node_ids, edge_ids = plain.shortest_path(source, target)
+        assert node_ids[0] == source and node_ids[-1] == target
+        assert len(edge_ids) == len(node_ids) - 1
+        assert abs(length - table.shortest_path(source, target)[0]) < 1e-9
+        assert abs(length - alt.shortest_path(source, target)[0]) < 1e-9
+
+
+def test_add_order_does_not_recompile():
+    graph = grid_graph()
+    graph.compile()
+    dist = graph.dist
+    shortcut = Order(orderId="shortcut", orderUpdateId=0, nodes=[
+        Node(nodeId="n0_0", sequenceId=0, nodePosition=NodePosition(x=0, y=0, mapId="hall")),
+        Node(nodeId="far", sequenceId=2, nodePosition=NodePosition(x=1, y=1, mapId="hall")),
+    ], edges=[Edge(edgeId="to-far", sequenceId=1, startNodeId="n0_0", endNodeId="far")])
+    graph.add_order(shortcut)
+    length, node_ids, edge_ids = graph.shortest_path("n0_0", "far")
+    assert graph.dist is dist
+    assert node_ids == ["n0_0", "far"] and edge_ids == ["to-far"]
+    assert abs(length - 2 ** 0.5) < 1e-12
+    assert graph.shortest_path("far", "n0_0") is None
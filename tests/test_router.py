@@ -0,0 +1,44 @@
+import itertools
+
+from paho.mqtt.matcher import MQTTMatcher
+
+from vda5050.router import Router, TopicTrie
+from vda5050.topics import STATE, topic_for
+
+FILTERS = [
+    "#", "+", "+/+", "uagv/#", "uagv/v2/+/+/state", "uagv/v2/acme/+/#", "uagv/+/acme/#",
+    "uagv/v2/acme/agv-1/state", "uagv/v2/acme/agv-1", "+/v2/#", "+/+/+/+/+", "$SYS/#",
+    "$SYS/+", "a//b", "a/+/b", "/+", "/#",
+]
+TOPICS = [
+    "uagv", "uagv/v2", "uagv/v2/acme/agv-1/state", "uagv/v2/acme/agv-1/order",
+    "uagv/v2/acme/agv-1", "uagv/v1/acme/agv-2/state", "other/v2/x/y/z", "$SYS/broker",
+    "$SYS/broker/load", "a//b", "a/x/b", "/", "/x", "a", "a/b/c/d/e/f",
+]
+
+
+def paho_matches(filters, topic):
+    matcher = MQTTMatcher()
+    for topic_filter in filters:
+        matcher[topic_filter] = topic_filter
+    return sorted(matcher.iter_match(topic))
+
+
+def test_trie_matches_like_paho():
+    for count in (1, 2, len(FILTERS)):
+        for filters in itertools.islice(itertools.combinations(FILTERS, count), 200):
+            trie = TopicTrie()
+            for topic_filter in filters:
+                trie.insert(topic_filter, topic_filter)
+            for topic in TOPICS:
+                assert sorted(trie.match(topic)) == paho_matches(filters, topic), (filters, topic)
+
+
+def test_undecodable_payload_is_dropped():
+    router = Router(validate=False)
+    received = []
+    router.route(STATE, received.append)
+    topic = topic_for("acme", "agv-1", STATE)
+    for payload in (b"{", b"[1, 2]"):
+        assert router.dispatch(topic, payload) == 0
+    assert received == []
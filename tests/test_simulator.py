@@ -0,0 +1,80 @@
+import asyncio
+from datetime import datetime, timezone
+
+from benchmarks.fixtures import make_factsheet
+from vda5050.factsheet import FactSheet
+from vda5050.loopback import LoopbackBroker
+from vda5050.order import Action, ActionBlockingType, ActionParameter, Edge, Node, NodePosition
+from vda5050.order_planner import OrderPlanner
+from vda5050.simulator import SimulatedAgv
+from vda5050.state import ActionStatus
+from vda5050.topics import ORDER
+
+NOW = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def route(n):
+    nodes = [
+        Node(nodeId="n%d" % i, sequenceId=0, released=True,
+             nodePosition=NodePosition(x=2.0 * i, y=0.0, mapId="hall"),
+             actions=[Action(actionId="a%d" % i, actionType="beep",
+                             blockingType=ActionBlockingType.NONE,
+                             actionParameters=[ActionParameter(key="duration", value="0.1")])])
+        for i in range(n)
+    ]
+    edges = [Edge(edgeId="e%d" % i, sequenceId=0, released=True,
+                  startNodeId="n%d" % i, endNodeId="n%d" % (i + 1)) for i in range(n - 1)]
+    return nodes, edges
+
+
+def new_agv():
+    return SimulatedAgv(FactSheet.parse_obj(make_factsheet()), map_id="hall")
+
+
+def test_updates_stitch_onto_the_current_base():
+    agv = new_agv()
+    nodes, edges = route(12)
+    planner = OrderPlanner(agv.manufacturer, agv.serialNumber, "job", nodes, edges,
+                           max_nodes=6, base_nodes=4, lookahead=2)
+    assert agv.receive_order(planner.first_order())
+    updates = 0
+    for _ in range(2000):
+        agv.step(0.1)
+        update = planner.on_state(agv.state(NOW))
+        if update is not None:
+            # Sent while the vehicle is still short of the stitching node
+            assert agv.receive_order(update)
+            updates += 1
+        if planner.done and agv.idle:
+            break
+    assert updates >= 2
+    assert agv.last_node_id == "n11"
+    assert not agv.errors
+    assert {simulated.status for simulated in agv.actions.values()} == {ActionStatus.FINISHED}
+    assert len(agv.actions) == 12
+
+
+def test_update_outside_the_base_is_rejected():
+    agv = new_agv()
+    nodes, edges = route(6)
+    planner = OrderPlanner(agv.manufacturer, agv.serialNumber, "job", nodes, edges,
+                           max_nodes=4, base_nodes=2)
+    assert agv.receive_order(planner.first_order())
+    # Stitches at n3, which the vehicle only knows as a horizon node
+    update = planner._order(3)
+    assert not agv.receive_order(update)
+    assert agv.errors[-1].errorType == "orderUpdateError"
+    assert agv.order_update_id == 0
+    assert [node.nodeId for node in agv.nodes] == ["n0", "n1", "n2", "n3"]
+
+
+def test_loopback_drops_undecodable_messages():
+    async def main():
+        broker = LoopbackBroker()
+        receiver = broker.gateway(subtopics=(ORDER,))
+        await receiver.connect()
+        sender = broker.gateway(subtopics=())
+        sender.publish("acme", "agv-1", ORDER, b"{")
+        return receiver.queues[ORDER].qsize()
+
+    assert asyncio.run(main()) == 0
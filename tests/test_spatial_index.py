@@ -0,0 +1,31 @@
+import math
+import random
+
+from vda5050.spatial_index import GridIndex
+
+
+def brute_force(points, x, y, k):
+    hits = sorted((math.hypot(px - x, py - y), key) for key, (px, py) in points.items())
+    return [distance for distance, _ in hits[:k]]
+
+
+def test_nearest_matches_brute_force():
+    rnd = random.Random(7)
+    index = GridIndex(cell_size=5.0)
+    points = {}
+    for key in range(300):
+        points[key] = (rnd.uniform(0, 200), rnd.uniform(0, 100))
+        index.insert(key, *points[key])
+    for _ in range(200):
+        x, y = rnd.uniform(-100, 300), rnd.uniform(-100, 200)
+        k = rnd.choice((1, 5, 20))
+        found = [distance for distance, _ in index.nearest(x, y, k)]
+        assert found == brute_force(points, x, y, k)
+
+
+def test_nearest_far_from_all_points_terminates():
+    index = GridIndex(cell_size=1.0)
+    index.insert("a", 0.0, 0.0)
+    index.insert("b", 3.0, 4.0)
+    hits = index.nearest(1e9, 1e9, k=5)
+    assert [key for _, key in hits] == ["b", "a"]
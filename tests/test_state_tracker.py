@@ -0,0 +1,30 @@
+from benchmarks.fixtures import make_state
+from vda5050.state import ActionStatus, State
+from vda5050.state_tracker import StateTracker, diff_states
+
+
+def test_equal_states_have_no_changes():
+    old = State.parse_obj(make_state(header_id=1))
+    new = State.parse_obj(make_state(header_id=2))
+    assert diff_states(old, new) == []
+
+
+def test_nested_change_is_reported_by_path():
+    tracker = StateTracker()
+    old = State.parse_obj(make_state(header_id=1))
+    new = State.parse_obj(make_state(header_id=2))
+    new.actionStates[0].actionStatus = ActionStatus.RUNNING
+    assert tracker.update(old) is None
+    changes = tracker.update(new)
+    assert [str(change) for change in changes] == ["actionStates[0].actionStatus: WAITING -> RUNNING"]
+
+
+def test_fields_that_become_none_or_disappear_are_reported():
+    old = State.parse_obj(make_state(header_id=1))
+    new = State.parse_obj(make_state(header_id=2))
+    new.agvPosition = None
+    assert [change.path for change in diff_states(old, new)] == ["agvPosition"]
+    missing = old.copy()
+    del missing.__dict__["velocity"]
+    changes = diff_states(old, missing)
+    assert [(change.path, change.new) for change in changes] == [("velocity", None)]
@@ -0,0 +1,58 @@
+import math
+
+import numpy as np
+
+from vda5050.state import ControlPoint, Trajectory
+from vda5050.trajectory import TrajectoryCurve, _basis
+
+
+def quarter_circle():
+    # Rational quadratic arc of radius 1 from (1, 0) to (0, 1)
+    return Trajectory(degree=2, knotVector=[0, 0, 0, 1, 1, 1], controlPoints=[
+        ControlPoint(x=1, y=0, weight=1),
+        ControlPoint(x=1, y=1, weight=math.sqrt(0.5)),
+        ControlPoint(x=0, y=1, weight=1),
+    ])
+
+
+def cox_de_boor(knots, i, p, u):
+    if p == 0:
+        if knots[i] <= u < knots[i + 1]:
+            return 1.0
+        # The end of the domain belongs to the last non-empty span
+        last = max(j for j in range(len(knots) - 1) if knots[j] < knots[j + 1])
+        return 1.0 if u == knots[-1] and i == last else 0.0
+    value = 0.0
+    if knots[i + p] > knots[i]:
+        value += (u - knots[i]) / (knots[i + p] - knots[i]) * cox_de_boor(knots, i, p - 1, u)
+    if knots[i + p + 1] > knots[i + 1]:
+        value += ((knots[i + p + 1] - u) / (knots[i + p + 1] - knots[i + 1])
+                  * cox_de_boor(knots, i + 1, p - 1, u))
+    return value
+
+
+def test_quarter_circle_radius_and_length():
+    curve = TrajectoryCurve(quarter_circle())
+    points, tangents = curve.sample(101)
+    assert np.allclose(np.hypot(points[:, 0], points[:, 1]), 1.0)
+    assert np.allclose(points[0], [1, 0]) and np.allclose(points[-1], [0, 1])
+    # Tangents are unit length and perpendicular to the radius
+    assert np.allclose(np.linalg.norm(tangents, axis=1), 1.0)
+    assert np.allclose((points * tangents).sum(axis=1), 0.0)
+    assert abs(curve.length(1024) - math.pi / 2) < 1e-5
+
+
+def test_basis_matches_cox_de_boor():
+    knots = np.array([0, 0, 0, 0, 0.5, 1, 1, 2, 3, 3, 3, 3], dtype=float)
+    degree = 3
+    u = np.linspace(0, 3, 61)
+    basis, derivative = _basis(knots, degree, u)
+    count = len(knots) - degree - 1
+    reference = np.array([[cox_de_boor(knots, i, degree, x) for i in range(count)] for x in u])
+    assert np.allclose(basis, reference)
+    assert np.allclose(basis.sum(axis=1), 1.0)
+    # Derivatives against central differences, away from the knots
+    h = 1e-6
+    inner = np.array([0.25, 0.75, 1.5, 2.5])
+    numeric = (_basis(knots, degree, inner + h)[0] - _basis(knots, degree, inner - h)[0]) / (2 * h)
+    assert np.allclose(_basis(knots, degree, inner)[1], numeric, atol=1e-5)
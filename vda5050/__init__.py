@@ -0,0 +1,71 @@
+import importlib
+
+# VDA5050 message models and fleet tools
+#
+# Submodules are imported on first access, so "import vda5050" is cheap
+# and a worker that only handles State never builds the Order or FactSheet
+# validators. The message models are also available here by name, with
+# distinct names for the classes that exist in more than one message.
+
+_SUBMODULES = {
+    "action_tracker",
+    "capabilities",
+    "coalescer",
+    "collision",
+    "codec",
+    "decoder",
+    "dispatcher",
+    "factsheet",
+    "fleet_table",
+    "gateway",
+    "history",
+    "ingest",
+    "instant_actions",
+    "limits",
+    "loopback",
+    "order",
+    "order_encoder",
+    "order_planner",
+    "priority",
+    "route_graph",
+    "router",
+    "simulator",
+    "spatial_index",
+    "state",
+    "state_tracker",
+    "topics",
+    "trajectory",
+    "visualization",
+}
+
+# name -> (submodule, attribute)
+_EXPORTS = {
+    "FactSheet": ("factsheet", "FactSheet"),
+    "FactSheetActionParameter": ("factsheet", "ActionParameter"),
+    "InstantActions": ("instant_actions", "InstantActions"),
+    "LazyState": ("decoder", "LazyState"),
+    "Order": ("order", "Order"),
+    "OrderActionParameter": ("order", "ActionParameter"),
+    "OrderNodePosition": ("order", "NodePosition"),
+    "State": ("state", "State"),
+    "StateNodePosition": ("state", "NodePosition"),
+    "Visualization": ("visualization", "Visualization"),
+}
+
+__all__ = sorted(_EXPORTS)
+
+
+def __getattr__(name):
+    if name in _SUBMODULES:
+        return importlib.import_module("." + name, __name__)
+    export = _EXPORTS.get(name)
+    if export is None:
+        raise AttributeError("module %r has no attribute %r" % (__name__, name))
+    module, attribute = export
+    value = getattr(importlib.import_module("." + module, __name__), attribute)
+    globals()[name] = value
+    return value
+
+
+def __dir__():
+    return sorted(set(globals()) | _SUBMODULES | set(_EXPORTS))
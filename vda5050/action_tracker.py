@@ -0,0 +1,114 @@
+import asyncio
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .order import Order
+from .state import ActionState, ActionStatus, State
+
+# Action status tracking by actionId
+#
+# ActionTracker remembers the last ActionStatus of every action per AGV and
+# on each State only acts on the actions whose status changed. Callers
+# await a future per actionId instead of scanning actionStates themselves;
+# the future resolves with the final ActionState once the action is
+# FINISHED or FAILED. Callbacks registered with on_change() run on every
+# status change of their action; one that raises is logged and does not
+# keep the others from running.
+#
+# A FINISHED or FAILED action is forgotten once it is no longer in the
+# AGV's actionStates, e.g. after the next order. Waiting for it after that
+# is waiting for an unknown action.
+
+AgvKey = Tuple[str, str]
+ActionCallback = Callable[[ActionState], None]
+
+TERMINAL = frozenset({ActionStatus.FINISHED, ActionStatus.FAILED})
+
+log = logging.getLogger(__name__)
+
+
+class ActionTracker:
+
+    def __init__(self):
+        self.statuses: Dict[AgvKey, Dict[str, ActionState]] = {}
+        self.futures: Dict[AgvKey, Dict[str, List[asyncio.Future]]] = {}
+        self.callbacks: Dict[AgvKey, Dict[str, List[ActionCallback]]] = {}
+
+    def get(self, manufacturer: str, serial_number: str, action_id: str) -> Optional[ActionState]:
+        return self.statuses.get((manufacturer, serial_number), {}).get(action_id)
+
+    def wait(self, manufacturer: str, serial_number: str, action_id: str) -> asyncio.Future:
+        # Resolves with the ActionState once the action is FINISHED or FAILED
+        future = asyncio.get_running_loop().create_future()
+        known = self.get(manufacturer, serial_number, action_id)
+        if known is not None and known.actionStatus in TERMINAL:
+            future.set_result(known)
+        else:
+            key = (manufacturer, serial_number)
+            self.futures.setdefault(key, {}).setdefault(action_id, []).append(future)
+        return future
+
+    def track_order(self, order: Order) -> Dict[str, asyncio.Future]:
+        # One future per action of the order's nodes and edges
+        futures = {}
+        for element in (*order.nodes, *order.edges):
+            for action in element.actions:
+                futures[action.actionId] = self.wait(
+                    order.manufacturer, order.serialNumber, action.actionId)
+        return futures
+
+    def on_change(self, manufacturer: str, serial_number: str, action_id: str,
+                  callback: ActionCallback):
+        key = (manufacturer, serial_number)
+        self.callbacks.setdefault(key, {}).setdefault(action_id, []).append(callback)
+
+    def update(self, state: State) -> List[ActionState]:
+        # Returns the ActionStates whose status changed
+        key = (state.manufacturer, state.serialNumber)
+        statuses = self.statuses.get(key)
+        if statuses is None:
+            statuses = self.statuses[key] = {}
+        changed = []
+        for action_state in state.actionStates:
+            action_id = action_state.actionId
+            previous = statuses.get(action_id)
+            statuses[action_id] = action_state
+            if previous is None or previous.actionStatus is not action_state.actionStatus:
+                changed.append(action_state)
+        if len(statuses) > len(state.actionStates):
+            self._prune(statuses, state)
+        if changed:
+            self._notify(key, changed)
+        return changed
+
+    def _prune(self, statuses: Dict[str, ActionState], state: State):
+        # Their waiters were resolved when they became terminal
+        current = {action_state.actionId for action_state in state.actionStates}
+        for action_id in [action_id for action_id, action_state in statuses.items()
+                          if action_id not in current and action_state.actionStatus in TERMINAL]:
+            del statuses[action_id]
+
+    def _notify(self, key: AgvKey, changed: List[ActionState]):
+        futures = self.futures.get(key, {})
+        callbacks = self.callbacks.get(key, {})
+        for action_state in changed:
+            action_id = action_state.actionId
+            for callback in callbacks.get(action_id, ()):
+                try:
+                    callback(action_state)
+                except Exception:
+                    log.exception("Action callback for %s failed", action_id)
+            if action_state.actionStatus in TERMINAL:
+                callbacks.pop(action_id, None)
+                for future in futures.pop(action_id, ()):
+                    if not future.done():
+                        future.set_result(action_state)
+
+    def forget(self, manufacturer: str, serial_number: str):
+        # Drops everything known about an AGV and cancels its pending futures
+        key = (manufacturer, serial_number)
+        self.statuses.pop(key, None)
+        self.callbacks.pop(key, None)
+        for futures in self.futures.pop(key, {}).values():
+            for future in futures:
+                future.cancel()
@@ -0,0 +1,180 @@
+import json
+from abc import ABC, abstractmethod
+from typing import Callable, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .factsheet import ActionScope, FactSheet, ValueDataType
+from .order import Action, Order
+
+# Compiled AGV capabilities for validating orders before they are sent
+#
+# Capabilities turns FactSheet.protocolFeatures.agvActions into dict
+# lookups once, so checking an order is a single pass over its actions.
+# CapabilityCache holds them per AGV and recompiles when a factsheet with
+# different agvActions arrives. headerId says nothing about that: an AGV
+# that restarts counts from 0 again.
+
+
+class Violation(NamedTuple):
+    path: str
+    message: str
+
+    def __str__(self):
+        return "%s: %s" % (self.path, self.message)
+
+
+def _is_bool(value: str) -> bool:
+    return value in ("true", "false", "True", "False")
+
+
+def _is_int(value: str) -> bool:
+    try:
+        int(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_float(value: str) -> bool:
+    try:
+        float(value)
+    except ValueError:
+        return False
+    return True
+
+
+def _is_json(kind: type) -> Callable[[str], bool]:
+    def check(value: str) -> bool:
+        try:
+            return isinstance(json.loads(value), kind)
+        except ValueError:
+            return False
+    return check
+
+
+VALUE_CHECKS: Dict[ValueDataType, Callable[[str], bool]] = {
+    ValueDataType.BOOL: _is_bool,
+    ValueDataType.NUMBER: _is_float,
+    ValueDataType.INTEGER: _is_int,
+    ValueDataType.FLOAT: _is_float,
+    ValueDataType.STRING: lambda value: True,
+    ValueDataType.OBJECT: _is_json(dict),
+    ValueDataType.ARRAY: _is_json(list),
+}
+
+
+class CompiledAction(NamedTuple):
+    scopes: FrozenSet[ActionScope]
+    # key -> (valueDataType, value check)
+    parameters: Dict[str, Tuple[ValueDataType, Callable[[str], bool]]]
+    required: FrozenSet[str]
+
+
+class Capabilities:
+
+    def __init__(self, factsheet: FactSheet):
+        self.actions: Dict[str, CompiledAction] = {}
+        for agv_action in factsheet.protocolFeatures.agvActions:
+            parameters = {
+                parameter.key: (parameter.valueDataType, VALUE_CHECKS[parameter.valueDataType])
+                for parameter in agv_action.actionParameters
+            }
+            required = frozenset(
+                parameter.key for parameter in agv_action.actionParameters
+                if not parameter.isOptional
+            )
+            self.actions[agv_action.actionType] = CompiledAction(
+                frozenset(agv_action.actionScopes), parameters, required)
+
+    def supports(self, action_type: str, scope: ActionScope) -> bool:
+        compiled = self.actions.get(action_type)
+        return compiled is not None and scope in compiled.scopes
+
+    def check_action(self, action: Action, scope: ActionScope, path: str,
+                     violations: List[Violation]):
+        compiled = self.actions.get(action.actionType)
+        if compiled is None:
+            violations.append(Violation(path, "unsupported actionType %r" % action.actionType))
+            return
+        if scope not in compiled.scopes:
+            violations.append(Violation(
+                path, "actionType %r not allowed in scope %s" % (action.actionType, scope.value)))
+        seen = set()
+        for i, parameter in enumerate(action.actionParameters):
+            spec = compiled.parameters.get(parameter.key)
+            if spec is None:
+                violations.append(Violation(
+                    "%s.actionParameters[%d]" % (path, i), "unknown key %r" % parameter.key))
+                continue
+            seen.add(parameter.key)
+            value_type, check = spec
+            if not check(parameter.value):
+                violations.append(Violation(
+                    "%s.actionParameters[%d]" % (path, i),
+                    "value %r is not %s" % (parameter.value, value_type.value)))
+        missing = compiled.required - seen
+        if missing:
+            violations.append(Violation(
+                path, "missing parameters %s" % ", ".join(sorted(missing))))
+
+    def check_order(self, order: Order) -> List[Violation]:
+        violations = []
+        for i, node in enumerate(order.nodes):
+            for j, action in enumerate(node.actions):
+                self.check_action(action, ActionScope.NODE,
+                                  "nodes[%d].actions[%d]" % (i, j), violations)
+        for i, edge in enumerate(order.edges):
+            for j, action in enumerate(edge.actions):
+                self.check_action(action, ActionScope.EDGE,
+                                  "edges[%d].actions[%d]" % (i, j), violations)
+        return violations
+
+
+class FactSheetCache(ABC):
+    # Per AGV: the object compiled from its latest factsheet, and a snapshot
+    # of the part of the factsheet it was compiled from. Subclasses define
+    # both
+
+    def __init__(self):
+        self.entries: Dict[Tuple[str, str], Tuple[dict, object]] = {}
+
+    @abstractmethod
+    def section(self, factsheet: FactSheet) -> BaseModel:
+        ...
+
+    @abstractmethod
+    def compile(self, factsheet: FactSheet):
+        ...
+
+    def update(self, factsheet: FactSheet):
+        # Only recompiles if the section differs from the last factsheet's
+        key = (factsheet.manufacturer, factsheet.serialNumber)
+        snapshot = self.section(factsheet).dict()
+        entry = self.entries.get(key)
+        if entry is None or entry[0] != snapshot:
+            entry = self.entries[key] = (snapshot, self.compile(factsheet))
+        return entry[1]
+
+    def invalidate(self, manufacturer: str, serial_number: str):
+        self.entries.pop((manufacturer, serial_number), None)
+
+    def get(self, manufacturer: str, serial_number: str):
+        entry = self.entries.get((manufacturer, serial_number))
+        return entry[1] if entry is not None else None
+
+    def check_order(self, order: Order, *args) -> List[Violation]:
+        compiled = self.get(order.manufacturer, order.serialNumber)
+        if compiled is None:
+            return [Violation("", "no factsheet for %s/%s"
+                              % (order.manufacturer, order.serialNumber))]
+        return compiled.check_order(order, *args)
+
+
+class CapabilityCache(FactSheetCache):
+
+    def section(self, factsheet: FactSheet) -> BaseModel:
+        return factsheet.protocolFeatures
+
+    def compile(self, factsheet: FactSheet) -> Capabilities:
+        return Capabilities(factsheet)
@@ -0,0 +1,124 @@
+import asyncio
+import math
+from typing import Callable, Dict, List, NamedTuple, Optional, Tuple
+
+from .state import AgvPosition, State, Velocity
+from .topics import STATE, VISUALIZATION
+from .visualization import Visualization
+
+# Coalesced fleet positions for dashboards
+#
+# PositionCoalescer keeps only the latest AgvPosition and Velocity per AGV
+# from Visualization and State messages. At a fixed rate it emits one
+# FleetSnapshot with the AGVs that reported since the last one; older
+# frames of the same AGV are dropped. With a deadband, an AGV is only
+# included once it moved more than epsilon or turned more than delta
+# since the pose last emitted for it. A dashboard then receives at most
+# rate snapshots per second, whatever the size of the fleet and the
+# visualizationInterval of its vehicles.
+
+AgvKey = Tuple[str, str]
+
+
+class Pose(NamedTuple):
+    manufacturer: str
+    serialNumber: str
+    mapId: str
+    x: float
+    y: float
+    theta: float
+    vx: Optional[float] = None
+    vy: Optional[float] = None
+    omega: Optional[float] = None
+
+
+class FleetSnapshot(NamedTuple):
+    # Monotonic time of the snapshot and the poses that changed
+    time: float
+    poses: List[Pose]
+
+
+def _angle(a: float, b: float) -> float:
+    # Absolute difference of two angles in [0, pi]
+    return abs((a - b + math.pi) % (2 * math.pi) - math.pi)
+
+
+class PositionCoalescer:
+
+    def __init__(self, rate: float = 1.0, epsilon: Optional[float] = None,
+                 delta: Optional[float] = None):
+        self.interval = 1.0 / rate
+        self.epsilon = epsilon
+        self.delta = delta
+        # Latest pose per AGV since the last snapshot, and the poses emitted
+        self.pending: Dict[AgvKey, Pose] = {}
+        self.emitted: Dict[AgvKey, Pose] = {}
+        self.received = 0
+        self.dropped = 0
+
+    def update(self, manufacturer: str, serial_number: str, position: Optional[AgvPosition],
+               velocity: Optional[Velocity] = None):
+        if position is None:
+            return
+        self.received += 1
+        key = (manufacturer, serial_number)
+        if key in self.pending:
+            self.dropped += 1
+        if velocity is None:
+            self.pending[key] = Pose(manufacturer, serial_number, position.mapId,
+                                     position.x, position.y, position.theta)
+        else:
+            self.pending[key] = Pose(manufacturer, serial_number, position.mapId,
+                                     position.x, position.y, position.theta,
+                                     velocity.vx, velocity.vy, velocity.omega)
+
+    def feed(self, message):
+        # A Message with a State or Visualization payload
+        payload = message.payload
+        if isinstance(payload, (State, Visualization)):
+            self.update(message.manufacturer, message.serialNumber,
+                        payload.agvPosition, payload.velocity)
+
+    def _moved(self, pose: Pose, last: Optional[Pose]) -> bool:
+        if last is None or pose.mapId != last.mapId:
+            return True
+        if self.epsilon is None and self.delta is None:
+            return True
+        if self.epsilon is not None and math.hypot(pose.x - last.x, pose.y - last.y) > self.epsilon:
+            return True
+        return self.delta is not None and _angle(pose.theta, last.theta) > self.delta
+
+    def snapshot(self, now: float = 0.0) -> FleetSnapshot:
+        poses = []
+        emitted = self.emitted
+        for key, pose in self.pending.items():
+            if self._moved(pose, emitted.get(key)):
+                emitted[key] = pose
+                poses.append(pose)
+            else:
+                self.dropped += 1
+        self.pending = {}
+        return FleetSnapshot(now, poses)
+
+    def forget(self, manufacturer: str, serial_number: str):
+        self.pending.pop((manufacturer, serial_number), None)
+        self.emitted.pop((manufacturer, serial_number), None)
+
+    async def consume(self, source, subtopics=(VISUALIZATION, STATE)):
+        # Feeds from a Gateway, LoopbackGateway or HistoryReplay
+        async def pump(subtopic):
+            async for message in source.messages(subtopic):
+                self.feed(message)
+
+        await asyncio.gather(*(pump(subtopic) for subtopic in subtopics))
+
+    async def run(self, sink: Callable[[FleetSnapshot], None]):
+        # Calls sink with a snapshot every interval, skipping empty ones
+        loop = asyncio.get_running_loop()
+        due = loop.time()
+        while True:
+            due += self.interval
+            await asyncio.sleep(max(due - loop.time(), 0.0))
+            snapshot = self.snapshot(loop.time())
+            if snapshot.poses:
+                sink(snapshot)
@@ -0,0 +1,197 @@
+import json
+import zlib
+from datetime import datetime
+from enum import Enum
+from typing import Callable, Dict, Hashable, Optional, Type
+
+from pydantic import BaseModel
+
+from .decoder import LazyState, ModelT, Payload, decode_obj, loads, orjson
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# Wire codecs for VDA5050 models
+#
+# JSON is the protocol's format and always available. MessagePack (with
+# the msgpack package) and zlib/zstd compression (zstd with the zstandard
+# package) are alternatives for links where State and Visualization
+# traffic is the bottleneck. Every codec decodes to the same dict as the
+# JSON form, so a model round-trips to an identical .json().
+#
+# Payloads are self-describing by their first bytes, so decoding never
+# needs to know the codec. CodecNegotiator uses that to answer each AGV in
+# the codec it last sent, unless one is configured for it.
+
+# Corrupt compressed payloads are reported as ValueError, like any other
+# undecodable payload
+_DECOMPRESS_ERRORS = (zlib.error,) if zstandard is None else (zlib.error, zstandard.ZstdError)
+
+
+def _default(value):
+    # Same representation as pydantic's JSON encoder
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError("cannot encode %r" % type(value))
+
+
+_SCALARS = frozenset({str, int, float, bool, type(None)})
+
+
+def to_data(value):
+    # JSON-compatible form of a model, like json.loads(model.json()) but
+    # walking the field dicts directly instead of going through .dict().
+    # Exact type checks first: str enums are str subclasses and must go
+    # through _default()
+    if type(value) in _SCALARS:
+        return value
+    if isinstance(value, BaseModel):
+        if isinstance(value, LazyState):
+            value.materialize()
+        return {name: to_data(item) for name, item in value.__dict__.items()}
+    if isinstance(value, list):
+        return [to_data(item) for item in value]
+    if isinstance(value, dict):
+        return {key: to_data(item) for key, item in value.items()}
+    return _default(value)
+
+
+class Codec:
+
+    def __init__(self, name: str, dumps: Callable[[dict], bytes], loads: Callable[[bytes], dict],
+                 compress: Optional[Callable[[bytes], bytes]] = None,
+                 decompress: Optional[Callable[[bytes], bytes]] = None):
+        self.name = name
+        self._dumps = dumps
+        self._loads = loads
+        self._compress = compress
+        self._decompress = decompress
+
+    def __repr__(self):
+        return "Codec(%r)" % self.name
+
+    def encode(self, model: BaseModel) -> bytes:
+        return self.compress(self._dumps(to_data(model)))
+
+    @property
+    def is_json(self) -> bool:
+        return self.name.split("+")[0] == "json"
+
+    def compress(self, payload: bytes) -> bytes:
+        # The codec's compression, if any, of an already encoded payload
+        if self._compress is not None:
+            payload = self._compress(payload)
+        return payload
+
+    def loads(self, payload: Payload) -> dict:
+        if self._decompress is not None:
+            try:
+                payload = self._decompress(payload)
+            except _DECOMPRESS_ERRORS as error:
+                raise ValueError("corrupt %s payload: %s" % (self.name, error)) from error
+        return self._loads(payload)
+
+    def decode(self, model: Type[ModelT], payload: Payload, validate: bool = True) -> ModelT:
+        return decode_obj(model, self.loads(payload), validate)
+
+
+def dumps(data) -> bytes:
+    # Compact JSON bytes; orjson writes bytes directly without a str copy
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, separators=(",", ":")).encode()
+
+
+def encode(model: BaseModel) -> bytes:
+    # JSON payload of a model, equivalent to model.json().encode()
+    return dumps(to_data(model))
+
+
+CODECS: Dict[str, Codec] = {
+    "json": Codec("json", dumps, loads),
+    "json+zlib": Codec("json+zlib", dumps, loads, zlib.compress, zlib.decompress),
+}
+
+if msgpack is not None:
+    def _msgpack_dumps(data: dict) -> bytes:
+        return msgpack.packb(data)
+
+    def _msgpack_loads(payload: bytes) -> dict:
+        return msgpack.unpackb(payload)
+
+    CODECS["msgpack"] = Codec("msgpack", _msgpack_dumps, _msgpack_loads)
+    CODECS["msgpack+zlib"] = Codec("msgpack+zlib", _msgpack_dumps, _msgpack_loads,
+                                   zlib.compress, zlib.decompress)
+
+if zstandard is not None:
+    _zstd_compressor = zstandard.ZstdCompressor()
+    _zstd_decompressor = zstandard.ZstdDecompressor()
+    CODECS["json+zstd"] = Codec("json+zstd", dumps, loads,
+                                _zstd_compressor.compress, _zstd_decompressor.decompress)
+    if msgpack is not None:
+        CODECS["msgpack+zstd"] = Codec("msgpack+zstd", _msgpack_dumps, _msgpack_loads,
+                                       _zstd_compressor.compress, _zstd_decompressor.decompress)
+
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+
+def detect(payload: Payload) -> Codec:
+    # JSON documents start with "{" (possibly after whitespace), zlib
+    # streams with 0x78, zstd frames with their magic number and
+    # MessagePack maps with 0x80-0x8f, 0xde or 0xdf
+    head = bytes(payload[:64])
+    compressed = None
+    try:
+        if head[:1] == b"\x78":
+            compressed = "zlib"
+            head = zlib.decompressobj().decompress(bytes(payload), 64)
+        elif head[:4] == _ZSTD_MAGIC:
+            compressed = "zstd"
+            if zstandard is not None:
+                head = _zstd_decompressor.stream_reader(bytes(payload)).read(64)
+    except _DECOMPRESS_ERRORS as error:
+        raise ValueError("corrupt %s payload: %s" % (compressed, error)) from error
+    base = "json" if head.lstrip()[:1] == b"{" else "msgpack"
+    name = base if compressed is None else base + "+" + compressed
+    codec = CODECS.get(name)
+    if codec is None:
+        raise ValueError("no codec available for %s payload" % name)
+    return codec
+
+
+class CodecNegotiator:
+
+    def __init__(self, default: str = "json"):
+        self.default = CODECS[default]
+        self.configured: Dict[Hashable, Codec] = {}
+        self.seen: Dict[Hashable, Codec] = {}
+
+    def configure(self, key: Hashable, name: str):
+        self.configured[key] = CODECS[name]
+
+    def codec_for(self, key: Hashable) -> Codec:
+        codec = self.configured.get(key)
+        if codec is None:
+            codec = self.seen.get(key, self.default)
+        return codec
+
+    def encode(self, key: Hashable, model: BaseModel) -> bytes:
+        return self.codec_for(key).encode(model)
+
+    def loads(self, key: Hashable, payload: Payload) -> dict:
+        codec = detect(payload)
+        self.seen[key] = codec
+        return codec.loads(payload)
+
+    def decode(self, key: Hashable, model: Type[ModelT], payload: Payload,
+               validate: bool = True) -> ModelT:
+        return decode_obj(model, self.loads(key, payload), validate)
@@ -0,0 +1,223 @@
+import itertools
+import math
+from typing import Dict, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+
+from .factsheet import FactSheet
+from .order import Order
+from .state import State
+from .trajectory import TrajectoryCache
+
+# Envelope conflict detection along planned paths
+#
+# Each AGV's remaining path (its order's nodes after lastNodeSequenceId,
+# following edge trajectories from the State where there are any) is
+# walked at constant speed in time steps of dt up to a horizon. The AGV's
+# 2D envelope is placed at every step, giving one polygon per time slot.
+#
+# detect() then narrows the candidates in three stages:
+#   1. a spatial hash of each AGV's whole swept bounding box finds pairs
+#      on the same map whose paths can meet at all,
+#   2. per-slot bounding boxes of those pairs are compared vectorized,
+#   3. the separating axis test runs only on slots whose boxes overlap.
+# Envelopes are replaced by their convex hull, which is conservative for
+# non-convex shapes.
+
+
+class Conflict(NamedTuple):
+    serialA: str
+    serialB: str
+    # Seconds from now of the first overlap and the position of A then
+    time: float
+    x: float
+    y: float
+
+
+def convex_hull(points: np.ndarray) -> np.ndarray:
+    # Counter-clockwise hull (Andrew's monotone chain)
+    pts = sorted(set(map(tuple, points)))
+    if len(pts) <= 2:
+        return np.array(pts, dtype=float)
+
+    def half(sequence):
+        chain = []
+        for p in sequence:
+            while len(chain) >= 2 and (
+                    (chain[-1][0] - chain[-2][0]) * (p[1] - chain[-2][1])
+                    - (chain[-1][1] - chain[-2][1]) * (p[0] - chain[-2][0])) <= 0:
+                chain.pop()
+            chain.append(p)
+        return chain
+
+    lower = half(pts)
+    upper = half(reversed(pts))
+    return np.array(lower[:-1] + upper[:-1], dtype=float)
+
+
+def envelope_of(factsheet: FactSheet, envelope_set: Optional[str] = None) -> np.ndarray:
+    for envelope in factsheet.agvGeometry.envelopes2d:
+        if envelope_set is None or envelope.set == envelope_set:
+            return convex_hull(np.array([(p.x, p.y) for p in envelope.polygonPoints]))
+    # Without an envelope, fall back to the vehicle's length and width
+    half_length = factsheet.physicalParameters.length / 2
+    half_width = factsheet.physicalParameters.width / 2
+    return np.array([(-half_length, -half_width), (half_length, -half_width),
+                     (half_length, half_width), (-half_length, half_width)])
+
+
+class SweptPath:
+
+    def __init__(self, serial_number: str, map_id: str, envelope: np.ndarray,
+                 path: np.ndarray, theta: float, speed: float, dt: float, horizon: float):
+        self.serialNumber = serial_number
+        self.mapId = map_id
+        slots = int(horizon / dt) + 1
+        self.times = np.arange(slots) * dt
+        # Arc length positions along the polyline at each time slot
+        segments = np.diff(path, axis=0)
+        lengths = np.hypot(segments[:, 0], segments[:, 1])
+        cumulative = np.concatenate(([0.0], np.cumsum(lengths)))
+        s = np.minimum(self.times * speed, cumulative[-1])
+        x = np.interp(s, cumulative, path[:, 0])
+        y = np.interp(s, cumulative, path[:, 1])
+        if len(lengths):
+            index = np.clip(np.searchsorted(cumulative, s, side="right") - 1, 0, len(lengths) - 1)
+            heading = np.arctan2(segments[index, 1], segments[index, 0])
+            heading[lengths[index] == 0] = theta
+            # Keep the start heading until the AGV actually moves
+            heading[s == 0] = theta
+        else:
+            heading = np.full(slots, theta)
+        self.positions = np.stack([x, y], axis=1)
+        cos, sin = np.cos(heading), np.sin(heading)
+        rotation = np.stack([np.stack([cos, -sin], axis=1), np.stack([sin, cos], axis=1)], axis=1)
+        # (slots, vertices, 2)
+        self.polygons = np.einsum("sij,vj->svi", rotation, envelope) + self.positions[:, None, :]
+        self.boxes = np.concatenate([self.polygons.min(axis=1), self.polygons.max(axis=1)], axis=1)
+        self.bounds = np.concatenate([self.boxes[:, :2].min(axis=0), self.boxes[:, 2:].max(axis=0)])
+
+
+def _separated(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    # Separating axis test for convex polygons over slots: a (S, V, 2),
+    # b (S, W, 2). True where some edge normal separates the polygons
+    edges = np.concatenate([np.roll(a, -1, axis=1) - a, np.roll(b, -1, axis=1) - b], axis=1)
+    normals = np.stack([-edges[..., 1], edges[..., 0]], axis=-1)
+    proj_a = np.einsum("snk,svk->snv", normals, a)
+    proj_b = np.einsum("snk,svk->snv", normals, b)
+    gap = (proj_a.max(axis=2) < proj_b.min(axis=2)) | (proj_b.max(axis=2) < proj_a.min(axis=2))
+    return gap.any(axis=1)
+
+
+def _pad(polygons: np.ndarray, vertices: int) -> np.ndarray:
+    missing = vertices - polygons.shape[1]
+    if not missing:
+        return polygons
+    return np.concatenate([polygons, np.repeat(polygons[:, -1:], missing, axis=1)], axis=1)
+
+
+class ConflictDetector:
+
+    def __init__(self, cell_size: float = 10.0, dt: float = 0.5, horizon: float = 20.0,
+                 default_speed: float = 1.0, trajectories: Optional[TrajectoryCache] = None):
+        self.cell_size = cell_size
+        self.dt = dt
+        self.horizon = horizon
+        self.default_speed = default_speed
+        self.trajectories = trajectories or TrajectoryCache()
+        self.envelopes: Dict[str, np.ndarray] = {}
+        self.speeds: Dict[str, float] = {}
+        self.paths: Dict[str, SweptPath] = {}
+
+    def set_factsheet(self, factsheet: FactSheet, envelope_set: Optional[str] = None):
+        self.envelopes[factsheet.serialNumber] = envelope_of(factsheet, envelope_set)
+        self.speeds[factsheet.serialNumber] = factsheet.physicalParameters.speedMax
+
+    def _path(self, state: State, order: Optional[Order]) -> np.ndarray:
+        position = state.agvPosition
+        points = [(position.x, position.y)]
+        last = state.lastNodeSequenceId
+        if order is not None and order.orderId == state.orderId:
+            nodes = [(node.sequenceId, node.nodePosition) for node in order.nodes]
+        else:
+            nodes = [(node.sequenceId, node.nodePosition) for node in state.nodeStates]
+        trajectories = {edge.sequenceId: edge for edge in state.edgeStates
+                        if edge.trajectory is not None}
+        for sequence_id, node_position in sorted(nodes, key=lambda node: node[0]):
+            if sequence_id <= last or node_position is None:
+                continue
+            if node_position.mapId and node_position.mapId != position.mapId:
+                break
+            edge = trajectories.get(sequence_id - 1)
+            if edge is not None:
+                curve = self.trajectories.get(edge.edgeId, edge.trajectory)
+                points.extend(map(tuple, curve.points(16)))
+            points.append((node_position.x, node_position.y))
+        return np.array(points, dtype=float)
+
+    def update(self, state: State, order: Optional[Order] = None):
+        position = state.agvPosition
+        if position is None:
+            self.paths.pop(state.serialNumber, None)
+            return
+        serial = state.serialNumber
+        envelope = self.envelopes.get(serial)
+        if envelope is None:
+            raise KeyError("no factsheet for %s" % serial)
+        speed = self.speeds.get(serial, self.default_speed)
+        self.paths[serial] = SweptPath(serial, position.mapId, envelope,
+                                       self._path(state, order), position.theta,
+                                       speed, self.dt, self.horizon)
+
+    def remove(self, serial_number: str):
+        self.paths.pop(serial_number, None)
+
+    def candidate_pairs(self) -> Set[Tuple[str, str]]:
+        # Stage 1: spatial hash over the swept bounding box of each path
+        cells: Dict[Tuple[str, int, int], List[str]] = {}
+        size = self.cell_size
+        for serial, path in self.paths.items():
+            x0, y0, x1, y1 = path.bounds
+            for i in range(math.floor(x0 / size), math.floor(x1 / size) + 1):
+                for j in range(math.floor(y0 / size), math.floor(y1 / size) + 1):
+                    cells.setdefault((path.mapId, i, j), []).append(serial)
+        pairs = set()
+        for members in cells.values():
+            if len(members) > 1:
+                pairs.update(itertools.combinations(sorted(members), 2))
+        return pairs
+
+    def detect(self) -> List[Conflict]:
+        pairs = sorted(self.candidate_pairs())
+        if not pairs:
+            return []
+        serials = sorted({serial for pair in pairs for serial in pair})
+        rows = {serial: row for row, serial in enumerate(serials)}
+        paths = [self.paths[serial] for serial in serials]
+        ia = np.array([rows[a] for a, _ in pairs])
+        ib = np.array([rows[b] for _, b in pairs])
+        # Stage 2: per-slot bounding boxes of all candidate pairs at once
+        boxes = np.stack([path.boxes for path in paths])
+        a, b = boxes[ia], boxes[ib]
+        overlap = ((a[..., 0] <= b[..., 2]) & (b[..., 0] <= a[..., 2])
+                   & (a[..., 1] <= b[..., 3]) & (b[..., 1] <= a[..., 3]))
+        pair_index, slot_index = np.nonzero(overlap)
+        if not len(pair_index):
+            return []
+        # Stage 3: separating axis test on the remaining (pair, slot)s.
+        # Polygons are padded to the same vertex count by repeating their
+        # last vertex; the zero-length edges this adds never separate.
+        vertices = max(path.polygons.shape[1] for path in paths)
+        polygons = np.stack([_pad(path.polygons, vertices) for path in paths])
+        hit = ~_separated(polygons[ia[pair_index], slot_index],
+                          polygons[ib[pair_index], slot_index])
+        pair_index, slot_index = pair_index[hit], slot_index[hit]
+        # np.nonzero is row-major, so the first hit per pair is its earliest slot
+        unique, first = np.unique(pair_index, return_index=True)
+        conflicts = []
+        for pair, slot in zip(unique, slot_index[first]):
+            path = paths[ia[pair]]
+            conflicts.append(Conflict(serials[ia[pair]], serials[ib[pair]], float(path.times[slot]),
+                                      float(path.positions[slot, 0]),
+                                      float(path.positions[slot, 1])))
+        return conflicts
@@ -0,0 +1,211 @@
+import json
+from datetime import datetime
+from enum import Enum
+from typing import Type, TypeVar, Union
+
+from pydantic import BaseModel, PrivateAttr, ValidationError
+from pydantic.fields import SHAPE_LIST, SHAPE_SINGLETON
+
+from .state import State
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Decoding of raw MQTT payloads into VDA5050 models
+#
+# Strict mode runs the normal pydantic validation. Trusted mode skips
+# validation and builds the nested models directly from the parsed JSON,
+# which is several times faster. Only use it for sources that are known
+# to send schema-conformant messages.
+#
+# With orjson installed, payloads are parsed straight from bytes,
+# bytearray or memoryview without first decoding them to str.
+#
+# LazyState is for consumers that only read a few State fields, such as
+# agvPosition, batteryState and errors. The scalars and single nested
+# models are decoded up front; the lists (nodeStates, edgeStates,
+# actionStates, ...) are kept as parsed JSON and only turned into models,
+# and validated in strict mode, when they are first accessed. A
+# ValidationError in one of them is therefore raised on that access.
+
+ModelT = TypeVar("ModelT", bound=BaseModel)
+Payload = Union[bytes, bytearray, memoryview, str]
+
+_MISSING = object()
+
+
+def _parse_datetime(value):
+    if isinstance(value, str):
+        # fromisoformat() only understands a trailing "Z" from 3.11 on
+        if value.endswith("Z"):
+            value = value[:-1] + "+00:00"
+        return datetime.fromisoformat(value)
+    return value
+
+
+def _list_of(build):
+    return lambda items: [build(item) for item in items]
+
+
+class _ModelPlan:
+    # Per model class: which converter turns each JSON field into an attribute
+
+    def __init__(self, model: Type[BaseModel]):
+        self.model = model
+        self.converters = []
+        for name, field in model.__fields__.items():
+            type_ = field.type_
+            convert = None
+            if isinstance(type_, type) and issubclass(type_, BaseModel):
+                if field.shape == SHAPE_SINGLETON:
+                    convert = _plan(type_).build
+                elif field.shape == SHAPE_LIST:
+                    convert = _list_of(_plan(type_).build)
+            elif isinstance(type_, type) and issubclass(type_, Enum):
+                if field.shape == SHAPE_SINGLETON:
+                    convert = type_
+            elif type_ is datetime and field.shape == SHAPE_SINGLETON:
+                convert = _parse_datetime
+            self.converters.append((name, field.alias, convert, field))
+
+    def build(self, data: dict) -> BaseModel:
+        # Keep the model's field order so that .json() matches a validated model
+        values = {}
+        fields_set = set()
+        for name, alias, convert, field in self.converters:
+            value = data.get(alias, _MISSING)
+            if value is _MISSING:
+                if not field.required:
+                    values[name] = field.get_default()
+                continue
+            if convert is not None and value is not None:
+                value = convert(value)
+            values[name] = value
+            fields_set.add(name)
+        model = self.model.__new__(self.model)
+        object.__setattr__(model, "__dict__", values)
+        object.__setattr__(model, "__fields_set__", fields_set)
+        model._init_private_attributes()
+        return model
+
+
+_plans = {}
+
+
+def _plan(model: Type[BaseModel]) -> _ModelPlan:
+    plan = _plans.get(model)
+    if plan is None:
+        plan = _plans[model] = _ModelPlan(model)
+    return plan
+
+
+def loads(payload: Payload):
+    if orjson is not None:
+        return orjson.loads(payload)
+    if isinstance(payload, memoryview):
+        payload = payload.tobytes()
+    return json.loads(payload)
+
+
+def decode_obj(model: Type[ModelT], data: dict, validate: bool = True) -> ModelT:
+    if model is LazyState:
+        return lazy_state_from_obj(data, validate)
+    if validate:
+        return model.parse_obj(data)
+    return _plan(model).build(data)
+
+
+def decode(model: Type[ModelT], payload: Payload, validate: bool = True) -> ModelT:
+    return decode_obj(model, loads(payload), validate)
+
+
+def decode_state(payload: Payload, validate: bool = True) -> State:
+    return decode(State, payload, validate)
+
+
+# State fields that LazyState decodes on first access
+LAZY_FIELDS = tuple(name for name, field in State.__fields__.items() if field.shape == SHAPE_LIST)
+
+
+class LazyState(State):
+    # Parsed JSON of the lists not decoded yet, by field name
+    _raw: dict = PrivateAttr(default_factory=dict)
+    _validate: bool = PrivateAttr(default=True)
+
+    def __getattr__(self, name):
+        # Only reached for attributes missing from __dict__
+        if name.startswith("_"):
+            raise AttributeError(name)
+        raw = self._raw
+        if name not in raw:
+            raise AttributeError("%r object has no attribute %r" % (type(self).__name__, name))
+        # The raw list is only dropped once it decoded, so a field that
+        # fails to validate fails again on every access
+        value = self._decode_field(name, raw[name])
+        self.__dict__[name] = value
+        del raw[name]
+        return value
+
+    def __setattr__(self, name, value):
+        self._raw.pop(name, None)
+        super().__setattr__(name, value)
+
+    def _decode_field(self, name: str, value):
+        field = self.__fields__[name]
+        if self._validate:
+            value, errors = field.validate(value, {}, loc=name, cls=State)
+            if errors:
+                raise ValidationError([errors], State)
+            return value
+        if value is None:
+            return None
+        return [_plan(field.type_).build(item) for item in value]
+
+    def materialize(self) -> "LazyState":
+        # Decodes the remaining lists and restores the field order, so the
+        # instance is indistinguishable from a State
+        raw = self._raw
+        if raw:
+            values = self.__dict__
+            for name in list(raw):
+                values[name] = self._decode_field(name, raw[name])
+                del raw[name]
+            object.__setattr__(self, "__dict__", {
+                name: values[name] for name in self.__fields__ if name in values
+            })
+        return self
+
+    def _iter(self, *args, **kwargs):
+        # .dict(), .json(), copy() and == all go through _iter
+        self.materialize()
+        return super()._iter(*args, **kwargs)
+
+    def __repr_args__(self):
+        self.materialize()
+        return super().__repr_args__()
+
+
+def lazy_state_from_obj(data: dict, validate: bool = True) -> LazyState:
+    raw = {name: data[name] for name in LAZY_FIELDS if data.get(name) is not None}
+    if validate:
+        # Present lists are validated on access; an empty one stands in
+        # so that the required fields still pass
+        eager = dict(data)
+        eager.update((name, []) for name in raw)
+        state = LazyState.parse_obj(eager)
+    else:
+        eager = {name: value for name, value in data.items() if name not in raw}
+        state = _plan(LazyState).build(eager)
+        state.__fields_set__.update(raw)
+    values = state.__dict__
+    for name in raw:
+        values.pop(name, None)
+    state._raw = raw
+    state._validate = validate
+    return state
+
+
+def decode_lazy_state(payload: Payload, validate: bool = True) -> LazyState:
+    return lazy_state_from_obj(loads(payload), validate)
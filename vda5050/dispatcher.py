@@ -0,0 +1,121 @@
+import asyncio
+import heapq
+import itertools
+import time
+from collections import deque
+from typing import Deque, Dict, List, Optional, Tuple
+
+from .factsheet import FactSheet
+from .gateway import Gateway
+from .order import Order
+from .order_encoder import OrderEncoder
+from .topics import ORDER
+
+# Order dispatch for a whole fleet over one MQTT client
+#
+# Orders are queued per AGV and published no faster than the AGV's
+# ProtocolLimits.timing.minOrderInterval. A queued update of an order that
+# has not been sent yet is replaced by a newer orderUpdateId of the same
+# orderId, so superseded updates are never serialized or sent. Publishing
+# uses QoS 1 without waiting for each PUBACK, so paho keeps up to
+# max_inflight orders in flight at once. With an OrderEncoder, updates
+# reuse the JSON of nodes and edges already sent.
+
+AgvKey = Tuple[str, str]
+
+
+def agv_key(manufacturer: str, serial_number: str) -> AgvKey:
+    return (manufacturer, serial_number)
+
+
+class OrderDispatcher:
+
+    def __init__(self, gateway: Gateway, qos: int = 1, default_interval: float = 0.0,
+                 max_inflight: int = 100, encoder: Optional[OrderEncoder] = None):
+        self.gateway = gateway
+        self.qos = qos
+        self.default_interval = default_interval
+        self.pending: Dict[AgvKey, Deque[Order]] = {}
+        self.intervals: Dict[AgvKey, float] = {}
+        self.last_sent: Dict[AgvKey, float] = {}
+        self.encoder = encoder
+        self.sent = 0
+        self.coalesced = 0
+        self._heap: List[Tuple[float, int, AgvKey]] = []
+        self._scheduled = set()
+        self._counter = itertools.count()
+        self._wakeup = asyncio.Event()
+        gateway.client.max_inflight_messages_set(max_inflight)
+
+    def set_factsheet(self, factsheet: FactSheet):
+        key = agv_key(factsheet.manufacturer, factsheet.serialNumber)
+        self.intervals[key] = factsheet.protocolLimits.timing.minOrderInterval
+
+    def submit(self, order: Order):
+        key = agv_key(order.manufacturer, order.serialNumber)
+        queue = self.pending.get(key)
+        if queue is None:
+            queue = self.pending[key] = deque()
+        for i, queued in enumerate(queue):
+            if queued.orderId == order.orderId:
+                if order.orderUpdateId >= queued.orderUpdateId:
+                    queue[i] = order
+                self.coalesced += 1
+                return
+        queue.append(order)
+        self._schedule(key)
+
+    def cancel(self, manufacturer: str, serial_number: str) -> int:
+        # Drops the orders of an AGV that have not been sent yet, e.g. along
+        # with a cancelOrder instant action. Returns how many were dropped
+        queue = self.pending.pop(agv_key(manufacturer, serial_number), None)
+        return len(queue) if queue else 0
+
+    def pending_count(self) -> int:
+        return sum(len(queue) for queue in self.pending.values())
+
+    def _schedule(self, key: AgvKey):
+        if key in self._scheduled:
+            return
+        interval = self.intervals.get(key, self.default_interval)
+        due = self.last_sent.get(key, float("-inf")) + interval
+        heapq.heappush(self._heap, (due, next(self._counter), key))
+        self._scheduled.add(key)
+        self._wakeup.set()
+
+    def _send_due(self, now: float) -> Optional[float]:
+        # Publishes every AGV's next order that is due and returns the
+        # time of the next due order, if any
+        heap = self._heap
+        while heap and heap[0][0] <= now:
+            _, _, key = heapq.heappop(heap)
+            self._scheduled.discard(key)
+            queue = self.pending.get(key)
+            if queue is None:
+                # Cancelled while scheduled
+                continue
+            order = queue.popleft()
+            # Either way in the codec the gateway negotiated for the AGV
+            payload = order
+            if self.encoder is not None:
+                codecs = self.gateway.codecs
+                codec = codecs.codec_for(key) if codecs is not None else None
+                payload = self.encoder.encode(order, codec)
+            self.gateway.publish(order.manufacturer, order.serialNumber, ORDER, payload, self.qos)
+            self.sent += 1
+            self.last_sent[key] = now
+            if queue:
+                self._schedule(key)
+            else:
+                del self.pending[key]
+        return heap[0][0] if heap else None
+
+    async def run(self):
+        while True:
+            self._wakeup.clear()
+            due = self._send_due(time.monotonic())
+            timeout = None if due is None else max(due - time.monotonic(), 0.0)
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,130 @@
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from .state import EStopType, OperatingMode, State
+
+# Columnar fleet state store
+#
+# One row per AGV (keyed by serialNumber) and one NumPy array per hot
+# scalar field of State. Rows are updated in place from each incoming
+# State, so fleet-wide queries are vectorized filters over the columns:
+#
+#     on_map = table.mapId == table.map_code("M")
+#     serials = table.serials_where(on_map & (table.batteryCharge < 20) & ~table.driving)
+#
+# Enum fields are stored as small integer codes, mapIds as indexes into
+# table.map_ids. AGVs without an agvPosition have NaN coordinates and
+# mapId -1.
+
+OPERATING_MODES = list(OperatingMode)
+E_STOP_TYPES = list(EStopType)
+
+_OPERATING_MODE_CODES = {mode: code for code, mode in enumerate(OPERATING_MODES)}
+_E_STOP_CODES = {e_stop: code for code, e_stop in enumerate(E_STOP_TYPES)}
+
+COLUMNS = {
+    "x": np.float64,
+    "y": np.float64,
+    "theta": np.float64,
+    "mapId": np.int32,
+    "batteryCharge": np.float64,
+    "driving": np.bool_,
+    "operatingMode": np.int8,
+    "eStop": np.int8,
+    "lastNodeSequenceId": np.int64,
+}
+
+
+class FleetTable:
+
+    def __init__(self, capacity: int = 1024):
+        self.size = 0
+        self.serials: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.map_ids: List[str] = []
+        self._map_codes: Dict[str, int] = {}
+        self._columns = {name: np.zeros(capacity, dtype) for name, dtype in COLUMNS.items()}
+
+    def __len__(self):
+        return self.size
+
+    def __contains__(self, serial_number: str):
+        return serial_number in self.rows
+
+    def __getattr__(self, name):
+        # Columns are exposed as views over the used rows
+        columns = self.__dict__.get("_columns")
+        if columns is None or name not in columns:
+            raise AttributeError(name)
+        return columns[name][:self.size]
+
+    def map_code(self, map_id: str) -> int:
+        # -2 never matches a row (-1 is "no position"), so unknown maps give
+        # empty query results
+        return self._map_codes.get(map_id, -2)
+
+    def _intern_map(self, map_id: str) -> int:
+        code = self._map_codes.get(map_id)
+        if code is None:
+            code = self._map_codes[map_id] = len(self.map_ids)
+            self.map_ids.append(map_id)
+        return code
+
+    def _row(self, serial_number: str) -> int:
+        row = self.rows.get(serial_number)
+        if row is None:
+            row = self.size
+            capacity = len(self._columns["x"])
+            if row == capacity:
+                # capacity=0 is allowed and grows like capacity=1
+                for name, column in self._columns.items():
+                    grown = np.zeros(max(2 * capacity, 1), column.dtype)
+                    grown[:capacity] = column
+                    self._columns[name] = grown
+            self.rows[serial_number] = row
+            self.serials.append(serial_number)
+            self.size += 1
+        return row
+
+    def update(self, state: State) -> int:
+        row = self._row(state.serialNumber)
+        columns = self._columns
+        position = state.agvPosition
+        if position is not None:
+            columns["x"][row] = position.x
+            columns["y"][row] = position.y
+            columns["theta"][row] = position.theta
+            columns["mapId"][row] = self._intern_map(position.mapId)
+        else:
+            columns["x"][row] = np.nan
+            columns["y"][row] = np.nan
+            columns["theta"][row] = np.nan
+            columns["mapId"][row] = -1
+        columns["batteryCharge"][row] = state.batteryState.batteryCharge
+        columns["driving"][row] = state.driving
+        columns["operatingMode"][row] = _OPERATING_MODE_CODES[state.operatingMode]
+        columns["eStop"][row] = _E_STOP_CODES[state.safetyState.eStop]
+        columns["lastNodeSequenceId"][row] = state.lastNodeSequenceId
+        return row
+
+    def serials_where(self, mask: np.ndarray) -> List[str]:
+        serials = self.serials
+        return [serials[row] for row in np.flatnonzero(mask)]
+
+    def row(self, serial_number: str) -> Optional[dict]:
+        row = self.rows.get(serial_number)
+        if row is None:
+            return None
+        values = {name: column[row].item() for name, column in self._columns.items()}
+        code = values["mapId"]
+        values["mapId"] = self.map_ids[code] if code >= 0 else None
+        values["operatingMode"] = OPERATING_MODES[values["operatingMode"]]
+        values["eStop"] = E_STOP_TYPES[values["eStop"]]
+        return values
+
+    def operating_mode_code(self, mode: OperatingMode) -> int:
+        return _OPERATING_MODE_CODES[OperatingMode(mode)]
+
+    def e_stop_code(self, e_stop: EStopType) -> int:
+        return _E_STOP_CODES[EStopType(e_stop)]
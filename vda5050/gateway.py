@@ -0,0 +1,318 @@
+import asyncio
+import logging
+import threading
+from collections import deque
+from typing import Deque, Dict, Iterable, NamedTuple, Optional, Tuple, Type, Union
+
+import paho.mqtt.client as mqtt_client
+from pydantic import BaseModel
+
+from .codec import CodecNegotiator, encode
+from .decoder import LazyState, Payload, decode, loads
+from .factsheet import FactSheet
+from .instant_actions import InstantActions
+from .order import Order
+from .state import State
+from .topics import (CONNECTION, FACTSHEET, INSTANT_ACTIONS, ORDER, STATE, VISUALIZATION,
+                     INTERFACE_NAME, MAJOR_VERSION, parse_topic, subscription_for,
+                     topic_for)
+from .visualization import Visualization
+
+# Asyncio MQTT gateway for a whole fleet
+#
+# One paho client is driven by the asyncio event loop (socket readers and
+# writers instead of a network thread). Incoming messages are decoded into
+# their models and put on one bounded queue per subtopic. When a queue is
+# full the gateway stops reading from the socket until a consumer catches
+# up, so a slow consumer pushes back on the broker instead of growing
+# memory. The few messages paho still hands over from the packets it has
+# already read wait in a small overflow buffer.
+#
+# Connecting runs in an executor since paho's connect() blocks. After an
+# unexpected disconnect the gateway reconnects with exponential backoff
+# and renews its subscriptions; consumers just wait for the next message.
+
+log = logging.getLogger(__name__)
+
+MODELS = {
+    ORDER: Order,
+    INSTANT_ACTIONS: InstantActions,
+    STATE: State,
+    VISUALIZATION: Visualization,
+    FACTSHEET: FactSheet,
+}
+
+DEFAULT_SUBTOPICS = (STATE, CONNECTION, FACTSHEET, VISUALIZATION)
+
+
+class Message(NamedTuple):
+    manufacturer: str
+    serialNumber: str
+    subtopic: str
+    # Model instance for subtopics in MODELS, parsed JSON dict otherwise
+    payload: Union[BaseModel, dict]
+
+
+def decode_message(manufacturer: str, serial_number: str, subtopic: str, payload: Payload,
+                   model: Optional[Type[BaseModel]], validate: bool,
+                   codecs: Optional[CodecNegotiator]) -> Optional[Message]:
+    # Decodes an incoming payload into model, or into parsed JSON without
+    # one. Gateway, Router and LoopbackGateway all drop and log a payload
+    # that fails to decode, whatever the error: trusted decoding of JSON
+    # that is not an object raises AttributeError or TypeError, and nothing
+    # may escape into paho's network loop or a publisher
+    try:
+        if codecs is not None:
+            key = (manufacturer, serial_number)
+            if model is not None:
+                data = codecs.decode(key, model, payload, validate)
+            else:
+                data = codecs.loads(key, payload)
+        elif model is not None:
+            data = decode(model, payload, validate)
+        else:
+            data = loads(payload)
+    except Exception:
+        log.warning("Dropping undecodable message on %s/%s/%s", manufacturer, serial_number,
+                    subtopic, exc_info=True)
+        return None
+    return Message(manufacturer, serial_number, subtopic, data)
+
+
+class Gateway:
+
+    def __init__(self, host: str, port: int = 1883, keepalive: int = 60,
+                 subtopics: Iterable[str] = DEFAULT_SUBTOPICS, queue_size: int = 1000,
+                 validate: bool = True, client_id: str = "",
+                 interface: str = INTERFACE_NAME, version: str = MAJOR_VERSION,
+                 codecs: Optional[CodecNegotiator] = None, lazy_states: bool = False,
+                 reconnect_delay: Tuple[float, float] = (0.5, 30.0)):
+        self.host = host
+        self.port = port
+        self.keepalive = keepalive
+        self.validate = validate
+        self.interface = interface
+        self.version = version
+        # Without a negotiator everything is plain JSON
+        self.codecs = codecs
+        # LazyState for consumers that only read a few State fields
+        self.models = {**MODELS, STATE: LazyState} if lazy_states else MODELS
+        self.queues: Dict[str, asyncio.Queue] = {
+            subtopic: asyncio.Queue(queue_size) for subtopic in subtopics
+        }
+        # Messages that arrived while their queue was full
+        self._overflow: Dict[str, Deque[Message]] = {subtopic: deque() for subtopic in self.queues}
+        # Minimum and maximum delay between reconnect attempts
+        self.reconnect_delay = reconnect_delay
+        self.reconnects = 0
+        self.client = mqtt_client.Client(client_id)
+        self.client.on_connect = self._on_connect
+        self.client.on_disconnect = self._on_disconnect
+        self.client.on_message = self._on_message
+        self.client.on_socket_open = self._on_socket_open
+        self.client.on_socket_close = self._on_socket_close
+        self.client.on_socket_register_write = self._on_socket_register_write
+        self.client.on_socket_unregister_write = self._on_socket_unregister_write
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._loop_thread: Optional[int] = None
+        self._sock = None
+        self._reading = False
+        self._misc: Optional[asyncio.Task] = None
+        self._connected: Optional[asyncio.Future] = None
+        self._disconnected: Optional[asyncio.Future] = None
+        self._closing = False
+        # Reconnects only happen after a first successful connect()
+        self._established = False
+        self._reconnect: Optional[asyncio.Task] = None
+
+    # Connection handling
+
+    async def connect(self):
+        self._loop = asyncio.get_running_loop()
+        self._loop_thread = threading.get_ident()
+        self._connected = self._loop.create_future()
+        self._disconnected = self._loop.create_future()
+        self._closing = False
+        self._established = False
+        await self._loop.run_in_executor(None, self.client.connect, self.host, self.port,
+                                         self.keepalive)
+        await self._connected
+
+    async def disconnect(self):
+        self._closing = True
+        if self._reconnect is not None:
+            self._reconnect.cancel()
+            self._reconnect = None
+        if self.client.disconnect() == mqtt_client.MQTT_ERR_SUCCESS:
+            await self._disconnected
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    def _on_connect(self, client, userdata, flags, rc):
+        if rc != 0:
+            error = ConnectionError(mqtt_client.connack_string(rc))
+            if not self._connected.done():
+                self._connected.set_exception(error)
+            else:
+                log.warning("Reconnect to %s:%d refused: %s", self.host, self.port, error)
+            return
+        # Subscribe here so the subscriptions are renewed on every reconnect.
+        # A gateway without subtopics only publishes
+        if self.queues:
+            client.subscribe([
+                (subscription_for(subtopic, self.interface, self.version), 0)
+                for subtopic in self.queues
+            ])
+        self._established = True
+        if not self._connected.done():
+            self._connected.set_result(True)
+
+    def _on_disconnect(self, client, userdata, rc):
+        if self._closing or not self._established:
+            # Also after a refused CONNACK, which already failed connect()
+            if not self._connected.done():
+                self._connected.set_exception(ConnectionError(
+                    "connection to %s:%d closed before CONNACK (%s)"
+                    % (self.host, self.port, mqtt_client.error_string(rc))))
+            if not self._disconnected.done():
+                self._disconnected.set_result(rc)
+            return
+        log.warning("Lost connection to %s:%d (%s), reconnecting", self.host, self.port,
+                    mqtt_client.error_string(rc))
+        self._in_loop(self._start_reconnect)
+
+    def _start_reconnect(self):
+        if self._reconnect is None and not self._closing:
+            self._reconnect = self._loop.create_task(self._reconnect_loop())
+
+    async def _reconnect_loop(self):
+        delay, max_delay = self.reconnect_delay
+        try:
+            while not self._closing:
+                await asyncio.sleep(delay)
+                try:
+                    await self._loop.run_in_executor(None, self.client.reconnect)
+                except OSError as error:
+                    log.warning("Reconnect to %s:%d failed: %s", self.host, self.port, error)
+                    delay = min(delay * 2, max_delay)
+                    continue
+                self.reconnects += 1
+                return
+        finally:
+            self._reconnect = None
+
+    # Event loop integration, see paho's loop_asyncio example. During
+    # connect() and reconnects paho calls back from the executor thread
+
+    def _in_loop(self, callback, *args):
+        if threading.get_ident() == self._loop_thread:
+            callback(*args)
+        else:
+            self._loop.call_soon_threadsafe(callback, *args)
+
+    def _on_socket_open(self, client, userdata, sock):
+        self._in_loop(self._socket_opened, sock)
+
+    def _socket_opened(self, sock):
+        self._sock = sock
+        self._resume_reading()
+        self._misc = self._loop.create_task(self._misc_loop())
+
+    def _on_socket_close(self, client, userdata, sock):
+        self._in_loop(self._socket_closed, sock)
+
+    def _socket_closed(self, sock):
+        if self._sock is not sock:
+            return
+        self._pause_reading()
+        self._sock = None
+        if self._misc is not None:
+            self._misc.cancel()
+            self._misc = None
+
+    def _on_socket_register_write(self, client, userdata, sock):
+        self._in_loop(self._register_write, sock)
+
+    def _register_write(self, sock):
+        if sock is self._sock:
+            self._loop.add_writer(sock, self.client.loop_write)
+
+    def _on_socket_unregister_write(self, client, userdata, sock):
+        self._in_loop(self._loop.remove_writer, sock)
+
+    def _pause_reading(self):
+        if self._reading:
+            self._loop.remove_reader(self._sock)
+            self._reading = False
+
+    def _resume_reading(self):
+        if not self._reading and self._sock is not None:
+            self._loop.add_reader(self._sock, self.client.loop_read)
+            self._reading = True
+
+    async def _misc_loop(self):
+        while self.client.loop_misc() == mqtt_client.MQTT_ERR_SUCCESS:
+            await asyncio.sleep(1)
+
+    # Incoming messages
+
+    def _on_message(self, client, userdata, msg):
+        topic = parse_topic(msg.topic)
+        if topic is None:
+            return
+        queue = self.queues.get(topic.subtopic)
+        if queue is None:
+            return
+        message = decode_message(topic.manufacturer, topic.serialNumber, topic.subtopic,
+                                 msg.payload, self.models.get(topic.subtopic), self.validate,
+                                 self.codecs)
+        if message is None:
+            return
+        # One loop_read() call can hand over several messages, so the queue
+        # may already be full before reading pauses
+        if queue.full():
+            self._overflow[topic.subtopic].append(message)
+        else:
+            queue.put_nowait(message)
+        if queue.full():
+            self._pause_reading()
+
+    async def get(self, subtopic: str = STATE) -> Message:
+        queue = self.queues[subtopic]
+        message = await queue.get()
+        overflow = self._overflow[subtopic]
+        while overflow and not queue.full():
+            queue.put_nowait(overflow.popleft())
+        if not self._reading and not any(queue.full() for queue in self.queues.values()):
+            self._resume_reading()
+        return message
+
+    async def messages(self, subtopic: str = STATE):
+        while True:
+            yield await self.get(subtopic)
+
+    # Outgoing messages
+
+    def publish(self, manufacturer: str, serial_number: str, subtopic: str,
+                payload: Union[BaseModel, bytes, str], qos: int = 0,
+                retain: bool = False) -> mqtt_client.MQTTMessageInfo:
+        if isinstance(payload, BaseModel):
+            if self.codecs is not None:
+                payload = self.codecs.encode((manufacturer, serial_number), payload)
+            else:
+                payload = encode(payload)
+        topic = topic_for(manufacturer, serial_number, subtopic, self.interface, self.version)
+        return self.client.publish(topic, payload, qos, retain)
+
+    def publish_order(self, order: Order, qos: int = 0) -> mqtt_client.MQTTMessageInfo:
+        return self.publish(order.manufacturer, order.serialNumber, ORDER, order, qos)
+
+    def publish_instant_actions(self, instant_actions: InstantActions,
+                                qos: int = 0) -> mqtt_client.MQTTMessageInfo:
+        return self.publish(instant_actions.manufacturer, instant_actions.serialNumber,
+                            INSTANT_ACTIONS, instant_actions, qos)
@@ -0,0 +1,456 @@
+import asyncio
+import json
+import math
+import os
+import time
+import zlib
+from datetime import datetime, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+from .codec import to_data
+from .decoder import decode
+from .gateway import Message
+from .state import (AgvPosition, BatteryState, EStopType, Error, OperatingMode, SafetyState,
+                    State)
+from .topics import STATE
+
+# Columnar, memory-mapped State history
+#
+# HistoryRecorder appends the fields of each State that matter for
+# post-incident analysis (position, battery, mode, errors) as one column
+# file per field. Recording is split into segments of segment_seconds of
+# receive time, one directory each, so old telemetry can be archived or
+# deleted a segment at a time. Rows within a segment are in time order.
+#
+# A segment's meta.json holds its time range, row count and the AGV and
+# mapId tables the integer code columns refer to; it is rewritten after
+# every flush, so readers only ever see complete rows. A recorder that
+# restarts within a segment's time range continues that segment from its
+# meta.json. When a segment is closed it also gets a serial index: the
+# rows sorted by AGV, with the offset of each AGV's slice. HistoryReader
+# memory-maps the columns and answers "AGV X between t1 and t2" with a
+# binary search on that slice.
+#
+# Errors go to an errors.jsonl side file, and with keep_payloads the raw
+# payload is kept zlib-compressed in payloads.bin, so replay can return
+# the original State rather than one rebuilt from the columns.
+
+COLUMNS = {
+    "time": "<f8",
+    "agv": "<i4",
+    "headerId": "<i8",
+    "mapId": "<i4",
+    "x": "<f8",
+    "y": "<f8",
+    "theta": "<f8",
+    "batteryCharge": "<f8",
+    "charging": "?",
+    "driving": "?",
+    "operatingMode": "<i1",
+    "eStop": "<i1",
+    "lastNodeSequenceId": "<i8",
+    "errors": "<i2",
+    "payloadOffset": "<i8",
+    "payloadLength": "<i4",
+}
+
+OPERATING_MODES = list(OperatingMode)
+E_STOP_TYPES = list(EStopType)
+
+_OPERATING_MODE_CODES = {mode: code for code, mode in enumerate(OPERATING_MODES)}
+_E_STOP_CODES = {e_stop: code for code, e_stop in enumerate(E_STOP_TYPES)}
+
+AgvKey = Tuple[str, str]
+
+
+def _write_json(path: str, data):
+    # Replace atomically, readers must never see a half written file
+    partial = path + ".tmp"
+    with open(partial, "w") as f:
+        json.dump(data, f)
+    os.replace(partial, path)
+
+
+class _SegmentWriter:
+
+    def __init__(self, path: str, start: float):
+        self.path = path
+        self.start = start
+        self.end = start
+        self.rows = 0
+        self.agvs: Dict[AgvKey, int] = {}
+        self.maps: Dict[str, int] = {}
+        self.buffers: Dict[str, list] = {name: [] for name in COLUMNS}
+        self.errors: List[str] = []
+        self.payloads: List[bytes] = []
+        self.payload_size = 0
+        os.makedirs(path, exist_ok=True)
+        if os.path.exists(os.path.join(path, "meta.json")):
+            self._reopen()
+
+    def _reopen(self):
+        # Continue a segment written before a restart with its row count and
+        # code tables. Anything written after its last meta.json, i.e. by a
+        # flush that did not complete, is dropped
+        with open(os.path.join(self.path, "meta.json")) as f:
+            meta = json.load(f)
+        self.start = meta["start"]
+        self.end = meta["end"]
+        self.rows = meta["rows"]
+        self.agvs = {tuple(agv): code for code, agv in enumerate(meta["agvs"])}
+        self.maps = {map_id: code for code, map_id in enumerate(meta["maps"])}
+        for name, dtype in COLUMNS.items():
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                os.truncate(path, self.rows * np.dtype(dtype).itemsize)
+        path = os.path.join(self.path, "errors.jsonl")
+        if os.path.exists(path):
+            with open(path) as f:
+                lines = [line for line in f if json.loads(line)[0] < self.rows]
+            with open(path, "w") as f:
+                f.writelines(lines)
+        if self.rows:
+            offsets = np.fromfile(os.path.join(self.path, "payloadOffset"), dtype="<i8")
+            lengths = np.fromfile(os.path.join(self.path, "payloadLength"), dtype="<i4")
+            self.payload_size = int((offsets + lengths).max())
+        path = os.path.join(self.path, "payloads.bin")
+        if os.path.exists(path):
+            os.truncate(path, self.payload_size)
+        # The serial index is rebuilt when the segment is sealed again
+        self._write_meta(sealed=False)
+        for name in ("index_rows", "index_offsets"):
+            path = os.path.join(self.path, name)
+            if os.path.exists(path):
+                os.remove(path)
+
+    def append(self, t: float, state: State, payload: Optional[bytes]):
+        key = (state.manufacturer, state.serialNumber)
+        agv = self.agvs.get(key)
+        if agv is None:
+            agv = self.agvs[key] = len(self.agvs)
+        position = state.agvPosition
+        if position is not None:
+            map_id = self.maps.get(position.mapId)
+            if map_id is None:
+                map_id = self.maps[position.mapId] = len(self.maps)
+            x, y, theta = position.x, position.y, position.theta
+        else:
+            map_id = -1
+            x = y = theta = math.nan
+        row = self.rows + len(self.buffers["time"])
+        if state.errors:
+            self.errors.append(json.dumps([row, to_data(state.errors)]))
+        offset = length = 0
+        if payload is not None:
+            compressed = zlib.compress(payload)
+            offset, length = self.payload_size, len(compressed)
+            self.payloads.append(compressed)
+            self.payload_size += length
+        battery = state.batteryState
+        values = (t, agv, state.headerId, map_id, x, y, theta, battery.batteryCharge,
+                  battery.charging, state.driving, _OPERATING_MODE_CODES[state.operatingMode],
+                  _E_STOP_CODES[state.safetyState.eStop], state.lastNodeSequenceId,
+                  len(state.errors), offset, length)
+        for buffer, value in zip(self.buffers.values(), values):
+            buffer.append(value)
+        self.end = t
+
+    def pending(self) -> int:
+        return len(self.buffers["time"])
+
+    def flush(self, sealed: bool = False):
+        added = self.pending()
+        for name, dtype in COLUMNS.items():
+            buffer = self.buffers[name]
+            if buffer:
+                with open(os.path.join(self.path, name), "ab") as f:
+                    f.write(np.array(buffer, dtype=dtype).tobytes())
+                buffer.clear()
+        if self.errors:
+            with open(os.path.join(self.path, "errors.jsonl"), "a") as f:
+                f.write("\n".join(self.errors) + "\n")
+            self.errors.clear()
+        if self.payloads:
+            with open(os.path.join(self.path, "payloads.bin"), "ab") as f:
+                f.writelines(self.payloads)
+            self.payloads.clear()
+        self.rows += added
+        if sealed and self.rows:
+            # Serial index: row numbers grouped by AGV, each group in time order
+            agv = np.fromfile(os.path.join(self.path, "agv"), dtype=COLUMNS["agv"])
+            rows = np.argsort(agv, kind="stable").astype("<i8")
+            offsets = np.searchsorted(agv[rows], np.arange(len(self.agvs) + 1)).astype("<i8")
+            rows.tofile(os.path.join(self.path, "index_rows"))
+            offsets.tofile(os.path.join(self.path, "index_offsets"))
+        self._write_meta(sealed)
+
+    def _write_meta(self, sealed: bool):
+        _write_json(os.path.join(self.path, "meta.json"), {
+            "start": self.start,
+            "end": self.end,
+            "rows": self.rows,
+            "agvs": list(self.agvs),
+            "maps": list(self.maps),
+            "sealed": sealed,
+        })
+
+
+class HistoryRecorder:
+
+    def __init__(self, path: str, segment_seconds: float = 3600.0, flush_rows: int = 4096,
+                 keep_payloads: bool = False):
+        self.path = path
+        self.segment_seconds = segment_seconds
+        self.flush_rows = flush_rows
+        self.keep_payloads = keep_payloads
+        self.segment: Optional[_SegmentWriter] = None
+        self._last_time = -math.inf
+        os.makedirs(path, exist_ok=True)
+
+    def record(self, state: State, payload: Optional[bytes] = None, t: Optional[float] = None):
+        # t is the receive time, time.time() by default. Rows must be in
+        # time order, so a t earlier than the previous one is clamped
+        t = max(time.time() if t is None else t, self._last_time)
+        self._last_time = t
+        segment = self.segment
+        if segment is None or t >= segment.start + self.segment_seconds:
+            self._seal()
+            start = math.floor(t / self.segment_seconds) * self.segment_seconds
+            name = "segment-%015.3f" % start
+            segment = self.segment = _SegmentWriter(os.path.join(self.path, name), start)
+            # A reopened segment may already have later rows
+            t = self._last_time = max(t, segment.end)
+        segment.append(t, state, payload if self.keep_payloads else None)
+        if segment.pending() >= self.flush_rows:
+            segment.flush()
+
+    def flush(self):
+        if self.segment is not None:
+            self.segment.flush()
+
+    def _seal(self):
+        if self.segment is not None:
+            self.segment.flush(sealed=True)
+            self.segment = None
+
+    def close(self):
+        self._seal()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+class _Segment:
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(os.path.join(path, "meta.json")) as f:
+            meta = json.load(f)
+        self.start = meta["start"]
+        self.end = meta["end"]
+        self.rows = meta["rows"]
+        self.agvs = [tuple(agv) for agv in meta["agvs"]]
+        self.maps = meta["maps"]
+        self.sealed = meta["sealed"]
+        self.columns = {
+            name: np.memmap(os.path.join(path, name), dtype=dtype, mode="r", shape=(self.rows,))
+            for name, dtype in COLUMNS.items()
+        } if self.rows else {}
+        if self.sealed and self.rows:
+            self.index_rows = np.fromfile(os.path.join(path, "index_rows"), dtype="<i8")
+            self.index_offsets = np.fromfile(os.path.join(path, "index_offsets"), dtype="<i8")
+
+    def select(self, codes: Optional[List[int]], start: float, end: float) -> np.ndarray:
+        # Row numbers with start <= time < end, of the given AGV codes or all
+        times = self.columns["time"]
+        if codes is None:
+            lo, hi = np.searchsorted(times, [start, end])
+            return np.arange(lo, hi)
+        if self.sealed:
+            parts = []
+            for code in codes:
+                rows = self.index_rows[self.index_offsets[code]:self.index_offsets[code + 1]]
+                lo, hi = np.searchsorted(times[rows], [start, end])
+                parts.append(rows[lo:hi])
+            return np.sort(np.concatenate(parts)) if len(parts) > 1 else parts[0]
+        # Not indexed yet: time range first, then a scan of the AGV column
+        lo, hi = np.searchsorted(times, [start, end])
+        return lo + np.nonzero(np.isin(self.columns["agv"][lo:hi], codes))[0]
+
+    def errors(self) -> Dict[int, list]:
+        path = os.path.join(self.path, "errors.jsonl")
+        if not os.path.exists(path):
+            return {}
+        with open(path) as f:
+            return {row: errors for row, errors in map(json.loads, f)}
+
+    def payload(self, row: int) -> Optional[bytes]:
+        length = int(self.columns["payloadLength"][row])
+        if not length:
+            return None
+        with open(os.path.join(self.path, "payloads.bin"), "rb") as f:
+            f.seek(int(self.columns["payloadOffset"][row]))
+            return zlib.decompress(f.read(length))
+
+
+class HistoryReader:
+
+    def __init__(self, path: str):
+        self.path = path
+        # Sealed segments only change again if a recorder reopens them,
+        # which rewrites meta.json
+        self.sealed: Dict[str, Tuple[int, _Segment]] = {}
+
+    def segments(self, start: float = -math.inf, end: float = math.inf) -> List[_Segment]:
+        # Segments overlapping [start, end), oldest first. Open segments are
+        # reloaded on every call, so a reader follows a recorder that is
+        # still writing
+        segments = []
+        for name in sorted(os.listdir(self.path)):
+            meta = os.path.join(self.path, name, "meta.json")
+            if not name.startswith("segment-"):
+                continue
+            try:
+                modified = os.stat(meta).st_mtime_ns
+            except FileNotFoundError:
+                continue
+            cached = self.sealed.get(name)
+            if cached is not None and cached[0] == modified:
+                segment = cached[1]
+            else:
+                segment = _Segment(os.path.join(self.path, name))
+                if segment.sealed:
+                    self.sealed[name] = (modified, segment)
+                else:
+                    self.sealed.pop(name, None)
+            if segment.rows and segment.start < end and segment.end >= start:
+                segments.append(segment)
+        return segments
+
+    def _rows(self, serial_number: Optional[str], manufacturer: Optional[str],
+              start: float, end: float) -> Iterator[Tuple[_Segment, np.ndarray]]:
+        for segment in self.segments(start, end):
+            codes = None
+            if serial_number is not None or manufacturer is not None:
+                codes = [code for code, (m, s) in enumerate(segment.agvs)
+                         if (serial_number is None or s == serial_number)
+                         and (manufacturer is None or m == manufacturer)]
+                if not codes:
+                    continue
+            rows = segment.select(codes, start, end)
+            if len(rows):
+                yield segment, rows
+
+    def read(self, serial_number: Optional[str] = None, start: float = -math.inf,
+             end: float = math.inf, manufacturer: Optional[str] = None) -> Dict[str, np.ndarray]:
+        # Columns of the matching rows in time order. The agv and mapId codes
+        # are resolved to manufacturer, serialNumber and mapId object arrays
+        parts: Dict[str, list] = {name: [] for name in COLUMNS}
+        parts.update(manufacturer=[], serialNumber=[], mapId=[])
+        for segment, rows in self._rows(serial_number, manufacturer, start, end):
+            for name, column in segment.columns.items():
+                if name != "mapId":
+                    parts[name].append(column[rows])
+            agv = segment.columns["agv"][rows]
+            parts["manufacturer"].append(np.array([m for m, _ in segment.agvs], dtype=object)[agv])
+            parts["serialNumber"].append(np.array([s for _, s in segment.agvs], dtype=object)[agv])
+            # -1 (no position) picks the trailing None
+            maps = np.array(segment.maps + [None], dtype=object)
+            parts["mapId"].append(maps[segment.columns["mapId"][rows]])
+        result = {}
+        for name, arrays in parts.items():
+            if arrays:
+                result[name] = np.concatenate(arrays)
+            else:
+                result[name] = np.empty(0, dtype=COLUMNS.get(name, object))
+        return result
+
+    def states(self, serial_number: Optional[str] = None, start: float = -math.inf,
+               end: float = math.inf, manufacturer: Optional[str] = None
+               ) -> Iterator[Tuple[float, State]]:
+        # (time, State) in time order. Without a recorded payload the State
+        # is rebuilt from the columns; fields that are not recorded keep
+        # empty or default values
+        for segment, rows in self._rows(serial_number, manufacturer, start, end):
+            errors = segment.errors()
+            columns = {name: column[rows].tolist() for name, column in segment.columns.items()}
+            for i, row in enumerate(rows.tolist()):
+                t = columns["time"][i]
+                if columns["payloadLength"][i]:
+                    yield t, decode(State, segment.payload(row), validate=False)
+                    continue
+                values = {name: column[i] for name, column in columns.items()}
+                yield t, _rebuild(segment, t, values, errors.get(row, ()))
+
+
+def _rebuild(segment: _Segment, t: float, values: dict, errors) -> State:
+    manufacturer, serial_number = segment.agvs[values["agv"]]
+    position = None
+    if values["mapId"] >= 0:
+        position = AgvPosition.construct(x=values["x"], y=values["y"], theta=values["theta"],
+                                         mapId=segment.maps[values["mapId"]],
+                                         positionInitialized=True)
+    return State.construct(
+        headerId=values["headerId"],
+        timestamp=datetime.fromtimestamp(t, timezone.utc),
+        version="2.0.0",
+        manufacturer=manufacturer,
+        serialNumber=serial_number,
+        orderId="",
+        orderUpdateId=0,
+        lastNodeId="",
+        lastNodeSequenceId=values["lastNodeSequenceId"],
+        driving=values["driving"],
+        operatingMode=OPERATING_MODES[values["operatingMode"]],
+        nodeStates=[],
+        edgeStates=[],
+        agvPosition=position,
+        actionStates=[],
+        batteryState=BatteryState.construct(batteryCharge=values["batteryCharge"],
+                                            charging=values["charging"]),
+        errors=[Error.parse_obj(error) for error in errors],
+        safetyState=SafetyState.construct(eStop=E_STOP_TYPES[values["eStop"]],
+                                          fieldViolation=False),
+    )
+
+
+class HistoryReplay:
+    # Plays recorded States back with the get()/messages() interface of
+    # Gateway, speed times faster than recorded; speed=None plays them
+    # back as fast as they are consumed
+
+    def __init__(self, reader: HistoryReader, speed: Optional[float] = 1.0,
+                 serial_number: Optional[str] = None, start: float = -math.inf,
+                 end: float = math.inf, manufacturer: Optional[str] = None):
+        self.speed = speed
+        self._states = reader.states(serial_number, start, end, manufacturer)
+        self._origin: Optional[Tuple[float, float]] = None
+
+    async def get(self, subtopic: str = STATE) -> Message:
+        if subtopic != STATE:
+            raise KeyError(subtopic)
+        try:
+            t, state = next(self._states)
+        except StopIteration:
+            raise EOFError("end of recorded history") from None
+        if self.speed is not None:
+            loop = asyncio.get_running_loop()
+            if self._origin is None:
+                self._origin = (t, loop.time())
+            recorded, started = self._origin
+            delay = started + (t - recorded) / self.speed - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+        return Message(state.manufacturer, state.serialNumber, STATE, state)
+
+    async def messages(self, subtopic: str = STATE):
+        while True:
+            try:
+                yield await self.get(subtopic)
+            except EOFError:
+                return
@@ -0,0 +1,271 @@
+import multiprocessing
+import struct
+import threading
+import time
+import zlib
+from multiprocessing import shared_memory
+from multiprocessing.connection import wait
+from typing import List, NamedTuple, Optional
+
+from .decoder import decode
+from .state import EStopType, OperatingMode, State
+
+# Multi-process State ingestion
+#
+# Decoding and validating State messages is CPU bound, so one process
+# tops out at a few thousand messages per second. StateIngest shards AGVs
+# by a stable hash of their serialNumber over a pool of worker processes.
+# Payloads go to the workers through pipes; each worker writes a fixed
+# size summary record per message into its own shared memory ring, which
+# the coordinator reads with poll(). An AGV always lands on the same
+# worker, and pipes and rings are FIFO, so the messages of one AGV stay
+# in order. Call poll() regularly: a worker whose ring is full stops
+# reading its pipe, and submit() then blocks.
+#
+# A message that fails to decode, for whatever reason, gives an invalid
+# summary; failures other than ValueError are also counted in `failed`.
+# If a worker process dies anyway, submit() and poll() raise RuntimeError
+# instead of waiting for it. close() drops the summaries that were not
+# polled yet and terminates workers that do not stop within its timeout.
+
+OPERATING_MODES = list(OperatingMode)
+E_STOP_TYPES = list(EStopType)
+
+_OPERATING_MODE_CODES = {mode: code for code, mode in enumerate(OPERATING_MODES)}
+_E_STOP_CODES = {e_stop: code for code, e_stop in enumerate(E_STOP_TYPES)}
+
+# Longer serialNumbers and mapIds are truncated in the summaries
+_STRING_LEN = 64
+
+
+def _truncate(value: str) -> bytes:
+    # To _STRING_LEN bytes without splitting a UTF-8 character
+    encoded = value.encode()
+    if len(encoded) > _STRING_LEN:
+        encoded = encoded[:_STRING_LEN].decode(errors="ignore").encode()
+    return encoded
+
+
+# serialNumber, mapId, headerId, lastNodeSequenceId, x, y, theta,
+# batteryCharge, driving, operatingMode, eStop, valid, number of errors
+_RECORD = struct.Struct("<64s64sqqdddd?bb?H")
+# write index, read index, failed messages
+_HEADER = struct.Struct("<QQQ")
+
+
+class StateSummary(NamedTuple):
+    serialNumber: str
+    valid: bool
+    headerId: int = 0
+    mapId: Optional[str] = None
+    x: float = float("nan")
+    y: float = float("nan")
+    theta: float = float("nan")
+    batteryCharge: float = float("nan")
+    driving: bool = False
+    operatingMode: Optional[OperatingMode] = None
+    eStop: Optional[EStopType] = None
+    lastNodeSequenceId: int = 0
+    errors: int = 0
+
+
+class _Ring:
+    # Single producer, single consumer ring of summary records
+
+    def __init__(self, shm: shared_memory.SharedMemory, capacity: int):
+        self.shm = shm
+        self.buf = shm.buf
+        self.capacity = capacity
+
+    @staticmethod
+    def size(capacity: int) -> int:
+        return _HEADER.size + capacity * _RECORD.size
+
+    def _indexes(self):
+        return _HEADER.unpack_from(self.buf, 0)[:2]
+
+    def put(self, *fields):
+        while True:
+            write, read = self._indexes()
+            if write - read < self.capacity:
+                break
+            time.sleep(0.0005)
+        offset = _HEADER.size + (write % self.capacity) * _RECORD.size
+        _RECORD.pack_into(self.buf, offset, *fields)
+        # Publish the record only after it is complete
+        struct.pack_into("<Q", self.buf, 0, write + 1)
+
+    def drain(self) -> List[tuple]:
+        write, read = self._indexes()
+        records = []
+        for index in range(read, write):
+            offset = _HEADER.size + (index % self.capacity) * _RECORD.size
+            records.append(_RECORD.unpack_from(self.buf, offset))
+        if write != read:
+            struct.pack_into("<Q", self.buf, 8, write)
+        return records
+
+    def failed(self) -> int:
+        return _HEADER.unpack_from(self.buf, 0)[2]
+
+    def add_failed(self):
+        struct.pack_into("<Q", self.buf, 16, self.failed() + 1)
+
+
+def _invalid(serial: bytes) -> tuple:
+    return (serial, b"", 0, 0, 0.0, 0.0, 0.0, 0.0, False, -1, -1, False, 0)
+
+
+def _summarize(serial: bytes, payload: bytes, validate: bool) -> tuple:
+    try:
+        state = decode(State, payload, validate)
+    except ValueError:
+        return _invalid(serial)
+    position = state.agvPosition
+    if position is not None:
+        map_id = _truncate(position.mapId)
+        x, y, theta = position.x, position.y, position.theta
+    else:
+        map_id = b""
+        x = y = theta = float("nan")
+    return (serial, map_id, state.headerId, state.lastNodeSequenceId, x, y, theta,
+            state.batteryState.batteryCharge, state.driving,
+            _OPERATING_MODE_CODES[state.operatingMode], _E_STOP_CODES[state.safetyState.eStop],
+            True, len(state.errors))
+
+
+def _worker(connection, shm_name: str, capacity: int, validate: bool):
+    shm = shared_memory.SharedMemory(shm_name)
+    ring = _Ring(shm, capacity)
+    try:
+        while True:
+            message = connection.recv_bytes()
+            if not message:
+                break
+            # One length byte, the serialNumber, then the payload
+            length = message[0]
+            serial = message[1:1 + length]
+            try:
+                record = _summarize(serial, memoryview(message)[1 + length:], validate)
+            except Exception:
+                # Whatever else goes wrong with one message must not stop
+                # the worker
+                record = _invalid(serial)
+                ring.add_failed()
+            ring.put(*record)
+    finally:
+        del ring
+        shm.close()
+
+
+def shard_of(serial_number: str, shards: int) -> int:
+    # Stable across processes, unlike hash()
+    return zlib.crc32(serial_number.encode()) % shards
+
+
+class StateIngest:
+
+    def __init__(self, workers: Optional[int] = None, validate: bool = True,
+                 ring_capacity: int = 4096, context=None):
+        context = context or multiprocessing.get_context()
+        self.workers = workers or multiprocessing.cpu_count()
+        self.processes = []
+        self.connections = []
+        self.rings: List[_Ring] = []
+        for _ in range(self.workers):
+            shm = shared_memory.SharedMemory(create=True, size=_Ring.size(ring_capacity))
+            _HEADER.pack_into(shm.buf, 0, 0, 0, 0)
+            receiver, sender = context.Pipe(duplex=False)
+            process = context.Process(target=_worker, daemon=True,
+                                      args=(receiver, shm.name, ring_capacity, validate))
+            process.start()
+            receiver.close()
+            self.processes.append(process)
+            self.connections.append(sender)
+            self.rings.append(_Ring(shm, ring_capacity))
+
+    def _check_workers(self):
+        # A dead worker's sentinel is ready; one select() for all of them
+        if wait([process.sentinel for process in self.processes], 0):
+            for shard, process in enumerate(self.processes):
+                if not process.is_alive():
+                    raise RuntimeError("ingest worker %d exited with code %s"
+                                       % (shard, process.exitcode))
+
+    def submit(self, serial_number: str, payload: bytes):
+        shard = shard_of(serial_number, self.workers)
+        serial = _truncate(serial_number)
+        try:
+            self.connections[shard].send_bytes(bytes((len(serial),)) + serial + payload)
+        except OSError:
+            # The pipe breaks when its worker dies, also while blocked in send
+            self._check_workers()
+            raise
+
+    def poll(self) -> List[StateSummary]:
+        summaries = []
+        for ring in self.rings:
+            for record in ring.drain():
+                summaries.append(_to_summary(record))
+        if not summaries:
+            self._check_workers()
+        return summaries
+
+    @property
+    def failed(self) -> int:
+        return sum(ring.failed() for ring in self.rings)
+
+    def _discard(self, stop: threading.Event):
+        # Keeps the rings empty, so workers blocked on a full ring get to
+        # read the end of their pipe
+        while not stop.is_set():
+            for ring in self.rings:
+                ring.drain()
+            stop.wait(0.001)
+
+    def close(self, timeout: float = 5.0):
+        if not self.rings:
+            return
+        stop = threading.Event()
+        discard = threading.Thread(target=self._discard, args=(stop,), daemon=True)
+        discard.start()
+        try:
+            for connection in self.connections:
+                try:
+                    connection.send_bytes(b"")
+                except OSError:
+                    # Worker already gone
+                    pass
+                connection.close()
+            deadline = time.monotonic() + timeout
+            for process in self.processes:
+                process.join(max(deadline - time.monotonic(), 0.0))
+                if process.is_alive():
+                    process.terminate()
+                    process.join()
+        finally:
+            stop.set()
+            discard.join()
+            for ring in self.rings:
+                ring.buf = None
+                ring.shm.close()
+                ring.shm.unlink()
+            self.rings = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _to_summary(record: tuple) -> StateSummary:
+    (serial, map_id, header_id, last_node_sequence_id, x, y, theta, battery_charge,
+     driving, operating_mode, e_stop, valid, errors) = record
+    serial_number = serial.rstrip(b"\0").decode()
+    if not valid:
+        return StateSummary(serial_number, False)
+    return StateSummary(
+        serial_number, True, header_id, map_id.rstrip(b"\0").decode() or None, x, y, theta,
+        battery_charge, driving, OPERATING_MODES[operating_mode], E_STOP_TYPES[e_stop],
+        last_node_sequence_id, errors)
@@ -0,0 +1,17 @@
+from pydantic import BaseModel
+from typing import List
+
+from .order import Action
+
+# Everything needed for InstantActions VDA5050
+#
+# Instant actions are the same Action as on order nodes and edges, sent
+# on their own topic and executed right away.
+
+class InstantActions(BaseModel):
+    headerId: int = 0
+    timestamp: str = ""
+    version: str = "2.0.0"
+    manufacturer: str = ""
+    serialNumber: str = ""
+    actions: List[Action]
@@ -0,0 +1,128 @@
+from typing import List, Optional
+
+from pydantic import BaseModel
+
+from .capabilities import FactSheetCache, Violation
+from .codec import encode
+from .factsheet import FactSheet
+from .order import Action, Order
+
+# Protocol limit checks for orders before they are published
+#
+# OrderLimits takes FactSheet.protocolLimits.maxStringLens and maxArrayLens
+# once and checks an order against them in a single pass, including the
+# size of the encoded payload against msgLen. A limit that is missing or
+# zero means "no limit", as in the factsheet schema.
+# LimitCache holds them per AGV like CapabilityCache, recompiling when a
+# factsheet with different protocolLimits arrives.
+
+
+def _limit(value: Optional[int]) -> Optional[int]:
+    return value or None
+
+
+class OrderLimits:
+
+    def __init__(self, factsheet: FactSheet):
+        strings = factsheet.protocolLimits.maxStringLens
+        arrays = factsheet.protocolLimits.maxArrayLens
+        self.msgLen = _limit(strings.msgLen)
+        self.topicSerialLen = _limit(strings.topicSerialLen)
+        self.topicElemLen = _limit(strings.topicElemLen)
+        self.idLen = _limit(strings.idLen)
+        self.idNumericalOnly = bool(strings.idNumericalOnly)
+        self.enumLen = _limit(strings.enumLen)
+        self.order_nodes = _limit(arrays.order_nodes)
+        self.order_edges = _limit(arrays.order_edges)
+        self.node_actions = _limit(arrays.node_actions)
+        self.edge_actions = _limit(arrays.edge_actions)
+        self.actions_actionsParameters = _limit(arrays.actions_actionsParameters)
+        self.check_ids = self.idLen is not None or self.idNumericalOnly
+
+    def _check_id(self, path: str, value: str, violations: List[Violation]):
+        if self.idLen is not None and len(value) > self.idLen:
+            violations.append(Violation(path, "longer than idLen %d" % self.idLen))
+        if self.idNumericalOnly and not value.isdigit():
+            violations.append(Violation(path, "not numerical (idNumericalOnly)"))
+
+    def _check_array(self, path: str, items: list, limit: Optional[int], name: str,
+                     violations: List[Violation]):
+        if limit is not None and len(items) > limit:
+            violations.append(Violation(
+                path, "%d entries exceed %s %d" % (len(items), name, limit)))
+
+    def _check_enum(self, path: str, value: str, violations: List[Violation]):
+        if len(value) > self.enumLen:
+            violations.append(Violation(path, "longer than enumLen %d" % self.enumLen))
+
+    def _check_actions(self, path: str, actions: List[Action], limit: Optional[int],
+                       name: str, violations: List[Violation]):
+        self._check_array(path, actions, limit, name, violations)
+        for i, action in enumerate(actions):
+            action_path = "%s[%d]" % (path, i)
+            if self.check_ids:
+                self._check_id(action_path + ".actionId", action.actionId, violations)
+            if self.enumLen is not None:
+                # The schema gives actionType and the parameter keys enumLen too
+                self._check_enum(action_path + ".actionType", action.actionType, violations)
+                self._check_enum(action_path + ".blockingType", action.blockingType.value,
+                                 violations)
+                for j, parameter in enumerate(action.actionParameters):
+                    self._check_enum("%s.actionParameters[%d].key" % (action_path, j),
+                                     parameter.key, violations)
+            self._check_array(action_path + ".actionParameters", action.actionParameters,
+                              self.actions_actionsParameters, "actions_actionsParameters",
+                              violations)
+
+    def check_order(self, order: Order, payload: Optional[bytes] = None) -> List[Violation]:
+        # payload is the encoded order; it is encoded here if msgLen is set
+        # and no payload is given
+        violations = []
+        check_ids = self.check_ids
+        if self.topicSerialLen is not None and len(order.serialNumber) > self.topicSerialLen:
+            violations.append(Violation(
+                "serialNumber", "longer than topicSerialLen %d" % self.topicSerialLen))
+        if self.topicElemLen is not None:
+            for name in ("timestamp", "version", "manufacturer"):
+                if len(getattr(order, name)) > self.topicElemLen:
+                    violations.append(Violation(
+                        name, "longer than topicElemLen %d" % self.topicElemLen))
+        if check_ids:
+            self._check_id("orderId", order.orderId, violations)
+        self._check_array("nodes", order.nodes, self.order_nodes, "order_nodes", violations)
+        self._check_array("edges", order.edges, self.order_edges, "order_edges", violations)
+        for i, node in enumerate(order.nodes):
+            path = "nodes[%d]" % i
+            if check_ids:
+                self._check_id(path + ".nodeId", node.nodeId, violations)
+                if node.nodePosition is not None and node.nodePosition.mapId:
+                    self._check_id(path + ".nodePosition.mapId", node.nodePosition.mapId,
+                                   violations)
+            if node.actions:
+                self._check_actions(path + ".actions", node.actions, self.node_actions,
+                                    "node_actions", violations)
+        for i, edge in enumerate(order.edges):
+            path = "edges[%d]" % i
+            if check_ids:
+                self._check_id(path + ".edgeId", edge.edgeId, violations)
+                self._check_id(path + ".startNodeId", edge.startNodeId, violations)
+                self._check_id(path + ".endNodeId", edge.endNodeId, violations)
+            if edge.actions:
+                self._check_actions(path + ".actions", edge.actions, self.edge_actions,
+                                    "edge_actions", violations)
+        if self.msgLen is not None:
+            if payload is None:
+                payload = encode(order)
+            if len(payload) > self.msgLen:
+                violations.append(Violation(
+                    "", "payload of %d bytes exceeds msgLen %d" % (len(payload), self.msgLen)))
+        return violations
+
+
+class LimitCache(FactSheetCache):
+
+    def section(self, factsheet: FactSheet) -> BaseModel:
+        return factsheet.protocolLimits
+
+    def compile(self, factsheet: FactSheet) -> OrderLimits:
+        return OrderLimits(factsheet)
@@ -0,0 +1,100 @@
+import asyncio
+from typing import Dict, Iterable, List, Optional, Union
+
+from pydantic import BaseModel
+
+from .codec import CodecNegotiator, encode
+from .gateway import DEFAULT_SUBTOPICS, MODELS, Message, decode_message
+from .instant_actions import InstantActions
+from .order import Order
+from .topics import INSTANT_ACTIONS, ORDER, STATE
+
+# In-process stand-in for an MQTT broker
+#
+# LoopbackBroker hands out gateways with the same get()/messages()/
+# publish() interface as Gateway, so a simulated fleet and a master
+# controller can run in one process without a broker. Payloads are still
+# encoded on publish and decoded per subscriber, so the serialization cost
+# is the same as over MQTT, and with a CodecNegotiator each gateway
+# encodes and decodes like a Gateway with one. Like a broker delivering
+# QoS 0 messages to a client that does not keep up, a full subscriber
+# queue drops the message.
+
+class LoopbackGateway:
+
+    def __init__(self, broker: "LoopbackBroker", subtopics: Iterable[str], queue_size: int,
+                 validate: bool, codecs: Optional[CodecNegotiator] = None):
+        self.broker = broker
+        self.validate = validate
+        self.codecs = codecs
+        self.queues: Dict[str, asyncio.Queue] = {
+            subtopic: asyncio.Queue(queue_size) for subtopic in subtopics
+        }
+        self.dropped = 0
+
+    async def connect(self):
+        self.broker.gateways.append(self)
+
+    async def disconnect(self):
+        self.broker.gateways.remove(self)
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    def _receive(self, manufacturer: str, serial_number: str, subtopic: str, payload: bytes):
+        queue = self.queues[subtopic]
+        if queue.full():
+            self.dropped += 1
+            return
+        message = decode_message(manufacturer, serial_number, subtopic, payload,
+                                 MODELS.get(subtopic), self.validate, self.codecs)
+        if message is not None:
+            queue.put_nowait(message)
+
+    async def get(self, subtopic: str = STATE) -> Message:
+        return await self.queues[subtopic].get()
+
+    async def messages(self, subtopic: str = STATE):
+        while True:
+            yield await self.get(subtopic)
+
+    def publish(self, manufacturer: str, serial_number: str, subtopic: str,
+                payload: Union[BaseModel, bytes, str], qos: int = 0, retain: bool = False):
+        if isinstance(payload, BaseModel):
+            if self.codecs is not None:
+                payload = self.codecs.encode((manufacturer, serial_number), payload)
+            else:
+                payload = encode(payload)
+        elif isinstance(payload, str):
+            payload = payload.encode()
+        self.broker.deliver(manufacturer, serial_number, subtopic, payload)
+
+    def publish_order(self, order: Order, qos: int = 0):
+        return self.publish(order.manufacturer, order.serialNumber, ORDER, order, qos)
+
+    def publish_instant_actions(self, instant_actions: InstantActions, qos: int = 0):
+        return self.publish(instant_actions.manufacturer, instant_actions.serialNumber,
+                            INSTANT_ACTIONS, instant_actions, qos)
+
+
+class LoopbackBroker:
+
+    def __init__(self):
+        self.gateways: List[LoopbackGateway] = []
+        self.published = 0
+
+    def gateway(self, subtopics: Iterable[str] = DEFAULT_SUBTOPICS, queue_size: int = 1000,
+                validate: bool = True,
+                codecs: Optional[CodecNegotiator] = None) -> LoopbackGateway:
+        # Not subscribed until connected, like Gateway
+        return LoopbackGateway(self, subtopics, queue_size, validate, codecs)
+
+    def deliver(self, manufacturer: str, serial_number: str, subtopic: str, payload: bytes):
+        self.published += 1
+        for gateway in self.gateways:
+            if subtopic in gateway.queues:
+                gateway._receive(manufacturer, serial_number, subtopic, payload)
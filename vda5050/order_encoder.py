@@ -0,0 +1,129 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .codec import Codec, dumps, to_data
+from .order import Order
+
+# Incremental JSON encoding of order updates
+#
+# An order update (orderUpdateId + 1) mostly repeats the nodes and edges
+# of the previous one. OrderEncoder keeps the encoded JSON of every node
+# and edge of the last update of each AGV's order, keyed by sequenceId,
+# and splices the fragments of unchanged elements into the next payload,
+# so an update costs about as much as its new and changed parts. The
+# payload is the same as encode(order), or as codec.encode(order) for
+# the AGV's negotiated codec: the JSON codecs compress the spliced
+# payload, others encode the whole order.
+#
+# An element is unchanged if its content equals a snapshot taken when its
+# fragment was encoded, so elements edited in place are encoded again.
+# Taking the snapshot costs less than encoding, but not by much. Sources
+# that never edit an element once it was sent, such as OrderPlanner which
+# replaces changed nodes and edges by copies, can pass verify=False: an
+# element then counts as unchanged if it is the object encoded last time,
+# or a copy of it whose fields are equal scalars or the same objects.
+
+AgvKey = Tuple[str, str]
+_SEQUENCE_FIELDS = ("nodes", "edges")
+_SCALARS = frozenset({str, int, float, bool, type(None)})
+
+
+def _snapshot(value):
+    # Hashable copy of a model's content. Types are part of it since
+    # True == 1 == 1.0 but they encode differently. Only exact type
+    # checks, isinstance() against BaseModel is slow
+    kind = type(value)
+    if kind is str:
+        return value
+    if kind in _SCALARS:
+        return kind, value
+    if kind is list:
+        return tuple([_snapshot(item) for item in value])
+    if kind is dict:
+        return kind, tuple([(key, _snapshot(item)) for key, item in value.items()])
+    if hasattr(kind, "__fields__"):
+        return kind, tuple([_snapshot(item) for item in value.__dict__.values()])
+    return kind, value
+
+
+def _same_content(old: BaseModel, new: BaseModel) -> bool:
+    if type(old) is not type(new) or old.__dict__.keys() != new.__dict__.keys():
+        return False
+    for a, b in zip(old.__dict__.values(), new.__dict__.values()):
+        # Types too, since True == 1 == 1.0 but they encode differently
+        if a is not b and not (type(a) is type(b) and type(a) in _SCALARS and a == b):
+            return False
+    return True
+
+
+class _Fragment(NamedTuple):
+    # The fragment keeps its element, and so the nested objects compared
+    # by identity, alive. snapshot is None with verify=False
+    element: BaseModel
+    snapshot: Optional[tuple]
+    json: bytes
+
+
+class _OrderFragments:
+    # Fragments of the last encoded update of one order
+
+    def __init__(self, order_id: str):
+        self.orderId = order_id
+        self.fields: Dict[str, Dict[int, _Fragment]] = {name: {} for name in _SEQUENCE_FIELDS}
+
+
+class OrderEncoder:
+
+    def __init__(self, verify: bool = True):
+        self.verify = verify
+        self.orders: Dict[AgvKey, _OrderFragments] = {}
+        # Elements whose fragment was reused or had to be encoded
+        self.hits = 0
+        self.misses = 0
+
+    def _encode_elements(self, elements: List[BaseModel], cache: Dict[int, _Fragment]) -> bytes:
+        fragments = {}
+        parts = []
+        verify = self.verify
+        for element in elements:
+            fragment = cache.get(element.sequenceId)
+            if verify:
+                snapshot = _snapshot(element)
+                unchanged = fragment is not None and fragment.snapshot == snapshot
+            else:
+                snapshot = None
+                unchanged = fragment is not None and (fragment.element is element
+                                                      or _same_content(fragment.element, element))
+            if unchanged:
+                self.hits += 1
+            else:
+                self.misses += 1
+                fragment = _Fragment(element, snapshot, dumps(to_data(element)))
+            fragments[element.sequenceId] = fragment
+            parts.append(fragment.json)
+        # Only the elements of this update are kept; the next one starts
+        # at its last released node
+        cache.clear()
+        cache.update(fragments)
+        return b"[" + b",".join(parts) + b"]"
+
+    def encode(self, order: Order, codec: Optional[Codec] = None) -> bytes:
+        if codec is not None and not codec.is_json:
+            return codec.encode(order)
+        key = (order.manufacturer, order.serialNumber)
+        fragments = self.orders.get(key)
+        if fragments is None or fragments.orderId != order.orderId:
+            fragments = self.orders[key] = _OrderFragments(order.orderId)
+        parts = []
+        for name, value in order.__dict__.items():
+            if name in fragments.fields and value is not None:
+                value = self._encode_elements(value, fragments.fields[name])
+            else:
+                value = dumps(to_data(value))
+            parts.append(dumps(name) + b":" + value)
+        payload = b"{" + b",".join(parts) + b"}"
+        return payload if codec is None else codec.compress(payload)
+
+    def forget(self, manufacturer: str, serial_number: str):
+        self.orders.pop((manufacturer, serial_number), None)
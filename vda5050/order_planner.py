@@ -0,0 +1,100 @@
+from typing import List, Optional
+
+from .factsheet import FactSheet
+from .order import Edge, Node, Order
+from .state import State
+
+# Splitting long routes into base/horizon orders that fit the AGV's limits
+#
+# A route of n nodes and n - 1 edges is sent as a sequence of order
+# updates of the same orderId. Every update starts at the last released
+# node of the previous one (the stitching node), releases up to
+# base_nodes nodes and adds unreleased horizon nodes up to max_nodes, so
+# the vehicle always sees where it is going next. The next update is
+# produced as soon as the AGV reports (State.lastNodeSequenceId) that at
+# most `lookahead` released nodes are left ahead of it.
+
+
+class OrderPlanner:
+
+    def __init__(self, manufacturer: str, serial_number: str, order_id: str,
+                 nodes: List[Node], edges: List[Edge], max_nodes: int,
+                 base_nodes: Optional[int] = None, lookahead: int = 1):
+        if len(edges) != len(nodes) - 1:
+            raise ValueError("a route of %d nodes needs %d edges, got %d"
+                             % (len(nodes), len(nodes) - 1, len(edges)))
+        if max_nodes < 2:
+            raise ValueError("max_nodes must be at least 2")
+        self.manufacturer = manufacturer
+        self.serialNumber = serial_number
+        self.orderId = order_id
+        self.max_nodes = max_nodes
+        self.base_nodes = max(base_nodes or (max_nodes + 1) // 2, 2)
+        self.base_nodes = min(self.base_nodes, max_nodes)
+        self.lookahead = lookahead
+        # Sequence ids are numbered over the whole route so they stay
+        # consistent across updates
+        self.nodes = [node.copy(update={"sequenceId": 2 * i}) for i, node in enumerate(nodes)]
+        self.edges = [edge.copy(update={"sequenceId": 2 * i + 1}) for i, edge in enumerate(edges)]
+        self.orderUpdateId = -1
+        # Index of the last released node sent so far
+        self.base_end = -1
+
+    @classmethod
+    def from_factsheet(cls, factsheet: FactSheet, order_id: str, nodes: List[Node],
+                       edges: List[Edge], base_nodes: Optional[int] = None,
+                       lookahead: int = 1) -> "OrderPlanner":
+        arrays = factsheet.protocolLimits.maxArrayLens
+        max_nodes = len(nodes)
+        if arrays.order_nodes:
+            max_nodes = min(max_nodes, arrays.order_nodes)
+        if arrays.order_edges:
+            max_nodes = min(max_nodes, arrays.order_edges + 1)
+        return cls(factsheet.manufacturer, factsheet.serialNumber, order_id, nodes, edges,
+                   max(max_nodes, 2), base_nodes, lookahead)
+
+    @property
+    def done(self) -> bool:
+        return self.base_end == len(self.nodes) - 1
+
+    def _order(self, start: int) -> Order:
+        base_end = min(start + self.base_nodes - 1, len(self.nodes) - 1)
+        end = min(start + self.max_nodes - 1, len(self.nodes) - 1)
+        # A node or edge is only replaced by a copy when its released flag
+        # changes, so it stays the same object across updates until then
+        # and OrderEncoder reuses its JSON
+        for i in range(start, end + 1):
+            node = self.nodes[i]
+            if node.released != (i <= base_end):
+                self.nodes[i] = node.copy(update={"released": i <= base_end})
+        for i in range(start, end):
+            edge = self.edges[i]
+            if edge.released != (i < base_end):
+                self.edges[i] = edge.copy(update={"released": i < base_end})
+        self.base_end = base_end
+        self.orderUpdateId += 1
+        # The nodes and edges are already valid models; construct() keeps
+        # them as they are instead of copying them
+        return Order.construct(manufacturer=self.manufacturer, serialNumber=self.serialNumber,
+                               orderId=self.orderId, orderUpdateId=self.orderUpdateId,
+                               nodes=self.nodes[start:end + 1], edges=self.edges[start:end])
+
+    def first_order(self) -> Order:
+        return self._order(0)
+
+    def next_sequence_id(self) -> Optional[int]:
+        # lastNodeSequenceId from which on the next update is due
+        if self.done or self.base_end < 0:
+            return None
+        trigger = max(self.base_end - self.lookahead, 0)
+        return self.nodes[trigger].sequenceId
+
+    def on_state(self, state: State) -> Optional[Order]:
+        # Returns the next order update once the AGV has come close enough
+        # to the end of the released base, otherwise None
+        if state.orderId != self.orderId:
+            return None
+        due = self.next_sequence_id()
+        if due is None or state.lastNodeSequenceId < due:
+            return None
+        return self._order(self.base_end)
@@ -0,0 +1,81 @@
+import itertools
+import uuid
+from datetime import datetime, timezone
+from typing import Dict, Iterator, Optional, Tuple
+
+import paho.mqtt.client as mqtt_client
+
+from .codec import CodecNegotiator
+from .gateway import Gateway
+from .instant_actions import InstantActions
+from .order import Action, ActionBlockingType
+from .topics import INTERFACE_NAME, MAJOR_VERSION
+
+# Priority lane for instant actions
+#
+# Orders queue up in the OrderDispatcher and, under load, in the order
+# connection's outgoing packets and socket buffer. PriorityPublisher sends
+# InstantActions over a connection of its own that carries nothing else,
+# so a cancelOrder or startPause goes out immediately instead of waiting
+# behind bulk order traffic, both in this process and at the broker.
+
+AgvKey = Tuple[str, str]
+
+
+def timestamp() -> str:
+    # ISO 8601 in UTC with milliseconds, as the protocol's examples
+    return datetime.now(timezone.utc).isoformat(timespec="milliseconds").replace("+00:00", "Z")
+
+
+class PriorityPublisher:
+
+    def __init__(self, host: str, port: int = 1883, keepalive: int = 60, qos: int = 1,
+                 client_id: str = "", interface: str = INTERFACE_NAME,
+                 version: str = MAJOR_VERSION, codecs: Optional[CodecNegotiator] = None):
+        self.qos = qos
+        self.gateway = Gateway(host, port, keepalive, subtopics=(), client_id=client_id,
+                               interface=interface, version=version, codecs=codecs)
+        self._header_ids: Dict[AgvKey, Iterator[int]] = {}
+
+    async def connect(self):
+        await self.gateway.connect()
+
+    async def disconnect(self):
+        await self.gateway.disconnect()
+
+    async def __aenter__(self):
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.disconnect()
+
+    def publish(self, instant_actions: InstantActions) -> mqtt_client.MQTTMessageInfo:
+        return self.gateway.publish_instant_actions(instant_actions, self.qos)
+
+    def send(self, manufacturer: str, serial_number: str,
+             *actions: Action) -> mqtt_client.MQTTMessageInfo:
+        # Wraps the actions in an InstantActions message with the next
+        # headerId for the AGV and the current time
+        key = (manufacturer, serial_number)
+        header_ids = self._header_ids.get(key)
+        if header_ids is None:
+            header_ids = self._header_ids[key] = itertools.count()
+        return self.publish(InstantActions(
+            headerId=next(header_ids), timestamp=timestamp(), manufacturer=manufacturer,
+            serialNumber=serial_number, actions=list(actions)))
+
+    def _action(self, manufacturer: str, serial_number: str,
+                action_type: str) -> mqtt_client.MQTTMessageInfo:
+        return self.send(manufacturer, serial_number, Action(
+            actionType=action_type, actionId=str(uuid.uuid4()),
+            blockingType=ActionBlockingType.HARD))
+
+    def cancel_order(self, manufacturer: str, serial_number: str) -> mqtt_client.MQTTMessageInfo:
+        return self._action(manufacturer, serial_number, "cancelOrder")
+
+    def start_pause(self, manufacturer: str, serial_number: str) -> mqtt_client.MQTTMessageInfo:
+        return self._action(manufacturer, serial_number, "startPause")
+
+    def stop_pause(self, manufacturer: str, serial_number: str) -> mqtt_client.MQTTMessageInfo:
+        return self._action(manufacturer, serial_number, "stopPause")
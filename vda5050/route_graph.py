@@ -0,0 +1,266 @@
+import heapq
+import math
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from .order import Edge, Node, NodePosition, Order
+
+# Layout graphs built from orders, for shortest-path planning
+#
+# Every order tells a bit of the layout: nodes with positions and directed
+# edges between them. LayoutGraph collects them per mapId, compiles them
+# into CSR adjacency arrays and precomputes distance tables:
+#
+# - up to all_pairs_limit nodes, a full distance and predecessor table, so
+#   a query is a walk back along the predecessors;
+# - above that, landmark (ALT) distances that guide an A* search.
+#
+# Edge lengths are the straight-line distance between their nodes.
+#
+# Compiling takes a second or more on large layouts, so it only happens
+# when compile() is called. Until then, and after every change to the
+# graph, queries run a plain Dijkstra search on the current graph instead.
+
+Path = Tuple[float, List[str], List[str]]  # (length, nodeIds, edgeIds)
+
+
+def _dijkstra(indptr: np.ndarray, indices: np.ndarray, weights: np.ndarray,
+              source: int) -> Tuple[np.ndarray, np.ndarray]:
+    n = len(indptr) - 1
+    dist = np.full(n, np.inf)
+    pred = np.full(n, -1, dtype=np.int32)
+    dist[source] = 0.0
+    heap = [(0.0, source)]
+    indptr_list = indptr.tolist()
+    indices_list = indices.tolist()
+    weights_list = weights.tolist()
+    best = dist.tolist()
+    while heap:
+        d, u = heapq.heappop(heap)
+        if d > best[u]:
+            continue
+        for k in range(indptr_list[u], indptr_list[u + 1]):
+            v = indices_list[k]
+            nd = d + weights_list[k]
+            if nd < best[v]:
+                best[v] = nd
+                pred[v] = u
+                heapq.heappush(heap, (nd, v))
+    dist[:] = best
+    return dist, pred
+
+
+class LayoutGraph:
+
+    def __init__(self, map_id: str):
+        self.mapId = map_id
+        self.node_ids: List[str] = []
+        self.index: Dict[str, int] = {}
+        self.positions: List[NodePosition] = []
+        # (start index, end index) -> edgeId
+        self.edges: Dict[Tuple[int, int], str] = {}
+        # Successor indices per node, for searching without compiling
+        self.successors: List[List[int]] = []
+        self._compiled = False
+
+    def __len__(self):
+        return len(self.node_ids)
+
+    def add_node(self, node_id: str, position: NodePosition) -> int:
+        i = self.index.get(node_id)
+        if i is None:
+            i = self.index[node_id] = len(self.node_ids)
+            self.node_ids.append(node_id)
+            self.positions.append(position)
+            self.successors.append([])
+            self._compiled = False
+        return i
+
+    def add_edge(self, edge_id: str, start_node_id: str, end_node_id: str):
+        key = (self.index[start_node_id], self.index[end_node_id])
+        if key not in self.edges:
+            self.edges[key] = edge_id
+            self.successors[key[0]].append(key[1])
+            self._compiled = False
+
+    def add_order(self, order: Order):
+        # Takes the nodes of this map with positions and the edges between them
+        for node in order.nodes:
+            position = node.nodePosition
+            if position is not None and position.mapId == self.mapId:
+                self.add_node(node.nodeId, position)
+        for edge in order.edges:
+            if edge.startNodeId in self.index and edge.endNodeId in self.index:
+                self.add_edge(edge.edgeId, edge.startNodeId, edge.endNodeId)
+
+    def compile(self, all_pairs_limit: int = 2000, landmarks: int = 16):
+        n = len(self.node_ids)
+        order = sorted(self.edges)
+        starts = np.array([u for u, _ in order], dtype=np.int64)
+        ends = np.array([v for _, v in order], dtype=np.int64)
+        xy = np.array([(p.x, p.y) for p in self.positions], dtype=float).reshape(-1, 2)
+        weights = np.hypot(*(xy[ends] - xy[starts]).T) if order else np.zeros(0)
+        self.indptr = np.searchsorted(starts, np.arange(n + 1)).astype(np.int64)
+        self.indices = ends
+        self.weights = weights
+        self.lengths = dict(zip(order, weights.tolist()))
+        # Reverse graph for the landmark distances towards the landmarks
+        reverse = np.argsort(ends, kind="stable")
+        self.rindptr = np.searchsorted(ends[reverse], np.arange(n + 1)).astype(np.int64)
+        self.rindices = starts[reverse]
+        self.rweights = weights[reverse]
+        self.dist = self.pred = None
+        self.landmark_from = self.landmark_to = None
+        if n <= all_pairs_limit:
+            self.dist = np.empty((n, n))
+            self.pred = np.empty((n, n), dtype=np.int32)
+            for source in range(n):
+                self.dist[source], self.pred[source] = _dijkstra(
+                    self.indptr, self.indices, self.weights, source)
+        else:
+            self._compile_landmarks(min(landmarks, n), xy)
+        self._compiled = True
+
+    def _compile_landmarks(self, count: int, xy: np.ndarray):
+        # Farthest-point selection, starting from the node farthest from the centroid
+        chosen = [int(np.argmax(np.hypot(*(xy - xy.mean(axis=0)).T)))]
+        spread = np.hypot(*(xy - xy[chosen[0]]).T)
+        while len(chosen) < count:
+            chosen.append(int(np.argmax(spread)))
+            spread = np.minimum(spread, np.hypot(*(xy - xy[chosen[-1]]).T))
+        self.landmarks = chosen
+        # Distances from each landmark and to each landmark
+        self.landmark_from = np.stack([
+            _dijkstra(self.indptr, self.indices, self.weights, l)[0] for l in chosen])
+        self.landmark_to = np.stack([
+            _dijkstra(self.rindptr, self.rindices, self.rweights, l)[0] for l in chosen])
+
+    def _path_from_table(self, s: int, t: int) -> Optional[List[int]]:
+        if not math.isfinite(self.dist[s, t]):
+            return None
+        pred = self.pred[s]
+        path = [t]
+        while path[-1] != s:
+            path.append(int(pred[path[-1]]))
+        path.reverse()
+        return path
+
+    def _path_alt(self, s: int, t: int) -> Optional[List[int]]:
+        # A* with the landmark lower bound on the distance to t
+        from_t = self.landmark_from[:, t]
+        to_t = self.landmark_to[:, t]
+        with np.errstate(invalid="ignore"):
+            bound = np.maximum(from_t[:, None] - self.landmark_from,
+                               self.landmark_to - to_t[:, None])
+        heuristic = np.nan_to_num(bound, nan=0.0, posinf=0.0, neginf=0.0).max(axis=0)
+        heuristic = np.maximum(heuristic, 0.0).tolist()
+        indptr, indices, weights = self.indptr.tolist(), self.indices.tolist(), self.weights.tolist()
+        best = {s: 0.0}
+        pred = {s: -1}
+        heap = [(heuristic[s], 0.0, s)]
+        while heap:
+            _, d, u = heapq.heappop(heap)
+            if u == t:
+                path = [t]
+                while pred[path[-1]] != -1:
+                    path.append(pred[path[-1]])
+                path.reverse()
+                return path
+            if d > best[u]:
+                continue
+            for k in range(indptr[u], indptr[u + 1]):
+                v = indices[k]
+                nd = d + weights[k]
+                if nd < best.get(v, math.inf):
+                    best[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd + heuristic[v], nd, v))
+        return None
+
+    def _length(self, hop: Tuple[int, int]) -> float:
+        a, b = self.positions[hop[0]], self.positions[hop[1]]
+        return math.hypot(b.x - a.x, b.y - a.y)
+
+    def _path_search(self, s: int, t: int) -> Optional[List[int]]:
+        # Dijkstra on the graph as it is, stopping at t
+        successors = self.successors
+        best = {s: 0.0}
+        pred = {s: -1}
+        heap = [(0.0, s)]
+        while heap:
+            d, u = heapq.heappop(heap)
+            if u == t:
+                path = [t]
+                while pred[path[-1]] != -1:
+                    path.append(pred[path[-1]])
+                path.reverse()
+                return path
+            if d > best[u]:
+                continue
+            for v in successors[u]:
+                nd = d + self._length((u, v))
+                if nd < best.get(v, math.inf):
+                    best[v] = nd
+                    pred[v] = u
+                    heapq.heappush(heap, (nd, v))
+        return None
+
+    def shortest_path(self, source: str, target: str) -> Optional[Path]:
+        s, t = self.index[source], self.index[target]
+        if not self._compiled:
+            path = self._path_search(s, t)
+            lengths = None
+        else:
+            path = self._path_from_table(s, t) if self.dist is not None else self._path_alt(s, t)
+            lengths = self.lengths
+        if path is None:
+            return None
+        hops = list(zip(path, path[1:]))
+        if lengths is None:
+            length = sum(self._length(hop) for hop in hops)
+        else:
+            length = sum(lengths[hop] for hop in hops)
+        return length, [self.node_ids[i] for i in path], [self.edges[hop] for hop in hops]
+
+    def make_order(self, manufacturer: str, serial_number: str, order_id: str,
+                   source: str, target: str, order_update_id: int = 0) -> Optional[Order]:
+        # Order along the shortest path, sequenceIds numbered from 0. The
+        # parts come from the graph and are already valid, so they are
+        # built with construct() instead of being validated again
+        result = self.shortest_path(source, target)
+        if result is None:
+            return None
+        _, node_ids, edge_ids = result
+        nodes = [
+            Node.construct(nodeId=node_id, sequenceId=2 * i,
+                           nodePosition=self.positions[self.index[node_id]])
+            for i, node_id in enumerate(node_ids)
+        ]
+        edges = [
+            Edge.construct(edgeId=edge_id, sequenceId=2 * i + 1,
+                           startNodeId=node_ids[i], endNodeId=node_ids[i + 1])
+            for i, edge_id in enumerate(edge_ids)
+        ]
+        return Order.construct(manufacturer=manufacturer, serialNumber=serial_number,
+                               orderId=order_id, orderUpdateId=order_update_id,
+                               nodes=nodes, edges=edges)
+
+
+class LayoutGraphs:
+    # One LayoutGraph per mapId
+
+    def __init__(self):
+        self.maps: Dict[str, LayoutGraph] = {}
+
+    def add_order(self, order: Order):
+        map_ids = {node.nodePosition.mapId for node in order.nodes
+                   if node.nodePosition is not None}
+        for map_id in map_ids:
+            graph = self.maps.get(map_id)
+            if graph is None:
+                graph = self.maps[map_id] = LayoutGraph(map_id)
+            graph.add_order(order)
+
+    def get(self, map_id: str) -> Optional[LayoutGraph]:
+        return self.maps.get(map_id)
@@ -0,0 +1,161 @@
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Tuple
+
+from .codec import CodecNegotiator
+from .decoder import Payload
+from .gateway import MODELS, Message, decode_message
+from .topics import INTERFACE_NAME, MAJOR_VERSION, Topic, parse_topic, topic_for
+
+# Topic routing through a trie of subscriptions
+#
+# Router compiles MQTT topic filters, "+" and "#" wildcards included, into
+# a trie keyed by topic level, so matching a topic walks its levels once
+# instead of testing every filter. The outcome per topic string, the parsed
+# manufacturer, serialNumber and subtopic and the matching handlers, is
+# cached, so repeated topics skip the trie too. A message is decoded once,
+# with the model of its subtopic, and handed to every matching handler.
+
+Handler = Callable[[Message], None]
+# Parsed topic (None if it is not a VDA5050 topic) and matching handlers
+Resolved = Tuple[Optional[Topic], Tuple[Handler, ...]]
+
+
+class _TrieNode:
+    __slots__ = ("children", "handlers", "rest")
+
+    def __init__(self):
+        self.children: Dict[str, "_TrieNode"] = {}
+        # Handlers of filters ending here, and of filters ending in "#" here
+        self.handlers: List[Handler] = []
+        self.rest: List[Handler] = []
+
+
+class TopicTrie:
+
+    def __init__(self):
+        self.root = _TrieNode()
+
+    def insert(self, topic_filter: str, handler: Handler):
+        node = self.root
+        levels = topic_filter.split("/")
+        for i, level in enumerate(levels):
+            if level == "#":
+                if i != len(levels) - 1:
+                    raise ValueError("# must be the last level of %r" % topic_filter)
+                node.rest.append(handler)
+                return
+            child = node.children.get(level)
+            if child is None:
+                child = node.children[level] = _TrieNode()
+            node = child
+        node.handlers.append(handler)
+
+    def remove(self, topic_filter: str, handler: Handler):
+        node = self.root
+        levels = topic_filter.split("/")
+        for level in levels[:-1]:
+            node = node.children[level]
+        if levels[-1] == "#":
+            node.rest.remove(handler)
+        else:
+            node.children[levels[-1]].handlers.remove(handler)
+
+    def match(self, topic: str) -> List[Handler]:
+        levels = topic.split("/")
+        matched: List[Handler] = []
+        nodes = [self.root]
+        # Topics starting with "$" only match filters that start the same way
+        wildcards = not topic.startswith("$")
+        for level in levels:
+            following = []
+            for node in nodes:
+                if wildcards:
+                    matched.extend(node.rest)
+                    plus = node.children.get("+")
+                    if plus is not None:
+                        following.append(plus)
+                child = node.children.get(level)
+                if child is not None:
+                    following.append(child)
+            if not following:
+                return matched
+            nodes = following
+            wildcards = True
+        for node in nodes:
+            matched.extend(node.handlers)
+            # "a/#" also matches "a"
+            matched.extend(node.rest)
+        return matched
+
+
+def normalize_subtopic(subtopic: str) -> str:
+    # The JSON schemas name their topic as "/factsheet", "/state", ...
+    return subtopic.lstrip("/")
+
+
+class Router:
+
+    def __init__(self, validate: bool = True, interface: str = INTERFACE_NAME,
+                 version: str = MAJOR_VERSION, codecs: Optional[CodecNegotiator] = None,
+                 cache_size: int = 100000):
+        self.validate = validate
+        self.interface = interface
+        self.version = version
+        self.codecs = codecs
+        self.cache_size = cache_size
+        self.trie = TopicTrie()
+        self.filters: Dict[str, List[Handler]] = {}
+        self._cache: "OrderedDict[str, Resolved]" = OrderedDict()
+
+    def subscribe(self, topic_filter: str, handler: Handler):
+        self.trie.insert(topic_filter, handler)
+        self.filters.setdefault(topic_filter, []).append(handler)
+        self._cache.clear()
+
+    def unsubscribe(self, topic_filter: str, handler: Handler):
+        self.trie.remove(topic_filter, handler)
+        handlers = self.filters[topic_filter]
+        handlers.remove(handler)
+        if not handlers:
+            del self.filters[topic_filter]
+        self._cache.clear()
+
+    def route(self, subtopic: str, handler: Handler, manufacturer: str = "+",
+              serial_number: str = "+") -> str:
+        # Subscribes to a subtopic of one AGV, or of all AGVs by default
+        topic_filter = topic_for(manufacturer, serial_number, normalize_subtopic(subtopic),
+                                 self.interface, self.version)
+        self.subscribe(topic_filter, handler)
+        return topic_filter
+
+    def subscriptions(self, qos: int = 0) -> List[Tuple[str, int]]:
+        # For client.subscribe()
+        return [(topic_filter, qos) for topic_filter in self.filters]
+
+    def resolve(self, topic: str) -> Resolved:
+        cache = self._cache
+        resolved = cache.get(topic)
+        if resolved is None:
+            resolved = cache[topic] = (parse_topic(topic), tuple(self.trie.match(topic)))
+            if len(cache) > self.cache_size:
+                cache.popitem(last=False)
+        return resolved
+
+    def dispatch(self, topic: str, payload: Payload) -> int:
+        # Returns the number of handlers the message went to; an
+        # undecodable payload is dropped and logged like in Gateway
+        parsed, handlers = self.resolve(topic)
+        if parsed is None or not handlers:
+            return 0
+        message = decode_message(parsed.manufacturer, parsed.serialNumber, parsed.subtopic,
+                                 payload, MODELS.get(parsed.subtopic), self.validate,
+                                 self.codecs)
+        if message is None:
+            return 0
+        for handler in handlers:
+            handler(message)
+        return len(handlers)
+
+    def on_message(self, client, userdata, msg):
+        # paho on_message callback
+        self.dispatch(msg.topic, msg.payload)
@@ -0,0 +1,432 @@
+import asyncio
+import math
+from collections import deque
+from datetime import datetime, timedelta, timezone
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+
+from .factsheet import FactSheet
+from .order import ActionBlockingType, Action, Edge, Node, Order
+from .state import (ActionState, ActionStatus, AgvPosition, BatteryState, EdgeState, EStopType,
+                    Error, ErrorLevel, NodePosition, NodeState, OperatingMode, SafetyState, State,
+                    Velocity)
+from .topics import FACTSHEET, ORDER, STATE
+
+# Simulated AGVs for load testing a master controller
+#
+# SimulatedAgv executes orders the way the FactSheet describes the vehicle:
+# it drives along the released nodes at up to speedMax, accelerating with
+# accelerationMax and braking with decelerationMax so that it stops at the
+# end of the released path and at nodes with blocking actions. Actions run
+# for their "duration" parameter (action_duration by default) and follow
+# their blockingType: HARD actions run alone, SOFT and HARD actions stop
+# the vehicle, NONE actions run while driving. The battery drains with
+# time and distance.
+#
+# FleetSimulator steps every AGV in one coroutine with a fixed tick, so a
+# run is deterministic given the ticks at which orders arrive. States go
+# out every defaultStateInterval and, no faster than minStateInterval,
+# whenever a node is reached or an action changes status. It works with
+# a Gateway to a real broker or with a LoopbackBroker gateway.
+
+AgvKey = Tuple[str, str]
+
+# The protocol's fallback when a FactSheet gives no defaultStateInterval
+DEFAULT_STATE_INTERVAL = 30.0
+
+_BLOCKING = (ActionBlockingType.SOFT, ActionBlockingType.HARD)
+
+
+class SimulatedAction:
+    __slots__ = ("action", "status", "remaining")
+
+    def __init__(self, action: Action, duration: float):
+        self.action = action
+        self.status = ActionStatus.WAITING
+        self.remaining = duration
+
+
+def _duration(action: Action, default: float) -> float:
+    for parameter in action.actionParameters:
+        if parameter.key == "duration":
+            try:
+                return float(parameter.value)
+            except ValueError:
+                break
+    return default
+
+
+def _stops_at(node: Node, edge: Optional[Edge]) -> bool:
+    # The vehicle has to stand still at a node with blocking actions on
+    # it or on the edge leaving it
+    actions = node.actions if edge is None else node.actions + edge.actions
+    return any(action.blockingType in _BLOCKING for action in actions)
+
+
+class SimulatedAgv:
+
+    def __init__(self, factsheet: FactSheet, x: float = 0.0, y: float = 0.0, theta: float = 0.0,
+                 map_id: str = "map", battery_charge: float = 100.0,
+                 action_duration: float = 1.0, drain_per_second: float = 0.002,
+                 drain_per_meter: float = 0.01):
+        self.manufacturer = factsheet.manufacturer
+        self.serialNumber = factsheet.serialNumber
+        physical = factsheet.physicalParameters
+        self.speed_max = physical.speedMax
+        self.acceleration = physical.accelerationMax
+        self.deceleration = physical.decelerationMax
+        timing = factsheet.protocolLimits.timing
+        self.state_interval = timing.defaultStateInterval or DEFAULT_STATE_INTERVAL
+        self.min_state_interval = timing.minStateInterval
+        self.action_duration = action_duration
+        self.drain_per_second = drain_per_second
+        self.drain_per_meter = drain_per_meter
+        self.x = x
+        self.y = y
+        self.theta = theta
+        self.map_id = map_id
+        self.speed = 0.0
+        self.battery_charge = battery_charge
+        self.header_id = 0
+        self.order_id = ""
+        self.order_update_id = 0
+        self.last_node_id = ""
+        self.last_node_sequence_id = 0
+        self.distance_since_last_node = 0.0
+        self.nodes: Deque[Node] = deque()
+        self.edges: Dict[int, Edge] = {}
+        self.actions: Dict[str, SimulatedAction] = {}
+        self.queue: Deque[SimulatedAction] = deque()
+        self.running: List[SimulatedAction] = []
+        self.errors: List[Error] = []
+        # Distance from the next node on to where the vehicle has to stop
+        self._stop_after = 0.0
+        self.changed = True
+        self.last_state = -math.inf
+        self.next_state = 0.0
+
+    @property
+    def key(self) -> AgvKey:
+        return (self.manufacturer, self.serialNumber)
+
+    @property
+    def idle(self) -> bool:
+        return not (self.nodes or self.queue or self.running)
+
+    # Orders
+
+    def _reject(self, description: str) -> bool:
+        self.errors.append(Error.construct(
+            errorType="orderUpdateError", errorLevel=ErrorLevel.WARNING,
+            errorDescription=description, errorReferences=[]))
+        self.changed = True
+        return False
+
+    def _in_base(self, stitch: Node) -> bool:
+        # The stitching node is the last reached node or a released node
+        # still ahead of the vehicle
+        if (stitch.sequenceId, stitch.nodeId) == (self.last_node_sequence_id,
+                                                  self.last_node_id):
+            return True
+        return any(node.released and node.sequenceId == stitch.sequenceId
+                   and node.nodeId == stitch.nodeId for node in self.nodes)
+
+    def receive_order(self, order: Order) -> bool:
+        if order.orderId == self.order_id:
+            if order.orderUpdateId <= self.order_update_id:
+                return False
+            # An update starts at a node of the current base (the stitching
+            # node): the base is kept up to it and the update follows it
+            if not order.nodes or not self._in_base(order.nodes[0]):
+                return self._reject("update %d of order %s does not start in the current base"
+                                    % (order.orderUpdateId, order.orderId))
+            stitch = order.nodes[0].sequenceId
+            last = self.last_node_sequence_id
+            nodes = [node for node in self.nodes if node.sequenceId < stitch]
+            nodes += [node for node in order.nodes if node.sequenceId > last]
+            edges = [edge for sequence_id, edge in sorted(self.edges.items())
+                     if sequence_id < stitch]
+            edges += [edge for edge in order.edges if edge.sequenceId > stitch]
+        elif self.idle:
+            nodes, edges = order.nodes, order.edges
+            self.actions = {}
+            self.errors = []
+        else:
+            return self._reject("order %s received while %s is active"
+                                % (order.orderId, self.order_id))
+        self.order_id = order.orderId
+        self.order_update_id = order.orderUpdateId
+        self.nodes = deque(nodes)
+        self.edges = {edge.sequenceId: edge for edge in edges}
+        for element in (*nodes, *edges):
+            for action in element.actions:
+                if action.actionId not in self.actions:
+                    self.actions[action.actionId] = SimulatedAction(
+                        action, _duration(action, self.action_duration))
+        self._update_stop()
+        self.changed = True
+        return True
+
+    def _update_stop(self):
+        total = 0.0
+        nodes = iter(self.nodes)
+        node = next(nodes, None)
+        if node is None or _stops_at(node, self.edges.get(node.sequenceId + 1)):
+            self._stop_after = 0.0
+            return
+        position = node.nodePosition
+        for node in nodes:
+            if not node.released:
+                break
+            if position is not None and node.nodePosition is not None:
+                total += math.hypot(node.nodePosition.x - position.x,
+                                    node.nodePosition.y - position.y)
+                position = node.nodePosition
+            if _stops_at(node, self.edges.get(node.sequenceId + 1)):
+                break
+        self._stop_after = total
+
+    def _reach(self, node: Node):
+        self.nodes.popleft()
+        self.last_node_id = node.nodeId
+        self.last_node_sequence_id = node.sequenceId
+        self.distance_since_last_node = 0.0
+        self.edges.pop(node.sequenceId - 1, None)
+        self.queue.extend(self.actions[action.actionId] for action in node.actions)
+        edge = self.edges.get(node.sequenceId + 1)
+        if edge is not None and edge.released and self.nodes and self.nodes[0].released:
+            self.queue.extend(self.actions[action.actionId] for action in edge.actions)
+        self._update_stop()
+        self.changed = True
+
+    # Simulation
+
+    def _start_actions(self):
+        while self.queue:
+            simulated = self.queue[0]
+            if simulated.action.blockingType is ActionBlockingType.HARD:
+                if self.running:
+                    return
+            elif any(running.action.blockingType is ActionBlockingType.HARD
+                     for running in self.running):
+                return
+            self.queue.popleft()
+            simulated.status = ActionStatus.RUNNING
+            self.running.append(simulated)
+            self.changed = True
+            if simulated.action.blockingType is ActionBlockingType.HARD:
+                return
+
+    def _blocked(self) -> bool:
+        return bool(self.queue) or any(running.action.blockingType in _BLOCKING
+                                       for running in self.running)
+
+    def _drive(self, dt: float) -> float:
+        # Moves towards the released nodes, returns the distance driven
+        if not self.nodes or not self.nodes[0].released or self.battery_charge <= 0:
+            self.speed = 0.0
+            return 0.0
+        target = self.nodes[0].nodePosition
+        to_next = 0.0 if target is None else math.hypot(target.x - self.x, target.y - self.y)
+        to_stop = to_next + self._stop_after
+        self.speed = min(self.speed_max, self.speed + self.acceleration * dt,
+                         math.sqrt(2 * self.deceleration * to_stop))
+        travel = self.speed * dt
+        driven = 0.0
+        while self.nodes and self.nodes[0].released:
+            node = self.nodes[0]
+            target = node.nodePosition
+            if target is not None:
+                dx, dy = target.x - self.x, target.y - self.y
+                distance = math.hypot(dx, dy)
+                if distance > travel:
+                    self.x += dx / distance * travel
+                    self.y += dy / distance * travel
+                    self.theta = math.atan2(dy, dx)
+                    driven += travel
+                    self.distance_since_last_node += travel
+                    break
+                if distance > 0:
+                    self.theta = math.atan2(dy, dx)
+                self.x, self.y = target.x, target.y
+                travel -= distance
+                driven += distance
+                if target.mapId:
+                    self.map_id = target.mapId
+            self._reach(node)
+            if self._blocked():
+                self.speed = 0.0
+                break
+        if not self.nodes or not self.nodes[0].released:
+            self.speed = 0.0
+        return driven
+
+    def step(self, dt: float):
+        for simulated in list(self.running):
+            simulated.remaining -= dt
+            if simulated.remaining <= 0:
+                simulated.status = ActionStatus.FINISHED
+                self.running.remove(simulated)
+                self.changed = True
+        self._start_actions()
+        if self._blocked():
+            self.speed = 0.0
+            driven = 0.0
+        else:
+            driven = self._drive(dt)
+            # Actions of a node reached during this step start right away
+            self._start_actions()
+        drain = self.drain_per_second * dt + self.drain_per_meter * driven
+        self.battery_charge = max(self.battery_charge - drain, 0.0)
+
+    def state(self, timestamp: datetime) -> State:
+        # Built with construct(): every value comes from the simulation
+        self.header_id += 1
+        node_states = []
+        for node in self.nodes:
+            position = node.nodePosition
+            if position is not None:
+                position = NodePosition.construct(x=position.x, y=position.y, theta=position.theta,
+                                                  mapId=position.mapId or self.map_id)
+            node_states.append(NodeState.construct(
+                nodeId=node.nodeId, sequenceId=node.sequenceId,
+                nodeDescription=node.nodeDescription, nodePosition=position,
+                released=node.released))
+        edge_states = [
+            EdgeState.construct(edgeId=edge.edgeId, sequenceId=edge.sequenceId,
+                                edgeDescription=edge.edgeDescription, released=edge.released,
+                                trajectory=None)
+            for _, edge in sorted(self.edges.items())
+        ]
+        action_states = [
+            ActionState.construct(actionId=simulated.action.actionId,
+                                  actionType=simulated.action.actionType,
+                                  actionDescription=simulated.action.actionDescription,
+                                  actionStatus=simulated.status, resultDescription="")
+            for simulated in self.actions.values()
+        ]
+        return State.construct(
+            headerId=self.header_id,
+            timestamp=timestamp,
+            version="2.0.0",
+            manufacturer=self.manufacturer,
+            serialNumber=self.serialNumber,
+            orderId=self.order_id,
+            orderUpdateId=self.order_update_id,
+            zoneSetId=None,
+            lastNodeId=self.last_node_id,
+            lastNodeSequenceId=self.last_node_sequence_id,
+            driving=self.speed > 0,
+            paused=False,
+            newBaseRequest=False,
+            distanceSinceLastNode=self.distance_since_last_node,
+            operatingMode=OperatingMode.AUTOMATIC,
+            nodeStates=node_states,
+            edgeStates=edge_states,
+            agvPosition=AgvPosition.construct(x=self.x, y=self.y, theta=self.theta,
+                                              mapId=self.map_id, positionInitialized=True,
+                                              mapDescription="", localizationScore=None,
+                                              deviationRange=None),
+            velocity=Velocity.construct(vx=self.speed * math.cos(self.theta),
+                                        vy=self.speed * math.sin(self.theta), omega=0.0),
+            loads=[],
+            actionStates=action_states,
+            batteryState=BatteryState.construct(batteryCharge=self.battery_charge,
+                                                batteryVoltage=None, batteryHealth=None,
+                                                charging=False, reach=None),
+            errors=list(self.errors),
+            information=[],
+            safetyState=SafetyState.construct(eStop=EStopType.NONE, fieldViolation=False),
+        )
+
+
+class SimulationReport(NamedTuple):
+    agvs: int
+    simulated: float
+    elapsed: float
+    states: int
+    orders: int
+    # Ticks that started after their scheduled wall clock time
+    late_ticks: int
+
+    @property
+    def states_per_second(self) -> float:
+        return self.states / self.elapsed if self.elapsed else 0.0
+
+    @property
+    def orders_per_second(self) -> float:
+        return self.orders / self.elapsed if self.elapsed else 0.0
+
+    def __str__(self):
+        return ("%d AGVs, %.1f s simulated in %.1f s: %d states (%.0f/s), "
+                "%d orders (%.0f/s), %d late ticks"
+                % (self.agvs, self.simulated, self.elapsed, self.states, self.states_per_second,
+                   self.orders, self.orders_per_second, self.late_ticks))
+
+
+class FleetSimulator:
+
+    def __init__(self, gateway, tick: float = 0.1, speedup: Optional[float] = 1.0,
+                 start_time: Optional[datetime] = None):
+        # gateway is a Gateway or LoopbackGateway subscribed to ORDER.
+        # speedup=None runs the simulation as fast as possible
+        self.gateway = gateway
+        self.tick = tick
+        self.speedup = speedup
+        self.start_time = start_time
+        self.agvs: Dict[AgvKey, SimulatedAgv] = {}
+        self.factsheets: Dict[AgvKey, FactSheet] = {}
+        self.states = 0
+        self.orders = 0
+
+    def add(self, factsheet: FactSheet, **kwargs) -> SimulatedAgv:
+        agv = SimulatedAgv(factsheet, **kwargs)
+        # Spread the periodic states of the fleet over the interval
+        agv.next_state = (len(self.agvs) * self.tick) % agv.state_interval
+        self.agvs[agv.key] = agv
+        self.factsheets[agv.key] = factsheet
+        return agv
+
+    async def _receive(self):
+        async for message in self.gateway.messages(ORDER):
+            agv = self.agvs.get((message.manufacturer, message.serialNumber))
+            if agv is not None:
+                if agv.receive_order(message.payload):
+                    self.orders += 1
+
+    def _publish(self, agv: SimulatedAgv, now: float, timestamp: datetime):
+        self.gateway.publish(agv.manufacturer, agv.serialNumber, STATE, agv.state(timestamp))
+        self.states += 1
+        agv.changed = False
+        agv.last_state = now
+        agv.next_state = now + agv.state_interval
+
+    async def run(self, duration: float) -> SimulationReport:
+        loop = asyncio.get_running_loop()
+        start_time = self.start_time or datetime.now(timezone.utc)
+        for (manufacturer, serial_number), factsheet in self.factsheets.items():
+            self.gateway.publish(manufacturer, serial_number, FACTSHEET, factsheet, retain=True)
+        receiver = asyncio.ensure_future(self._receive())
+        states, orders = self.states, self.orders
+        started = loop.time()
+        late = 0
+        ticks = int(round(duration / self.tick))
+        try:
+            for tick in range(1, ticks + 1):
+                now = tick * self.tick
+                timestamp = start_time + timedelta(seconds=now)
+                for agv in self.agvs.values():
+                    agv.step(self.tick)
+                    if now >= agv.next_state or (
+                            agv.changed and now - agv.last_state >= agv.min_state_interval):
+                        self._publish(agv, now, timestamp)
+                if self.speedup is None:
+                    await asyncio.sleep(0)
+                    continue
+                delay = started + now / self.speedup - loop.time()
+                if delay < 0:
+                    late += 1
+                await asyncio.sleep(max(delay, 0))
+        finally:
+            receiver.cancel()
+        return SimulationReport(len(self.agvs), ticks * self.tick, loop.time() - started,
+                                self.states - states, self.orders - orders, late)
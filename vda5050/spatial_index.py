@@ -0,0 +1,205 @@
+import heapq
+import math
+from typing import Dict, Hashable, List, Set, Tuple
+
+from .order import Node, Order
+from .state import AgvPosition, State
+
+# Spatial index over AGV positions and order nodes
+#
+# Each mapId gets a uniform grid: points are hashed into square cells of
+# cell_size metres, so moving a point is a dict update and a radius query
+# only looks at the cells the circle overlaps. Pick cell_size around the
+# typical query radius.
+
+Hit = Tuple[float, Hashable]
+
+
+class GridIndex:
+
+    def __init__(self, cell_size: float = 5.0):
+        self.cell_size = cell_size
+        self.cells: Dict[Tuple[int, int], Dict[Hashable, Tuple[float, float]]] = {}
+        self.points: Dict[Hashable, Tuple[float, float, Tuple[int, int]]] = {}
+
+    def __len__(self):
+        return len(self.points)
+
+    def _cell(self, x: float, y: float) -> Tuple[int, int]:
+        return (math.floor(x / self.cell_size), math.floor(y / self.cell_size))
+
+    def insert(self, key: Hashable, x: float, y: float):
+        cell = self._cell(x, y)
+        old = self.points.get(key)
+        if old is not None and old[2] != cell:
+            self._discard(key, old[2])
+        self.points[key] = (x, y, cell)
+        members = self.cells.get(cell)
+        if members is None:
+            members = self.cells[cell] = {}
+        members[key] = (x, y)
+
+    def remove(self, key: Hashable):
+        old = self.points.pop(key, None)
+        if old is not None:
+            self._discard(key, old[2])
+
+    def _discard(self, key: Hashable, cell: Tuple[int, int]):
+        members = self.cells[cell]
+        del members[key]
+        if not members:
+            del self.cells[cell]
+
+    def within(self, x: float, y: float, radius: float) -> List[Hit]:
+        # (distance, key) of all points within radius, nearest first
+        hits = []
+        r2 = radius * radius
+        (i0, j0), (i1, j1) = self._cell(x - radius, y - radius), self._cell(x + radius, y + radius)
+        cells = self.cells
+        for i in range(i0, i1 + 1):
+            for j in range(j0, j1 + 1):
+                members = cells.get((i, j))
+                if not members:
+                    continue
+                for key, (px, py) in members.items():
+                    d2 = (px - x) ** 2 + (py - y) ** 2
+                    if d2 <= r2:
+                        hits.append((math.sqrt(d2), key))
+        hits.sort(key=lambda hit: hit[0])
+        return hits
+
+    def nearest(self, x: float, y: float, k: int = 1) -> List[Hit]:
+        # Searches rings of cells around (x, y) until the k-th best hit is
+        # closer than anything an unvisited ring could contain. Once a ring
+        # has more cells than there are occupied cells, e.g. far away from
+        # all points, the occupied cells outside the visited rings are
+        # scanned instead
+        if not self.points or k <= 0:
+            return []
+        best: List[Tuple[float, int, Hashable]] = []  # max-heap on distance
+        ci, cj = self._cell(x, y)
+        cells = self.cells
+        total = len(self.points)
+        seen = 0
+        ring = 0
+        while seen < total:
+            if len(best) == k and (ring - 1) * self.cell_size >= -best[0][0]:
+                break
+            last = 8 * ring > len(cells)
+            if last:
+                visit = [members for (i, j), members in cells.items()
+                         if max(abs(i - ci), abs(j - cj)) >= ring]
+            else:
+                visit = map(cells.get, _ring_cells(ci, cj, ring))
+            for members in visit:
+                if not members:
+                    continue
+                for key, (px, py) in members.items():
+                    d = math.hypot(px - x, py - y)
+                    seen += 1
+                    if len(best) < k:
+                        heapq.heappush(best, (-d, seen, key))
+                    elif d < -best[0][0]:
+                        heapq.heapreplace(best, (-d, seen, key))
+            if last:
+                break
+            ring += 1
+        return sorted(((-d, key) for d, _, key in best), key=lambda hit: hit[0])
+
+
+def _ring_cells(ci: int, cj: int, ring: int):
+    if ring == 0:
+        yield ci, cj
+        return
+    for i in range(ci - ring, ci + ring + 1):
+        yield i, cj - ring
+        yield i, cj + ring
+    for j in range(cj - ring + 1, cj + ring):
+        yield ci - ring, j
+        yield ci + ring, j
+
+
+class SpatialIndex:
+    # One GridIndex per mapId
+
+    def __init__(self, cell_size: float = 5.0):
+        self.cell_size = cell_size
+        self.maps: Dict[str, GridIndex] = {}
+        self.map_of: Dict[Hashable, str] = {}
+
+    def __len__(self):
+        return len(self.map_of)
+
+    def update(self, key: Hashable, map_id: str, x: float, y: float):
+        old_map = self.map_of.get(key)
+        if old_map is not None and old_map != map_id:
+            self.maps[old_map].remove(key)
+        grid = self.maps.get(map_id)
+        if grid is None:
+            grid = self.maps[map_id] = GridIndex(self.cell_size)
+        grid.insert(key, x, y)
+        self.map_of[key] = map_id
+
+    def remove(self, key: Hashable):
+        map_id = self.map_of.pop(key, None)
+        if map_id is not None:
+            self.maps[map_id].remove(key)
+
+    def within(self, map_id: str, x: float, y: float, radius: float) -> List[Hit]:
+        grid = self.maps.get(map_id)
+        return grid.within(x, y, radius) if grid is not None else []
+
+    def nearest(self, map_id: str, x: float, y: float, k: int = 1) -> List[Hit]:
+        grid = self.maps.get(map_id)
+        return grid.nearest(x, y, k) if grid is not None else []
+
+
+# Keys of indexed order nodes
+NodeKey = Tuple[str, str, int]  # (serialNumber, nodeId, sequenceId)
+
+
+class FleetSpatialIndex:
+    # AGV positions from State messages and released nodes of active orders
+
+    def __init__(self, cell_size: float = 5.0):
+        self.agvs = SpatialIndex(cell_size)
+        self.nodes = SpatialIndex(cell_size)
+        self._order_nodes: Dict[str, Set[NodeKey]] = {}
+
+    def update_state(self, state: State):
+        position = state.agvPosition
+        if position is None:
+            self.agvs.remove(state.serialNumber)
+        else:
+            self.agvs.update(state.serialNumber, position.mapId, position.x, position.y)
+
+    def update_order(self, order: Order):
+        # Replaces the nodes indexed for the AGV's previous order (update)
+        self.remove_order(order.serialNumber)
+        keys = set()
+        for node in order.nodes:
+            position = node.nodePosition
+            if node.released and position is not None:
+                key = (order.serialNumber, node.nodeId, node.sequenceId)
+                self.nodes.update(key, position.mapId, position.x, position.y)
+                keys.add(key)
+        self._order_nodes[order.serialNumber] = keys
+
+    def remove_order(self, serial_number: str):
+        for key in self._order_nodes.pop(serial_number, ()):
+            self.nodes.remove(key)
+
+    def agvs_near_node(self, node: Node, radius: float) -> List[Hit]:
+        position = node.nodePosition
+        if position is None:
+            return []
+        return self.agvs.within(position.mapId, position.x, position.y, radius)
+
+    def nodes_near_position(self, position: AgvPosition, radius: float) -> List[Hit]:
+        return self.nodes.within(position.mapId, position.x, position.y, radius)
+
+    def nearest_agvs(self, map_id: str, x: float, y: float, k: int = 1) -> List[Hit]:
+        return self.agvs.nearest(map_id, x, y, k)
+
+    def nearest_nodes(self, map_id: str, x: float, y: float, k: int = 1) -> List[Hit]:
+        return self.nodes.nearest(map_id, x, y, k)
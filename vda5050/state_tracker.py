@@ -0,0 +1,116 @@
+from enum import Enum
+from typing import Dict, Iterable, List, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel
+
+from .decoder import LazyState
+from .state import State
+
+# Per-AGV tracking of consecutive State messages
+#
+# StateTracker keeps the previous State per serialNumber and reports the
+# structural difference to the new one, so downstream consumers only have
+# to handle what actually changed.
+
+# headerId and timestamp change on every message and carry no information
+DEFAULT_IGNORE = frozenset({"headerId", "timestamp"})
+
+
+class Change(NamedTuple):
+    path: str
+    old: object
+    new: object
+
+    @property
+    def field(self) -> str:
+        # Top-level State field the change belongs to, e.g. "actionStates"
+        return self.path.split(".", 1)[0].split("[", 1)[0]
+
+    def __str__(self):
+        return "%s: %s -> %s" % (self.path, _format(self.old), _format(self.new))
+
+
+def _format(value):
+    if isinstance(value, Enum):
+        return value.value
+    if isinstance(value, BaseModel):
+        return type(value).__name__
+    return repr(value)
+
+
+_SCALARS = frozenset({str, int, float, bool, type(None)})
+
+
+def _same_fields(old: dict, new: dict) -> bool:
+    # Field dicts of two models compared without BaseModel.__eq__, which
+    # converts both to dicts: values must be the same objects or equal
+    # scalars of the same type
+    if old.keys() != new.keys():
+        return False
+    for name, a in old.items():
+        b = new[name]
+        if a is not b and not (type(a) is type(b) and type(a) in _SCALARS and a == b):
+            return False
+    return True
+
+
+def _diff_value(path: str, old, new, changes: List[Change]):
+    if old is new:
+        return
+    if isinstance(old, BaseModel) and type(old) is type(new):
+        if _same_fields(old.__dict__, new.__dict__):
+            return
+        _diff_fields(path + ".", old.__dict__, new.__dict__, (), changes)
+    elif isinstance(old, list) and isinstance(new, list):
+        common = min(len(old), len(new))
+        for i in range(common):
+            _diff_value("%s[%d]" % (path, i), old[i], new[i], changes)
+        for i in range(common, len(old)):
+            changes.append(Change("%s[%d]" % (path, i), old[i], None))
+        for i in range(common, len(new)):
+            changes.append(Change("%s[%d]" % (path, i), None, new[i]))
+    elif old != new:
+        changes.append(Change(path, old, new))
+
+
+def _diff_fields(prefix: str, old: dict, new: dict, ignore: Iterable[str],
+                 changes: List[Change]):
+    # Both sides' keys, so fields missing from new are reported too
+    for name, value in new.items():
+        if name in ignore:
+            continue
+        _diff_value(prefix + name, old.get(name), value, changes)
+    for name, value in old.items():
+        if name not in new and name not in ignore:
+            _diff_value(prefix + name, value, None, changes)
+
+
+def diff_states(old: State, new: State, ignore: Iterable[str] = DEFAULT_IGNORE) -> List[Change]:
+    changes = []
+    for state in (old, new):
+        if isinstance(state, LazyState):
+            state.materialize()
+    _diff_fields("", old.__dict__, new.__dict__, ignore, changes)
+    return changes
+
+
+class StateTracker:
+
+    def __init__(self, ignore: Iterable[str] = DEFAULT_IGNORE):
+        self.ignore = frozenset(ignore)
+        self.states: Dict[Tuple[str, str], State] = {}
+
+    def get(self, manufacturer: str, serial_number: str) -> Optional[State]:
+        return self.states.get((manufacturer, serial_number))
+
+    def update(self, state: State) -> Optional[List[Change]]:
+        # Returns None for the first State of an AGV, otherwise the changes
+        key = (state.manufacturer, state.serialNumber)
+        previous = self.states.get(key)
+        self.states[key] = state
+        if previous is None:
+            return None
+        return diff_states(previous, state, self.ignore)
+
+    def forget(self, manufacturer: str, serial_number: str):
+        self.states.pop((manufacturer, serial_number), None)
@@ -0,0 +1,42 @@
+import functools
+from typing import NamedTuple, Optional
+
+# VDA5050 MQTT topic layout: <interfaceName>/<majorVersion>/<manufacturer>/<serialNumber>/<subtopic>
+
+INTERFACE_NAME = "uagv"
+MAJOR_VERSION = "v2"
+
+ORDER = "order"
+INSTANT_ACTIONS = "instantActions"
+STATE = "state"
+VISUALIZATION = "visualization"
+CONNECTION = "connection"
+FACTSHEET = "factsheet"
+
+SUBTOPICS = (ORDER, INSTANT_ACTIONS, STATE, VISUALIZATION, CONNECTION, FACTSHEET)
+
+
+class Topic(NamedTuple):
+    manufacturer: str
+    serialNumber: str
+    subtopic: str
+
+
+def topic_for(manufacturer: str, serial_number: str, subtopic: str,
+              interface: str = INTERFACE_NAME, version: str = MAJOR_VERSION) -> str:
+    return "/".join((interface, version, manufacturer, serial_number, subtopic))
+
+
+def subscription_for(subtopic: str, interface: str = INTERFACE_NAME,
+                     version: str = MAJOR_VERSION) -> str:
+    # Wildcard subscription for one subtopic of every AGV
+    return topic_for("+", "+", subtopic, interface, version)
+
+
+# A fleet uses a bounded set of topics, parse each only once
+@functools.lru_cache(maxsize=65536)
+def parse_topic(topic: str) -> Optional[Topic]:
+    parts = topic.split("/")
+    if len(parts) != 5:
+        return None
+    return Topic(parts[2], parts[3], parts[4])
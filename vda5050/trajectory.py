@@ -0,0 +1,125 @@
+from collections import OrderedDict
+from typing import Dict, Hashable, Optional, Tuple
+
+import numpy as np
+
+from .state import Trajectory
+
+# NURBS evaluation of VDA5050 trajectories
+#
+# TrajectoryCurve compiles a Trajectory (degree, knotVector, weighted
+# controlPoints) into arrays and samples points, unit tangents and arc
+# length for many parameter values at once. Samples are kept per sample
+# count, and TrajectoryCache keeps curves per (edgeId, content hash), so
+# repeated State messages carrying the same edge trajectory are served
+# from the cache.
+
+
+def _basis(knots: np.ndarray, degree: int, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    # B-spline basis functions of the given degree and their first
+    # derivatives at all u, as (len(u), number of control points) arrays
+    n_knots = len(knots)
+    left = knots[:-1]
+    right = knots[1:]
+    basis = ((u[:, None] >= left) & (u[:, None] < right)).astype(float)
+    # The end of the domain belongs to the last non-empty span
+    last_span = np.nonzero(left < right)[0][-1]
+    basis[u >= knots[-1], :] = 0.0
+    basis[u >= knots[-1], last_span] = 1.0
+    derivative = np.zeros_like(basis)
+    for k in range(1, degree + 1):
+        count = n_knots - k - 1
+        lower = basis[:, :count]
+        upper = basis[:, 1:count + 1]
+        span_left = knots[k:k + count] - knots[:count]
+        span_right = knots[k + 1:k + 1 + count] - knots[1:count + 1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            a = np.where(span_left > 0, 1.0 / span_left, 0.0)
+            b = np.where(span_right > 0, 1.0 / span_right, 0.0)
+        if k == degree:
+            derivative = k * (lower * a - upper * b)
+        basis = ((u[:, None] - knots[:count]) * a) * lower \
+            + ((knots[k + 1:k + 1 + count] - u[:, None]) * b) * upper
+    return basis, derivative
+
+
+def trajectory_key(trajectory: Trajectory) -> int:
+    return hash((
+        trajectory.degree,
+        tuple(trajectory.knotVector),
+        tuple((point.x, point.y, point.weight) for point in trajectory.controlPoints),
+    ))
+
+
+class TrajectoryCurve:
+
+    def __init__(self, trajectory: Trajectory):
+        self.degree = trajectory.degree
+        self.knots = np.asarray(trajectory.knotVector, dtype=float)
+        points = trajectory.controlPoints
+        self.weights = np.array([1.0 if p.weight is None else p.weight for p in points])
+        self.control = np.array([(p.x, p.y) for p in points], dtype=float).reshape(-1, 2)
+        if len(self.knots) != len(points) + self.degree + 1:
+            raise ValueError("knotVector needs %d values for %d control points of degree %d"
+                             % (len(points) + self.degree + 1, len(points), self.degree))
+        self.start = self.knots[self.degree]
+        self.end = self.knots[-self.degree - 1]
+        self._samples: Dict[int, Tuple[np.ndarray, np.ndarray]] = {}
+
+    def evaluate(self, u: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+        # Points and derivatives dC/du at the parameters u, both (len(u), 2)
+        u = np.clip(np.asarray(u, dtype=float), self.start, self.end)
+        basis, derivative = _basis(self.knots, self.degree, u)
+        weighted = self.control * self.weights[:, None]
+        a = basis @ weighted
+        w = basis @ self.weights
+        da = derivative @ weighted
+        dw = derivative @ self.weights
+        points = a / w[:, None]
+        return points, (da - dw[:, None] * points) / w[:, None]
+
+    def sample(self, n: int = 64) -> Tuple[np.ndarray, np.ndarray]:
+        # n points evenly spaced in the parameter and their unit tangents
+        samples = self._samples.get(n)
+        if samples is None:
+            points, derivatives = self.evaluate(np.linspace(self.start, self.end, n))
+            norms = np.linalg.norm(derivatives, axis=1, keepdims=True)
+            with np.errstate(divide="ignore", invalid="ignore"):
+                tangents = np.where(norms > 0, derivatives / norms, 0.0)
+            samples = self._samples[n] = (points, tangents)
+        return samples
+
+    def points(self, n: int = 64) -> np.ndarray:
+        return self.sample(n)[0]
+
+    def tangents(self, n: int = 64) -> np.ndarray:
+        return self.sample(n)[1]
+
+    def length(self, n: int = 256) -> float:
+        # Arc length of the polyline through n samples
+        points = self.points(n)
+        return float(np.linalg.norm(np.diff(points, axis=0), axis=1).sum())
+
+
+class TrajectoryCache:
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.curves: "OrderedDict[Tuple[Hashable, int], TrajectoryCurve]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, edge_id: Hashable, trajectory: Optional[Trajectory]) -> Optional[TrajectoryCurve]:
+        if trajectory is None:
+            return None
+        key = (edge_id, trajectory_key(trajectory))
+        curve = self.curves.get(key)
+        if curve is not None:
+            self.hits += 1
+            self.curves.move_to_end(key)
+            return curve
+        self.misses += 1
+        curve = self.curves[key] = TrajectoryCurve(trajectory)
+        if len(self.curves) > self.max_size:
+            self.curves.popitem(last=False)
+        return curve
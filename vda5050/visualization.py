@@ -0,0 +1,18 @@
+from pydantic import BaseModel
+from typing import Optional
+
+from .state import AgvPosition, Velocity
+
+# Everything needed for Visualization VDA5050
+#
+# The position and velocity part of State, sent at a higher rate for
+# visualization only.
+
+class Visualization(BaseModel):
+    headerId: int = 0
+    timestamp: str = ""
+    version: str = "2.0.0"
+    manufacturer: str = ""
+    serialNumber: str = ""
+    agvPosition: Optional[AgvPosition]
+    velocity: Optional[Velocity]